@@ -1,10 +1,26 @@
 from PIL import Image
 import streamlit as st
 import pandas as pd
+import numpy as np
 import altair as alt
-from datetime import datetime
 from wordcloud import WordCloud
 import io
+import json
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from data_loader import (APPEND_ONLY_DATASETS, DATASET_SCHEMAS, DATASET_SORT_COLUMNS, INGEST_WORKERS, concat_frames,
+                         ingest_source, parse_csv, read_manifest, read_store, source_signature, store_date_bounds,
+                         store_months, store_part_paths)
+from hyperloglog import RELATIVE_ERROR, build_sketches, estimate_distinct
+from calendar_features import (DAY_TYPES, DAYS_OF_WEEK, format_duration, totals_by_day_of_week, totals_by_day_type,
+                               totals_by_hour, weekday_hour_totals)
+from downsampling import downsample
+from query_backend import connect_backend
+from rankings import RANKING_QUERIES, RANKINGS, score_cart_add_visitors, score_viewer_sessions
 
 # Function to inject tooltip CSS and render a tooltip
 def add_tooltip_css():
@@ -103,40 +119,1039 @@ def add_custom_css():
         unsafe_allow_html=True
     )
 
-def load_data(file_path):
-    df = pd.read_csv(file_path, parse_dates=False)  # Don't parse dates initially
-    date_columns = ['Order_Created_At', 'Order_Updated_At','Event_Time','Customer_Created_At','Customer_Updated_At','Order_Created_At','Order_Updated_At','Variant_Created_At','Product_Created_At']
-    for col in df.columns:
-        if col in date_columns and df[col].dtype == 'object':  # Only convert the specified columns
-            try:
-                df[col] = pd.to_datetime(df[col], errors='coerce', utc=True)
-            except Exception as e:
-                st.error(f"Error parsing column '{col}': {e}")
+def sort_by_date(df, sort_column):
+    if sort_column in df.columns:
+        # Stable sort: rows sharing a timestamp, like the line items of an order, keep their file order
+        df = df.sort_values(sort_column, kind='mergesort', na_position='last', ignore_index=True)
     return df
 
-# Load the datasets
-df_abandoned_checkouts = load_data('D:\\All_New_Data\\dyori_AbandonedCheckouts.csv')
-df_cj = load_data('D:\\All_New_Data\\dyori_CJ.csv')
-df_customers = load_data('D:\\All_New_Data\\dyori_Customers_Dataset.csv')
-df_orders = load_data('D:\\All_New_Data\\dyori_Orders_Dataset.csv')
-df_products = load_data('D:\\All_New_Data\\dyori_Products_Dataset.csv')
+def load_data(file_path, schema, columns=None, sort_column=None):
+    # Used when the store of the dataset can't be written: parse the whole CSV
+    df = sort_by_date(parse_csv(file_path, schema), sort_column)
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df
+
+# Location of each dataset export
+DATASET_PATHS = {
+    'abandoned_checkouts': 'D:\\All_New_Data\\dyori_AbandonedCheckouts.csv',
+    'cj': 'D:\\All_New_Data\\dyori_CJ.csv',
+    'customers': 'D:\\All_New_Data\\dyori_Customers_Dataset.csv',
+    'orders': 'D:\\All_New_Data\\dyori_Orders_Dataset.csv',
+    'products': 'D:\\All_New_Data\\dyori_Products_Dataset.csv',
+}
+
+# Engine running the rankings that have a query in RANKING_QUERIES, one of query_backend.QUERY_BACKENDS:
+# 'duckdb' aggregates the store files of the range without loading its rows, and falls back to 'pandas'
+# when DuckDB isn't installed
+QUERY_BACKEND = 'pandas'
+
+class DatasetEntry:
+    """
+    Columns of one version of a dataset that have been loaded so far.
+    """
+    def __init__(self, signature, manifest=None):
+        self.signature = signature
+        self.manifest = manifest  # Manifest of the store of the dataset, None when the source is loaded in full
+        self.frame = None
+        self.complete = False  # True once every column of the source is loaded
+        self.absent = set()  # Requested columns that the source doesn't have
+        self.derived = {}  # table name -> table computed from this version of the dataset
+        self.updates = {}  # table name -> (build, update, columns, monthly), as passed to DatasetRegistry.derived
+        self.updating = False  # True while the derived tables are updated for appended rows
+        self.windows = OrderedDict()  # (columns, months) -> rows of these months of the store, most recent last
+
+    def extended_by(self, manifest):
+        """
+        Returns True when a store manifest holds the batches of rows of this version followed by appended batches.
+        """
+        return (self.manifest is not None and manifest is not None
+                and manifest['store_id'] == self.manifest['store_id']
+                and manifest['batch'] >= self.manifest['batch'])
+
+    def missing(self, columns):
+        if self.complete:
+            return []
+        loaded = set() if self.frame is None else set(self.frame.columns)
+        return [col for col in columns if col not in loaded and col not in self.absent]
+
+    def holds(self, columns):
+        """
+        Returns True when the columns (default: all columns of the source) are loaded for every row.
+        """
+        if columns is None or self.frame is None:
+            return self.complete
+        return not self.missing(columns)
+
+    def add(self, frame, requested):
+        self.absent.update(set(requested) - set(frame.columns))
+        if len(frame.columns) == 0:
+            return
+        self.frame = frame if self.frame is None else pd.concat([self.frame, frame], axis=1, copy=False)
+
+class DatasetRegistry:
+    """
+    Holds one copy of each dataset for the whole Streamlit process, shared by all viewer sessions.
+    A dataset is loaded on first request and reloaded only when its source file changes.
+    Only the columns requested so far are kept in memory, and the rows of a date range are read
+    from the months of the dataset's store overlapping it unless the whole dataset is already loaded.
+    """
+    # Rows of the last date ranges read are kept per dataset, so that reruns don't read the store again
+    WINDOW_COUNT = 4
+
+    def __init__(self, executor):
+        self._entries = {}  # name -> DatasetEntry
+        self._locks = {name: threading.RLock() for name in DATASET_PATHS}
+        self._executor = executor  # Pool of worker processes ingesting the sources
+
+    @staticmethod
+    def project(frame, columns):
+        # The view shares the column arrays of the registry frame: pages may add columns to it,
+        # but must never modify the values of existing columns in place
+        if columns is None:
+            return frame.copy(deep=False)
+        return pd.concat([frame[col] for col in columns if col in frame.columns], axis=1, copy=False)
+
+    def refresh(self, name):
+        """
+        Returns the entry of the current version of a dataset, ingesting its source into the store when it changed.
+        Rows appended to an append-only source extend the loaded entry instead of replacing it.
+        Must be called with the lock of the dataset held.
+        """
+        file_path = DATASET_PATHS[name]
+        signature = source_signature(file_path)
+        entry = self._entries.get(name)
+        if entry is not None and (entry.signature == signature or entry.updating):
+            return entry
+        manifest = self.ingest(name)
+        if entry is not None and entry.extended_by(manifest):
+            entry.signature = signature
+            self.append(name, entry, manifest)
+            return entry
+        # Release the outdated frame before loading the new version
+        self._entries.pop(name, None)
+        entry = DatasetEntry(signature, manifest)
+        self._entries[name] = entry
+        return entry
+
+    def ingest(self, name):
+        """
+        Brings the store of a dataset up to date and returns its manifest, or None when it can't be written.
+        The changed source of an append-only dataset is parsed in chunks by the worker processes,
+        any other changed source is parsed and stored by one of them.
+        """
+        args = (DATASET_PATHS[name], DATASET_SCHEMAS[name], DATASET_SORT_COLUMNS.get(name))
+        if name in APPEND_ONLY_DATASETS:
+            return ingest_source(*args, append_only=True, executor=self._executor)
+        return read_manifest(*args) or self._executor.submit(ingest_source, *args).result()
+
+    def prepare(self, names):
+        """
+        Brings the entries of several datasets up to date at once: the sources that changed are ingested
+        concurrently instead of one after the other.
+        """
+        def refresh(name):
+            with self._locks[name]:
+                self.refresh(name)
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix='ingest') as threads:
+            list(threads.map(refresh, names))
+
+    def get(self, name, columns=None, start_date=None, end_date=None):
+        """
+        Returns a read-only view of a dataset.
+        Parameters:
+        - name (str): Key of the dataset in DATASET_PATHS.
+        - columns (list): Columns needed by the caller (default: all columns of the source).
+        - start_date / end_date (Timestamp): Only return the rows whose sort column (see DATASET_SORT_COLUMNS)
+          is in this range, as returned by select_date_range (default: all rows).
+        """
+        sort_column = DATASET_SORT_COLUMNS.get(name)
+        in_range = start_date is not None and end_date is not None
+        with self._locks[name]:
+            entry = self.refresh(name)
+            if in_range and entry.manifest is not None and not entry.holds(columns):
+                requested = entry.manifest['columns'] if columns is None else columns
+                if sort_column not in requested:
+                    requested = requested + [sort_column]
+                months = store_months(entry.manifest, start_date, end_date)
+                frame = filter_by_date(self.load_window(name, entry, requested, months),
+                                       sort_column, start_date, end_date)
+                return self.project(frame, columns)
+            if columns is None:
+                if not entry.complete:
+                    entry.frame = self.load(name, entry)
+                    entry.complete = True
+            else:
+                missing = entry.missing(columns)
+                if missing:
+                    entry.add(self.load(name, entry, missing), missing)
+            frame = entry.frame
+        if in_range:
+            frame = filter_by_date(frame, sort_column, start_date, end_date)
+        return self.project(frame, columns)
+
+    def date_bounds(self, name):
+        """
+        Returns the first and last date of the sort column of a dataset, or None when no row has a date.
+        """
+        with self._locks[name]:
+            entry = self.refresh(name)
+            if entry.manifest is not None:
+                return store_date_bounds(entry.manifest)
+        # Sorted with missing dates last
+        dates = self.get(name, [DATASET_SORT_COLUMNS[name]]).iloc[:, 0]
+        dated_rows = dates.searchsorted(pd.Timestamp.max.tz_localize('UTC'), side='right')
+        if dated_rows == 0:
+            return None
+        return dates.iloc[0], dates.iloc[dated_rows - 1]
+
+    def load(self, name, entry, columns=None, months=None):
+        """
+        Returns columns of the version of a dataset held by an entry (default: all columns of the source),
+        from the rows of some months of its store (default: all rows).
+        """
+        file_path = DATASET_PATHS[name]
+        schema = DATASET_SCHEMAS[name]
+        sort_column = DATASET_SORT_COLUMNS.get(name)
+        if entry.manifest is None:
+            return load_data(file_path, schema, columns, sort_column)
+        # Within a month the store holds the rows in source order, sorted here like a parse of the whole file
+        read_columns = None if columns is None else columns + [sort_column]
+        df = sort_by_date(read_store(file_path, entry.manifest, read_columns, months), sort_column)
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        return df
+
+    def load_window(self, name, entry, columns, months):
+        """
+        Returns columns of the rows of some months of a dataset, keeping the last WINDOW_COUNT windows read.
+        """
+        key = (tuple(columns), tuple(months))
+        if key not in entry.windows:
+            entry.windows[key] = self.load(name, entry, columns, months)
+            while len(entry.windows) > self.WINDOW_COUNT:
+                entry.windows.popitem(last=False)
+        entry.windows.move_to_end(key)
+        return entry.windows[key]
+
+    def build_by_month(self, name, entry, build, columns, months):
+        """
+        Returns the tables built from the rows of each month of a dataset, concatenated in month order.
+        Only the rows of one month are loaded at a time.
+        """
+        tables = [build(self.load(name, entry, columns, [month])) for month in months]
+        if not tables:
+            return build(self.load(name, entry, columns, []))
+        return concat_frames(tables)
+
+    def append(self, name, entry, manifest):
+        """
+        Extends an entry with the batches of rows appended to its store since it was loaded.
+        The loaded columns are extended with the appended rows only. Derived tables built per month are built
+        again for the months of the appended rows, tables with an update function are updated from the
+        appended rows, and the others are dropped and built again on their next request.
+        """
+        after_batch = entry.manifest['batch']
+        entry.manifest = manifest
+        if manifest['batch'] == after_batch:
+            return
+        entry.windows.clear()
+        appended = None
+        if entry.frame is not None:
+            appended = read_store(DATASET_PATHS[name], manifest, list(entry.frame.columns), after_batch=after_batch)
+            entry.frame = sort_by_date(concat_frames([entry.frame, appended]), DATASET_SORT_COLUMNS.get(name))
+        months = sorted({part['month'] for part in manifest['parts']
+                         if part['month'] is not None and part['batches'][-1][0] > after_batch})
+        entry.updating = True
+        try:
+            # Tables are visited in the order they were built, so the tables an update reads are already updated
+            for table_name in list(entry.derived):
+                build, update, columns, monthly = entry.updates[table_name]
+                table = entry.derived[table_name]
+                if monthly:
+                    kept = table[~table['Day'].dt.to_period('M').astype(str).isin(months)]
+                    rebuilt = self.build_by_month(name, entry, build, columns, months)
+                    entry.derived[table_name] = concat_frames([kept, rebuilt]).sort_values(
+                        'Day', kind='mergesort', ignore_index=True)
+                elif update is not None and appended is not None:
+                    entry.derived[table_name] = update(table, self.project(entry.frame, columns),
+                                                       self.project(appended, columns))
+                else:
+                    del entry.derived[table_name]
+        finally:
+            entry.updating = False
+
+    def derived(self, name, table_name, build, columns, update=None, monthly=False):
+        """
+        Returns a table computed from a dataset, built once per version of the dataset.
+        The table is shared by all viewer sessions and must not be modified.
+        Parameters:
+        - name (str): Key of the dataset in DATASET_PATHS.
+        - table_name (str): Key of the table among the tables derived from the dataset.
+        - build (callable): Builds the table from the dataset, or from None when no column is read.
+        - columns (list): Columns of the dataset read by build.
+        - update (callable): For append-only datasets, returns the table updated for appended rows, called with
+          the table, the dataset and the appended rows (default: the table is built again from the dataset).
+        - monthly (bool): The table is keyed by a 'Day' column of naive UTC days, so that it is built month by
+          month from the rows of each month and only the months of appended rows are built again (default: False).
+        """
+        with self._locks[name]:
+            entry = self.refresh(name)
+            if table_name not in entry.derived:
+                if monthly and entry.manifest is not None:
+                    months = [month for month in store_months(entry.manifest) if month is not None]
+                    table = self.build_by_month(name, entry, build, columns, months)
+                else:
+                    table = build(self.get(name, columns) if columns else None)
+                entry.derived[table_name] = table
+                entry.updates[table_name] = (build, update, columns, monthly)
+            return entry.derived[table_name]
+
+    def query(self, name, backend, sql, start_date=None, end_date=None):
+        """
+        Returns the result of a query of a query backend over the store of a dataset, or None when the dataset
+        has no store. The store files read are those of the months overlapping the date range (default: all rows).
+        """
+        with self._locks[name]:
+            # Held while the files are read: appended batches may compact and replace them
+            entry = self.refresh(name)
+            if entry.manifest is None:
+                return None
+            paths = store_part_paths(DATASET_PATHS[name], entry.manifest,
+                                     store_months(entry.manifest, start_date, end_date))
+            if not paths:
+                return None
+            return backend.query(sql, paths, DATASET_SORT_COLUMNS.get(name), start_date, end_date)
+
+@st.cache_resource(show_spinner=False)
+def get_dataset_registry():
+    # Spawned rather than forked, like on Windows. A spawned worker imports this script as __mp_main__, which
+    # defines the functions but doesn't render a page: only a script run has __name__ == '__main__'
+    return DatasetRegistry(ProcessPoolExecutor(max_workers=INGEST_WORKERS, mp_context=multiprocessing.get_context('spawn')))
+
+@st.cache_resource(show_spinner=False)
+def get_query_backend():
+    return connect_backend(QUERY_BACKEND)
+
+def get_dataset(name, columns=None, start_date=None, end_date=None):
+    return get_dataset_registry().get(name, columns, start_date, end_date)
+
+# Events that are page views, the other events (searches, cart adds) happen on a page
+PAGE_EVENTS = ['Cart', 'Home', 'Product', 'Collection']
+
+def build_session_table(df_cj):
+    """
+    Returns one row per (Customer_IP, session) of the customer journey with:
+    - Start_Time / End_Time: first and last event timestamps, Day: UTC day the session started on
+    - Duration: total time on page in seconds, Event_Count: number of events
+    - First_Event / Last_Event: first and last event of the session
+    - Last_Page_Event / Last_Page_Time: last page view of the session and the time spent on it, used for bounces
+    """
+    keys = ['Customer_IP', 'session']
+    sessions = df_cj.groupby(keys, observed=True).agg(
+        Start_Time=('Event_Time', 'min'),
+        End_Time=('Event_Time', 'max'),
+        Duration=('Time_On_Page', 'sum'),
+        Event_Count=('Event', 'size'),
+    )
+    # groupby().first()/.last() are slow on categorical columns, read the events from the first and last rows instead
+    first_rows = df_cj.drop_duplicates(subset=keys, keep='first').set_index(keys)
+    last_rows = df_cj.drop_duplicates(subset=keys, keep='last').set_index(keys)
+    sessions['First_Event'] = first_rows['Event']
+    sessions['Last_Event'] = last_rows['Event']
+    page_views = df_cj[df_cj['Event'].isin(PAGE_EVENTS)]
+    last_page_views = page_views.drop_duplicates(subset=keys, keep='last').set_index(keys)
+    sessions['Last_Page_Event'] = last_page_views['Event']
+    sessions['Last_Page_Time'] = last_page_views['Time_On_Page']
+    sessions['Day'] = sessions['Start_Time'].dt.tz_convert(None).dt.normalize()
+    # Sorted by start time like the datasets, so that a date range is sliced by binary search
+    return sessions.reset_index().sort_values('Start_Time', kind='mergesort', na_position='last', ignore_index=True)
+
+def in_sessions_of(df, rows):
+    """
+    Returns a boolean mask of the rows of df whose (Customer_IP, session) is the session of one of the given rows.
+    """
+    keys = ['Customer_IP', 'session']
+    sessions = pd.MultiIndex.from_frame(rows[keys].drop_duplicates())
+    candidates = df[df['Customer_IP'].isin(sessions.get_level_values('Customer_IP'))]
+    matches = candidates.index[pd.MultiIndex.from_frame(candidates[keys]).isin(sessions)]
+    return df.index.isin(matches)
+
+def update_session_table(sessions, df_cj, appended):
+    """
+    Updates the session table for rows appended to the customer journey: only the sessions the
+    appended rows belong to are built again, from all of their rows.
+    """
+    rebuilt = build_session_table(df_cj[in_sessions_of(df_cj, appended)])
+    sessions = concat_frames([sessions[~in_sessions_of(sessions, appended)], rebuilt])
+    return sessions.sort_values('Start_Time', kind='mergesort', na_position='last', ignore_index=True)
+
+SESSION_SOURCE_COLUMNS = ['Customer_IP', 'session', 'Event_Time', 'Event', 'Time_On_Page']
+
+def get_session_table():
+    return get_dataset_registry().derived('cj', 'sessions', build_session_table, SESSION_SOURCE_COLUMNS,
+                                          update_session_table)
+
+# Columns of an order repeated by each of its line items in the orders dataset
+ORDER_HEADER_COLUMNS = ['Order_ID', 'Order_Created_At', 'Customer_ID', 'Customer_Name', 'Order_Total_Price',
+                        'Order_Refund_Amount', 'Order_Cancelled_At', 'Order_Referring_Site']
+
+def build_order_headers(df_orders):
+    """
+    Returns one row per order with its ORDER_HEADER_COLUMNS, read from its first line item, sorted by order date
+    like the dataset, and Day: the UTC day the order was placed on.
+    """
+    headers = df_orders.drop_duplicates(subset='Order_ID', keep='first')
+    headers = headers.assign(Day=headers['Order_Created_At'].dt.tz_convert(None).dt.normalize())
+    return headers.reset_index(drop=True)
+
+def get_order_headers(start_date=None, end_date=None):
+    """
+    Returns the order header table, restricted to a range returned by select_date_range.
+    Pages read orders from it rather than collapsing the line items of the orders dataset again. It is built
+    once per version of the dataset, month by month, and shared by all viewer sessions: it must not be modified.
+    """
+    headers = get_dataset_registry().derived('orders', 'headers', build_order_headers, ORDER_HEADER_COLUMNS,
+                                             monthly=True)
+    return filter_by_date(headers, 'Order_Created_At', start_date, end_date)
 
-def filter_by_date(df, date_column, label_prefix=""):
-    min_date = df[date_column].min().date()
-    max_date = df[date_column].max().date()
+def build_daily_buckets(df, date_column, measures):
+    """
+    Returns partial aggregates of a dataset per UTC day and hour, sorted by day.
+    Additive totals over any date range are then sums over the buckets of its days, without going back to the rows.
+    Parameters:
+    - df (DataFrame): Rows to aggregate, rows without a date are left out.
+    - date_column (str): Timestamp column the rows are bucketed by.
+    - measures (dict): Output column -> (input column, aggregation), as passed to groupby().agg().
+    """
+    dates = df[date_column].dropna()
+    df = df.loc[dates.index]
+    keys = [dates.dt.tz_convert(None).dt.normalize().rename('Day'), dates.dt.hour.rename('Hour')]
+    return df.groupby(keys).agg(**measures).reset_index()
+
+def update_daily_buckets(buckets, rows, date_column, measures, since):
+    """
+    Returns daily buckets whose buckets from the day `since` on are built again from rows,
+    which must hold every row of the dataset dated from that day on.
+    """
+    return concat_frames([buckets[buckets['Day'] < since], build_daily_buckets(rows, date_column, measures)])
+
+SESSION_MEASURES = {
+    'Sessions': ('session', 'size'),
+    'Duration': ('Duration', 'sum'),
+}
+
+def build_daily_sessions(df_cj):
+    return build_daily_buckets(get_session_table(), 'Start_Time', SESSION_MEASURES)
+
+def update_daily_sessions(buckets, df_cj, appended):
+    sessions = get_session_table()
+    # A session continued by appended rows is counted on the day it started, which may be before them
+    since = sessions.loc[in_sessions_of(sessions, appended), 'Day'].min()
+    if pd.isna(since):
+        return buckets
+    return update_daily_buckets(buckets, sessions[sessions['Day'] >= since], 'Start_Time', SESSION_MEASURES, since)
+
+def build_daily_orders(df_orders):
+    return build_daily_buckets(get_order_headers(), 'Order_Created_At', {
+        'Orders': ('Order_ID', 'size'),
+        'Revenue': ('Order_Total_Price', 'sum'),
+        'Priced_Orders': ('Order_Total_Price', 'count'),
+        'Refunds': ('Order_Refund_Amount', 'sum'),
+    })
+
+def build_daily_abandoned_checkouts(df_abandoned_checkouts):
+    df_unique_checkouts = df_abandoned_checkouts.drop_duplicates(subset='Order_ID', keep='first')
+    return build_daily_buckets(df_unique_checkouts, 'Order_Created_At', {
+        'Orders': ('Order_ID', 'size'),
+    })
+
+# Dataset name -> (function building its daily buckets, dataset columns the function reads,
+#                  function updating them for appended rows or None, whether they are built month by month)
+# Session buckets are built from the session table, whose sessions may span months, and order buckets from the
+# order headers, themselves built month by month
+DAILY_BUCKETS = {
+    'cj': (build_daily_sessions, SESSION_SOURCE_COLUMNS, update_daily_sessions, False),
+    'orders': (build_daily_orders, [], None, False),
+    'abandoned_checkouts': (build_daily_abandoned_checkouts, ['Order_ID', 'Order_Created_At'], None, True),
+}
+
+def get_daily_buckets(name, start_date=None, end_date=None):
+    """
+    Returns the daily buckets of a dataset, restricted to a range returned by select_date_range.
+    The buckets are shared by all viewer sessions and must not be modified.
+    """
+    build, columns, update, monthly = DAILY_BUCKETS[name]
+    buckets = get_dataset_registry().derived(name, 'daily', build, columns, update, monthly)
+    if start_date is None or end_date is None:
+        return buckets
+    # Buckets are keyed by naive UTC days, and the range bounds are UTC midnights
+    return filter_by_date(buckets, 'Day', start_date.tz_convert(None), end_date.tz_convert(None))
+
+# Metric of the time-series views -> (dataset, measure of its daily buckets)
+DAILY_METRICS = {
+    'sessions': ('cj', 'Sessions'),
+    'orders': ('orders', 'Orders'),
+    'revenue': ('orders', 'Revenue'),
+    'refunds': ('orders', 'Refunds'),
+    'abandoned_orders': ('abandoned_checkouts', 'Orders'),
+}
+
+def get_daily_metric(metric, start_date=None, end_date=None):
+    """
+    Returns the totals of a metric per UTC day, indexed by day, restricted to a range returned by select_date_range.
+    The totals are read from the daily rollup of the metric's dataset, built once per version of the dataset
+    from its daily buckets; days without rows are left out.
+    Parameters:
+    - metric (str): Key of the metric in DAILY_METRICS.
+    """
+    name, measure = DAILY_METRICS[metric]
+    def build_rollup(df):
+        return get_daily_buckets(name).drop(columns='Hour').groupby('Day', sort=True).sum().reset_index()
+    rollup = get_dataset_registry().derived(name, 'daily_rollup', build_rollup, [])
+    if start_date is not None and end_date is not None:
+        rollup = filter_by_date(rollup, 'Day', start_date.tz_convert(None), end_date.tz_convert(None))
+    return rollup.set_index('Day')[measure]
+
+def get_calendar_totals(name, start_date, end_date):
+    """
+    Returns the totals of every measure of a dataset's daily buckets per day of the week and hour of the day,
+    restricted to a range returned by select_date_range, as a dict measure -> array of shape (7, 24).
+    The weekday vs weekend, day of the week and hour of the day charts of a page are all views of them,
+    summed with totals_by_day_type, totals_by_day_of_week and totals_by_hour.
+    """
+    buckets = get_daily_buckets(name, start_date, end_date)
+    return weekday_hour_totals(buckets['Day'], buckets['Hour'], buckets.drop(columns=['Day', 'Hour']))
+
+def build_customer_days(df_orders):
+    """
+    Returns the orders placed and the spending of each customer per UTC day they ordered on, sorted by day.
+    Orders, spending and first and last order days over any date range are aggregated from the days of the range,
+    so that appended months only add rows and the orders are never collapsed per customer again.
+    """
+    headers = build_order_headers(df_orders)
+    return headers.groupby(['Day', 'Customer_ID'], sort=True).agg(
+        Customer_Name=('Customer_Name', 'first'),
+        Orders_Placed=('Order_ID', 'size'),
+        Total_Spending=('Order_Total_Price', 'sum'),
+    ).reset_index()
+
+def get_customer_days():
+    return get_dataset_registry().derived('orders', 'customer_days', build_customer_days,
+                                          ['Order_ID', 'Order_Created_At', 'Customer_ID', 'Customer_Name',
+                                           'Order_Total_Price'], monthly=True)
+
+# RFM segments, from the recency and frequency scores of a customer: the first matching segment applies,
+# the last one holds every other customer
+RFM_SEGMENTS = [
+    ('Champions', lambda r, f: (r >= 4) & (f >= 4)),
+    ('Loyal', lambda r, f: f >= 4),
+    ('Potential loyalists', lambda r, f: (r >= 4) & (f >= 2)),
+    ('New', lambda r, f: r >= 4),
+    ('Needs attention', lambda r, f: r == 3),
+    ('At risk', lambda r, f: f >= 3),
+    ('Hibernating', lambda r, f: f >= 1),
+]
+
+def rfm_score(values):
+    """
+    Scores values from 1 to 5 by quintile of their rank, highest values highest; tied values share the lowest score.
+    """
+    return np.ceil(values.rank(method='min', pct=True) * 5).astype(np.int8)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def compute_customer_features(version, start_date, end_date):
+    """
+    Returns one row per customer who ordered in a date range, keyed by Customer_ID, with:
+    - Customer_Name: name on their first order of the range
+    - Orders_Placed / Total_Spending: orders placed and their total price
+    - First_Order / Last_Order: UTC days of their first and last order, Recency: days from the last one to the end
+      of the range
+    - R_Score / F_Score / M_Score: recency, frequency and monetary scores from 1 to 5, and Segment: their RFM segment
+    Cached per version of the orders dataset and date range.
+    """
+    days = get_customer_days()
+    if start_date is not None and end_date is not None:
+        days = filter_by_date(days, 'Day', start_date.tz_convert(None), end_date.tz_convert(None))
+    features = days.groupby('Customer_ID', sort=True).agg(
+        Customer_Name=('Customer_Name', 'first'),
+        Orders_Placed=('Orders_Placed', 'sum'),
+        Total_Spending=('Total_Spending', 'sum'),
+        First_Order=('Day', 'min'),
+        Last_Order=('Day', 'max'),
+    ).reset_index()
+    last_day = days['Day'].max() if end_date is None else end_date.tz_convert(None) - pd.Timedelta(days=1)
+    features['Recency'] = (last_day - features['Last_Order']).dt.days
+    features['R_Score'] = rfm_score(-features['Recency'])
+    features['F_Score'] = rfm_score(features['Orders_Placed'])
+    features['M_Score'] = rfm_score(features['Total_Spending'])
+    segments = [name for name, _ in RFM_SEGMENTS]
+    features['Segment'] = pd.Categorical(
+        np.select([rule(features['R_Score'], features['F_Score']) for _, rule in RFM_SEGMENTS], segments, None),
+        categories=segments)
+    return features
+
+def get_customer_features(start_date, end_date):
+    """
+    Returns the customer feature table of a range returned by select_date_range (see compute_customer_features).
+    """
+    return compute_customer_features(source_signature(DATASET_PATHS['orders']), start_date, end_date)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def rollup_daily_metric(daily_totals, grain):
+    """
+    Re-aggregates per-day totals to a time grain, without going back to the rows.
+    Returns a Series indexed by period, with the grain as index name:
+    - 'day': the day, 'month': first day of the month, 'quarter': label like '2024Q1', 'year': the year number
+    Parameters:
+    - daily_totals (Series): Totals indexed by day, as returned by get_daily_metric.
+    - grain (str): 'day', 'month', 'quarter' or 'year'.
+    """
+    days = daily_totals.index
+    if grain == 'day':
+        return daily_totals.rename_axis('day')
+    if grain == 'month':
+        periods = days.to_period('M').to_timestamp()
+    elif grain == 'quarter':
+        periods = days.to_period('Q').astype(str)
+    elif grain == 'year':
+        periods = days.year
+    else:
+        raise ValueError(f"Unknown time grain: {grain}")
+    return daily_totals.groupby(periods.rename(grain)).sum()
+
+# Per-day line charts span the page, about this many pixels wide on the dashboard screens. Their series are
+# downsampled to one point every DAILY_CHART_PIXELS_PER_POINT pixels, denser points can't be told apart
+DAILY_CHART_WIDTH = 1200
+DAILY_CHART_PIXELS_PER_POINT = 2
+
+def daily_chart_rows(daily_totals, value_name):
+    """
+    Returns the rows drawn by a per-day line chart, with columns 'day' and value_name.
+    Long series are downsampled with LTTB to the number of points the width of the chart can show apart.
+    Parameters:
+    - daily_totals (Series): Totals indexed by day, as returned by get_daily_metric.
+    - value_name (str): Name of the column of the totals.
+    """
+    rows = rollup_daily_metric(daily_totals, 'day').reset_index(name=value_name)
+    return downsample(rows, 'day', value_name, DAILY_CHART_WIDTH // DAILY_CHART_PIXELS_PER_POINT)
+
+# Visitor sketch -> (event the counted rows are limited to, column the visitors are counted per), None for all
+VISITOR_SKETCHES = {
+    'viewers': (None, None),
+    'product_visitors': (None, 'Product_Name'),
+    'collection_visitors': (None, 'Collection_Name'),
+    'event_visitors': (None, 'Event'),
+    'cart_add_visitors': ('Cart Add', 'Product_Name'),
+}
+VISITOR_SKETCH_COLUMNS = ['Event_Time', 'Customer_IP', 'Event', 'Product_Name', 'Collection_Name']
+
+def build_visitor_sketches(df_cj, event, column):
+    """
+    Returns HyperLogLog sketches of the viewers (Customer_IP) of the customer journey per UTC day,
+    and per value of a column when one is given, sorted by day.
+    """
+    if event is not None:
+        df_cj = df_cj[df_cj['Event'] == event]
+    df_cj = df_cj[df_cj['Event_Time'].notna()]
+    groups = [df_cj['Event_Time'].dt.tz_convert(None).dt.normalize().rename('Day')]
+    if column is not None:
+        groups.append(df_cj[column])
+    return build_sketches(df_cj['Customer_IP'], groups)
+
+def estimate_unique_visitors(sketch, start_date=None, end_date=None):
+    """
+    Returns the estimated number of unique visitors over a range returned by select_date_range, merging daily sketches:
+    a number for 'viewers', and for the other sketches a table of the Unique_Visitors of each value of their column.
+    Estimates are within RELATIVE_ERROR of the exact counts two times out of three.
+    Parameters:
+    - sketch (str): Key of the sketch in VISITOR_SKETCHES.
+    """
+    event, column = VISITOR_SKETCHES[sketch]
+    def build(df_cj):
+        return build_visitor_sketches(df_cj, event, column)
+    sketches = get_dataset_registry().derived('cj', f'sketches:{sketch}', build, VISITOR_SKETCH_COLUMNS,
+                                              monthly=True)
+    if start_date is not None and end_date is not None:
+        sketches = filter_by_date(sketches, 'Day', start_date.tz_convert(None), end_date.tz_convert(None))
+    if column is None:
+        return estimate_distinct(sketches)
+    return estimate_distinct(sketches, [column]).reset_index(name='Unique_Visitors')
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def compute_ranking(name, version, start_date, end_date, approximate, _rows):
+    """
+    Returns the top K keys of a ranking, highest score first, and the bottom K keys, lowest score first.
+    Cached per ranking, version of the source dataset, date range and mode; the rows are not part of the key.
+    With a query backend, rankings that have a query are scored from the store files instead of the rows.
+    """
+    dataset, score, score_column, k = RANKINGS[name]
+    table = None
+    backend = get_query_backend()
+    if approximate:
+        # Unique visitor rankings are named after the visitor sketch their scores are estimated from
+        table = estimate_unique_visitors(name, start_date, end_date)
+    elif backend is not None and name in RANKING_QUERIES:
+        table = get_dataset_registry().query(dataset, backend, RANKING_QUERIES[name], start_date, end_date)
+    if table is None:
+        table = score(_rows)
+    k = len(table) if k is None else k
+    # Partial selection of the K extreme keys; ties keep the order of the scored table
+    return table.nlargest(k, score_column), table.nsmallest(k, score_column)
+
+def get_ranking(name, rows, start_date, end_date, approximate=False):
+    """
+    Returns the (top, bottom) tables of a ranking over the rows of a page's date range.
+    Sliders show the first N rows of these tables instead of ranking every key on each rerun.
+    Parameters:
+    - name (str): Key of the ranking in RANKINGS.
+    - rows (DataFrame): Rows scored in the range returned by select_date_range: rows of the ranked dataset,
+      or of the table derived from it that the ranking scores, like the order headers.
+    - approximate (bool): Estimate the scores from the visitor sketch of the same name instead (default: False).
+    """
+    dataset = RANKINGS[name][0]
+    version = source_signature(DATASET_PATHS[dataset])
+    return compute_ranking(name, version, start_date, end_date, approximate, rows)
+
+def page_datasets(**datasets):
+    """
+    Declares the datasets a page function reads, and the columns it needs from each of them.
+    Only these datasets are loaded when the page is selected, the others stay unloaded until a page uses them.
+    Parameters:
+    - datasets: Dataset name -> list of columns, passed to the page as the df_<name> argument
+      with the rows of the date range picked in the sidebar.
+    """
+    def decorator(page_function):
+        page_function.datasets = datasets
+        return page_function
+    return decorator
+
+def load_page_datasets(page_function):
+    """
+    Shows the date range inputs of a page and returns the arguments of its page function: the projected rows
+    of each declared dataset in the picked range, keyed by the name of their argument, and the range itself
+    as range_start / range_end. Each dataset is restricted by its sort column (see DATASET_SORT_COLUMNS),
+    and only the months of its store overlapping the range are read.
+    """
+    registry = get_dataset_registry()
+    with st.spinner("Loading data..."):
+        registry.prepare(list(page_function.datasets))
+        bounds = [registry.date_bounds(name) for name in page_function.datasets]
+    range_start, range_end = select_date_range(bounds)
+    with st.spinner("Loading data..."):
+        datasets = {f'df_{name}': get_dataset(name, columns, range_start, range_end)
+                    for name, columns in page_function.datasets.items()}
+    return dict(datasets, range_start=range_start, range_end=range_end)
+
+def select_date_range(date_bounds, label_prefix=""):
+    """
+    Shows the start and end date inputs in the sidebar and returns the picked range as UTC timestamps:
+    midnight of the start date, and midnight after the end date so that the whole end date is included.
+    Returns (None, None) when no range is picked.
+    Parameters:
+    - date_bounds (list): First and last date of each dataset shown on the page, None for a dataset without dates;
+      the dates that can be picked span all of them.
+    """
+    bounds = [date for pair in date_bounds if pair is not None for date in pair]
+    if not bounds:
+        return None, None
+    min_date = min(bounds).date()
+    max_date = max(bounds).date()
     start_date = st.sidebar.date_input(f'{label_prefix}Start Date', min_value=min_date, max_value=max_date,value=min_date)
     end_date = st.sidebar.date_input(f'{label_prefix}End Date', min_value=min_date, max_value=max_date, value=max_date)
     if start_date and end_date:
         start_date = pd.to_datetime(start_date).tz_localize('UTC')
-        end_date = pd.to_datetime(end_date).tz_localize('UTC')
-        df[date_column] = pd.to_datetime(df[date_column])
-        filtered_data = df[(df[date_column] >= start_date) & (df[date_column] <= end_date)]
-        return filtered_data
-    return df
+        end_date = pd.to_datetime(end_date).tz_localize('UTC') + pd.Timedelta(days=1)
+        return start_date, end_date
+    return None, None
+
+def filter_by_date(df, date_column, start_date, end_date):
+    """
+    Returns the rows of a dataset from start_date included to end_date excluded.
+    The dataset must be sorted by date_column with missing dates last, as the registry datasets are
+    (see DATASET_SORT_COLUMNS): the range is found by binary search and returned as a slice of the rows.
+    """
+    if start_date is None or end_date is None:
+        return df
+    dates = df[date_column]
+    first_row = dates.searchsorted(start_date, side='left')
+    last_row = dates.searchsorted(end_date, side='left')
+    filtered_data = df.iloc[first_row:last_row]
+    return filtered_data
+
+def frame_fingerprint(df):
+    """
+    Returns a digest of the column names, types and values of a frame.
+    """
+    digest = hashlib.sha1(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def chart_datasets(chart, datasets):
+    """
+    Adds the frames of a chart, of its layers and of its subcharts to `datasets`, named after their
+    fingerprint like the 'named' data transformer references them. A frame shared by several layers is added once.
+    """
+    data = getattr(chart, 'data', None)
+    if isinstance(data, pd.DataFrame):
+        datasets[f"data-{frame_fingerprint(data)}"] = data
+    for key in ('layer', 'hconcat', 'vconcat', 'concat'):
+        subcharts = getattr(chart, key, None)
+        if isinstance(subcharts, list):
+            for subchart in subcharts:
+                chart_datasets(subchart, datasets)
+    spec = getattr(chart, 'spec', None)
+    if isinstance(spec, alt.SchemaBase):
+        chart_datasets(spec, datasets)
+
+# Compiles the frames of a chart to references to the datasets named by chart_datasets
+alt.data_transformers.register('named', lambda data: {'name': f"data-{frame_fingerprint(data)}"})
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def validated_chart_spec(spec_json, chart_class):
+    """
+    Returns a Vega-Lite spec once validated against the schema of its chart class, like Altair's to_dict does.
+    Cached by the spec, whose frames are referenced by fingerprint: charts unchanged since the last run aren't
+    validated again, which is most of the time Altair takes to compile a chart.
+    Parameters:
+    - spec_json (str): Spec compiled without validation, as JSON.
+    - chart_class (str): Name of the Altair class of the chart, like 'Chart' or 'LayerChart'.
+    """
+    spec = json.loads(spec_json)
+    getattr(alt, chart_class).validate(spec)
+    return spec
+
+def show_chart(chart, use_container_width=False):
+    """
+    Shows an Altair chart, like st.altair_chart, with each of its source frames sent once as a named
+    dataset that all its layers reference, and its spec validated once per structure and data.
+    """
+    # Like st.altair_chart: the default Altair theme's sizes would override the Streamlit theme
+    with alt.themes.enable('none') if alt.themes.active == 'default' else nullcontext():
+        with alt.data_transformers.enable('named'):
+            spec = chart.to_dict(validate=False)
+    spec = validated_chart_spec(json.dumps(spec, sort_keys=True), type(chart).__name__)
+    datasets = {}
+    chart_datasets(chart, datasets)
+    spec['datasets'] = datasets
+    st.vega_lite_chart(spec=spec, use_container_width=use_container_width)
+
+def render_word_cloud_png(frequencies):
+    """
+    Returns the PNG bytes of a word cloud of search terms.
+    Parameters:
+    - frequencies (dict): Term -> number of searches.
+    """
+    wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(frequencies)
+    image_stream = io.BytesIO()
+    wordcloud.to_image().save(image_stream, format='PNG')
+    return image_stream.getvalue()
+
+class WordCloudCache:
+    """
+    Rendered word clouds, keyed by a fingerprint of their term frequencies and shared by all viewer sessions.
+    Word clouds are laid out on worker threads so that the rest of the page keeps rendering meanwhile;
+    past max_entries, the least recently used images are evicted.
+    """
+    def __init__(self, max_entries=32, workers=2):
+        self.max_entries = max_entries
+        self._images = OrderedDict()  # fingerprint -> Future of the PNG bytes
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wordcloud')
 
-def show_customer_data_page():
+    def render(self, frequencies):
+        """
+        Returns a Future of the PNG bytes of the word cloud of a term frequency table.
+        Parameters:
+        - frequencies (Series): Number of searches indexed by term.
+        """
+        fingerprint = hashlib.sha1(pd.util.hash_pandas_object(frequencies, index=True).values.tobytes()).hexdigest()
+        with self._lock:
+            image = self._images.get(fingerprint)
+            # Renderings that failed are retried
+            if image is not None and not (image.done() and image.exception() is not None):
+                self._images.move_to_end(fingerprint)
+                return image
+            image = self._executor.submit(render_word_cloud_png, frequencies.to_dict())
+            self._images[fingerprint] = image
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+            return image
+
+@st.cache_resource(show_spinner=False)
+def get_word_cloud_cache():
+    return WordCloudCache()
+
+# Page sections driven by a widget are fragments called with the tables they draw: moving the widget
+# reruns only its section, with the inputs of the last run of the page, instead of the whole page
+
+# Rows per page of the preview tables, the first one is the default
+PREVIEW_PAGE_SIZES = [50, 100, 500, 1000]
+
+@st.fragment
+def show_preview_section(df, key, use_container_width=False):
+    """
+    Paginated preview of the rows of a page. The columns, sort order and page are picked above the table
+    and applied on the server: only the rows of the picked page are sent to the browser.
+    Parameters:
+    - df (DataFrame): Rows previewed, like the rows of the page's date range.
+    - key (str): Prefix of the keys of the preview widgets, unique in the app.
+    """
+    columns = st.multiselect("Columns", list(df.columns), default=list(df.columns), key=f"{key}_columns")
+    sort_col, order_col, size_col, page_col = st.columns(4)
+    # Unsorted, the rows are in the order of the registry: by the date of the dataset, missing dates last
+    sort_column = sort_col.selectbox("Sort by", [None] + list(df.columns), key=f"{key}_sort",
+                                     format_func=lambda col: "Date order" if col is None else col)
+    descending = order_col.radio("Order", ["Ascending", "Descending"], horizontal=True, key=f"{key}_order") == "Descending"
+    page_size = size_col.selectbox("Rows per page", PREVIEW_PAGE_SIZES, key=f"{key}_page_size")
+    page_count = max(1, -(-len(df) // page_size))
+    # A page past the last one, after picking a shorter range or a larger page size, shows the last page
+    if st.session_state.get(f"{key}_page", 1) > page_count:
+        st.session_state[f"{key}_page"] = page_count
+    page = page_col.number_input("Page", min_value=1, max_value=page_count, step=1, key=f"{key}_page")
+    first_row = (page - 1) * page_size
+    if sort_column is None:
+        window = df.iloc[first_row:first_row + page_size]
+    else:
+        # Stable sort of the sort column alone, missing values last; only the rows of the page are gathered
+        order = df[sort_column].reset_index(drop=True).sort_values(ascending=not descending, kind='mergesort',
+                                                                    na_position='last')
+        window = df.iloc[order.index[first_row:first_row + page_size]]
+    st.dataframe(window[columns], use_container_width=use_container_width)
+    st.caption(f"Rows {min(first_row + 1, len(df)):,} to {first_row + len(window):,} of {len(df):,}")
+
+@st.fragment
+def show_top_spenders_section(top_5_customers):
+    """
+    Bar chart of the top N customers by total order price.
+    Parameters:
+    - top_5_customers (DataFrame): The 50 customers who spent the most with their Order_Total_Price, highest first.
+    """
+    top_n = st.slider("Select Top N IPs to Display", min_value=1, max_value=50, value=5)
+    # Filter top N customers by total order price
+    top_5_customers_filtered = top_5_customers.head(top_n)
+    st.markdown("<h3 style='text-align: center;'>Top N Customers by Total Order Price</h3>", unsafe_allow_html=True)
+    # Create the bar chart
+    chart = alt.Chart(top_5_customers_filtered).mark_bar().encode(
+        x=alt.X('Customer_Name:O', title='Customer Name',
+                sort=top_5_customers_filtered['Order_Total_Price'].tolist()),
+        y=alt.Y('Order_Total_Price:Q', title='Total Order Price (€)'),
+        color=alt.Color('Order_Total_Price:Q', legend=None),
+        tooltip=['Customer_Name:N', 'Order_Total_Price:Q']
+    ).properties(
+        width=700,
+        height=400,
+        title="Top N Customers by Total Order Price"
+    )
+    # Add text labels on the bars
+    text = chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10,  # Adjust the vertical position of the text
+        fontSize=12
+    ).encode(
+        text='Order_Total_Price:Q'
+    )
+    # Combine the chart and the text
+    final_chart = chart + text
+    # Configure axis for better readability
+    final_chart = final_chart.configure_axis(
+        labelAngle=0,  # Horizontal x-axis labels
+        labelFontSize=12,
+        titleFontSize=14
+    )
+    # Display the final chart
+    show_chart(final_chart, use_container_width=True)
+
+@st.fragment
+def show_least_spenders_section(least_5_customers):
+    """
+    Bar chart of the N customers with the lowest total order price.
+    Parameters:
+    - least_5_customers (DataFrame): The 50 customers who spent the least with their Order_Total_Price, lowest first.
+    """
+    top_n = st.slider("Select Least N IPs to Display", min_value=1, max_value=50, value=5)
+    # Filter least N customers by total order price
+    least_5_customers_filtered = least_5_customers.head(top_n)
+    st.markdown("<h3 style='text-align: center;'>Least N Customers by Total Order Price</h3>",unsafe_allow_html=True)
+    # Create the bar chart
+    chart = alt.Chart(least_5_customers_filtered).mark_bar().encode(
+        x=alt.X('Customer_Name:O', title='Customer Name',
+                sort=least_5_customers_filtered['Order_Total_Price'].tolist()),
+        y=alt.Y('Order_Total_Price:Q', title='Total Order Price (€)'),
+        color=alt.Color('Order_Total_Price:Q', legend=None),
+        tooltip=['Customer_Name:N', 'Order_Total_Price:Q']
+    ).properties(
+        width=700,
+        height=400,
+        title="Least N Customers by Total Order Price"
+    )
+    # Add text labels on the bars
+    text = chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10,  # Adjust the vertical position of the text
+        fontSize=12
+    ).encode(
+        text='Order_Total_Price:Q'
+    )
+    # Combine the chart and the text
+    final_chart = chart + text
+    # Configure axis for better readability
+    final_chart = final_chart.configure_axis(
+        labelAngle=0,  # Horizontal x-axis labels
+        labelFontSize=12,
+        titleFontSize=14
+    )
+    # Display the final chart
+    show_chart(final_chart, use_container_width=True)
+
+def show_customer_segments_section(customer_features):
+    """
+    Bar chart of the number of customers in each RFM segment, with their average orders, spending and recency.
+    Parameters:
+    - customer_features (DataFrame): Customer feature table of the range, as returned by get_customer_features.
+    """
+    segments = customer_features.groupby('Segment', observed=False).agg(
+        Customers=('Customer_ID', 'size'),
+        Average_Orders=('Orders_Placed', 'mean'),
+        Average_Spending=('Total_Spending', 'mean'),
+        Average_Recency=('Recency', 'mean'),
+    ).reset_index()
+    segments['Segment'] = segments['Segment'].astype(str)
+    st.markdown("<h3 style='text-align: center;'>Customers by RFM Segment</h3>", unsafe_allow_html=True)
+    chart = alt.Chart(segments).mark_bar().encode(
+        x=alt.X('Segment:N', title='Segment', sort=[name for name, _ in RFM_SEGMENTS]),
+        y=alt.Y('Customers:Q', title='Number of Customers'),
+        color=alt.Color('Segment:N', legend=None),
+        tooltip=['Segment:N', 'Customers:Q',
+                 alt.Tooltip('Average_Orders:Q', title='Average orders', format='.2f'),
+                 alt.Tooltip('Average_Spending:Q', title='Average spending (€)', format='.2f'),
+                 alt.Tooltip('Average_Recency:Q', title='Average days since last order', format='.0f')]
+    ).properties(
+        width=700,
+        height=400
+    )
+    show_chart(chart, use_container_width=True)
+    st.caption("Recency, frequency and spending are scored from 1 to 5 by quintile among the customers who ordered "
+               "in the selected date range, recency from the last order to the end of the range.")
+    with st.expander("Preview Customer Segments"):
+        st.dataframe(segments, use_container_width=True)
+
+@page_datasets(
+    customers=['Customer_ID', 'Customer_Created_At', 'Customer_Province', 'Customer_Country'],
+    # The orders of the range are read from the customer feature table, their line items only bound the date range
+    orders=['Order_Created_At'],
+)
+def show_customer_data_page(df_customers, df_orders, range_start, range_end):
     st.title('Customer Data')
     add_custom_css()
+    # Everything below covers the picked date range: customers by creation date, orders by order date
+    customer_features = get_customer_features(range_start, range_end)
+    # Customers with at least two orders in the range
+    customer_summary1 = customer_features.loc[customer_features['Orders_Placed'] >= 2,
+                                              ['Customer_Name', 'Orders_Placed', 'Total_Spending']]
+    customer_summary1 = customer_summary1.reset_index(drop=True)
     # Todo- Card Creation for the above
     col1, col2, col3 = st.columns(3)  # Fixed from 2 to 3
     with col1:
@@ -151,7 +1166,7 @@ def show_customer_data_page():
             unsafe_allow_html=True
         )
     with col2:
-        total_paying_customers = df_orders['Customer_ID'].nunique()
+        total_paying_customers = len(customer_features)
         st.markdown(
             f"""
             <div class="card">
@@ -162,136 +1177,42 @@ def show_customer_data_page():
             unsafe_allow_html=True
         )
     with col3:
-        if 'Customer_Name' in df_orders.columns and 'Order_Total_Price' in df_orders.columns:
-            customer_summary = df_orders.groupby("Order_ID").agg(
-                Total_Spending=("Order_Total_Price", 'first'),  # Total spending for each Order_ID
-                Customer_Name=("Customer_Name", 'first')  # Get the first customer for each Order_ID
-            ).reset_index()
-
-            customer_summary1 = customer_summary.groupby("Customer_Name").agg(
-                Orders_Placed=("Order_ID", "nunique"),  # Count of unique orders per Customer_Name
-                Total_Spending=("Total_Spending", 'sum'),  # Total spending for each Customer_Name
-            ).reset_index()
-
-            customer_summary1 = customer_summary1[customer_summary1['Orders_Placed'] >= 2]
-            repeat_customers = customer_summary1.shape[0]  # Get the count of repeat customers
-            st.markdown(
-                f"""
-                <div class="card">
-                    <p>Repeat Customers</p>
-                    <h1>{repeat_customers}</h1>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-        else:
-            st.markdown("Data columns 'Customer_Name' or 'Order_Total_Price' are missing from the dataframe.")
+        repeat_customers = customer_summary1.shape[0]  # Get the count of repeat customers
+        st.markdown(
+            f"""
+            <div class="card">
+                <p>Repeat Customers</p>
+                <h1>{repeat_customers}</h1>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
 
     st.title("Preview Filtered Customer Data")
     st.subheader("Customer Data")
-    filtered_customers = filter_by_date(df_customers, 'Customer_Created_At')
     # with st.expander("Preview Filtered Customer Data"):
-    st.dataframe(filtered_customers,use_container_width=True)
+    show_preview_section(df_customers, "customers_preview", use_container_width=True)
     #Todo- Customer Name Top 5 and Least 5 with Price Spends----------------------------------------
-    order_df = df_orders.drop_duplicates("Order_ID")
-    order_data = order_df.groupby('Customer_Name')['Order_Total_Price'].sum().reset_index()
-    order_data = order_data.dropna(subset=['Customer_Name'])
-    top_5_customers = order_data.nlargest(50, 'Order_Total_Price')
-    least_5_customers = order_data.nsmallest(50, 'Order_Total_Price')
+    top_5_customers, least_5_customers = get_ranking('customer_spend', customer_features, range_start, range_end)
     chart_col1, chart_col2 = st.columns(2)
     with chart_col1:
-        top_n = st.slider("Select Top N IPs to Display", min_value=1, max_value=50, value=5)
-        # Filter top N customers by total order price
-        top_5_customers_filtered = top_5_customers.nlargest(top_n, 'Order_Total_Price')
-        st.markdown("<h3 style='text-align: center;'>Top N Customers by Total Order Price</h3>", unsafe_allow_html=True)
-        # Create the bar chart
-        chart = alt.Chart(top_5_customers_filtered).mark_bar().encode(
-            x=alt.X('Customer_Name:O', title='Customer Name',
-                    sort=top_5_customers_filtered['Order_Total_Price'].tolist()),
-            y=alt.Y('Order_Total_Price:Q', title='Total Order Price (€)'),
-            color=alt.Color('Order_Total_Price:Q', legend=None),
-            tooltip=['Customer_Name:N', 'Order_Total_Price:Q']
-        ).properties(
-            width=700,
-            height=400,
-            title="Top N Customers by Total Order Price"
-        )
-        # Add text labels on the bars
-        text = chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10,  # Adjust the vertical position of the text
-            fontSize=12
-        ).encode(
-            text='Order_Total_Price:Q'
-        )
-        # Combine the chart and the text
-        final_chart = chart + text
-        # Configure axis for better readability
-        final_chart = final_chart.configure_axis(
-            labelAngle=0,  # Horizontal x-axis labels
-            labelFontSize=12,
-            titleFontSize=14
-        )
-        # Display the final chart
-        st.altair_chart(final_chart, use_container_width=True)
+        show_top_spenders_section(top_5_customers)
 
     with chart_col2:
-        top_n = st.slider("Select Least N IPs to Display", min_value=1, max_value=50, value=5)
-        # Filter least N customers by total order price
-        least_5_customers_filtered = least_5_customers.nsmallest(top_n, 'Order_Total_Price')
-        st.markdown("<h3 style='text-align: center;'>Least N Customers by Total Order Price</h3>",unsafe_allow_html=True)
-        # Create the bar chart
-        chart = alt.Chart(least_5_customers_filtered).mark_bar().encode(
-            x=alt.X('Customer_Name:O', title='Customer Name',
-                    sort=least_5_customers_filtered['Order_Total_Price'].tolist()),
-            y=alt.Y('Order_Total_Price:Q', title='Total Order Price (€)'),
-            color=alt.Color('Order_Total_Price:Q', legend=None),
-            tooltip=['Customer_Name:N', 'Order_Total_Price:Q']
-        ).properties(
-            width=700,
-            height=400,
-            title="Least N Customers by Total Order Price"
-        )
-        # Add text labels on the bars
-        text = chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10,  # Adjust the vertical position of the text
-            fontSize=12
-        ).encode(
-            text='Order_Total_Price:Q'
-        )
-        # Combine the chart and the text
-        final_chart = chart + text
-        # Configure axis for better readability
-        final_chart = final_chart.configure_axis(
-            labelAngle=0,  # Horizontal x-axis labels
-            labelFontSize=12,
-            titleFontSize=14
-        )
-        # Display the final chart
-        st.altair_chart(final_chart, use_container_width=True)
+        show_least_spenders_section(least_5_customers)
     #Todo- Customer Summery Table with Total Spend- Uniques Customer Names
-    customer_summary = df_orders.groupby("Order_ID").agg(
-        Total_Spending=("Order_Total_Price", 'first'),
-        Customer_Name=("Customer_Name", "first")
-    ).reset_index()
-    customer_summary1 = customer_summary.groupby("Customer_Name").agg(
-        Orders_Placed=("Order_ID", "nunique"),
-        Total_Spending=("Total_Spending", 'sum'),
-    ).reset_index()
-    customer_summary1 = customer_summary1[customer_summary1['Orders_Placed'] >= 2]
-    customer_summary1 = customer_summary1.reset_index(drop=True)
     st.title("Customer Order Summary")
     st.subheader("Summary Table")
     with st.expander("Preview Filtered Customer Data"):
         st.dataframe(customer_summary1, use_container_width=True)
+    #Todo- RFM segments of the customers who ordered in the range
+    st.title("Customer Segments")
+    show_customer_segments_section(customer_features)
 
     #Todo Bar Graph for Customer province_data and Country data with unique count
-    province_data = df_customers.groupby("Customer_Province")["Customer_ID"].nunique().reset_index()
+    province_data = df_customers.groupby("Customer_Province", observed=True)["Customer_ID"].nunique().reset_index()
     province_data = province_data.rename(columns={"Customer_ID": "Unique_Customers"})
-    country_data = df_customers.groupby("Customer_Country")["Customer_ID"].nunique().reset_index()
+    country_data = df_customers.groupby("Customer_Country", observed=True)["Customer_ID"].nunique().reset_index()
     country_data = country_data.rename(columns={"Customer_ID": "Unique_Customers"})
     # Create columns for charts
     chart_col1, chart_col2 = st.columns(2)
@@ -305,58 +1226,355 @@ def show_customer_data_page():
             tooltip=["Customer_Province", "Unique_Customers"]
         ).properties(width=350, height=300)
 
-        province_chart_text = province_chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10,
-            fontSize=12
-        ).encode(
-            text='Unique_Customers:Q'
-        )
-        province_chart = province_chart + province_chart_text
-        province_chart = province_chart.configure_axis(
-            labelAngle=0,
-            labelFontSize=14,
-            titleFontSize=16
-        )
-        st.altair_chart(province_chart, use_container_width=True)
-    # Bar Chart for Customer_Country
-    with chart_col2:
-        st.markdown("<h3 style='text-align: center;'>Unique Customers by Country</h3>", unsafe_allow_html=True)
-        # Create the Altair chart for unique customers by country
-        country_chart = alt.Chart(country_data).mark_bar().encode(
-            x=alt.X("Customer_Country:O", title="Customer Country", sort="-y"),
-            y=alt.Y("Unique_Customers:Q", title="Number of Unique Customers"),
-            color=alt.Color("Unique_Customers:Q", legend=None),  # Color the bars based on unique customers count
-            tooltip=["Customer_Country", "Unique_Customers"]
-        ).properties(width=350, height=300)
-        # Add text labels to display the number of unique customers on top of the bars
-        country_chart_text = country_chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10,  # Adjust the vertical position of the text
-            fontSize=12
-        ).encode(
-            text='Unique_Customers:Q'
-        )
-        # Combine the bar chart with the text labels
-        country_chart = country_chart + country_chart_text
-        # Configure the axis for better readability
-        country_chart = country_chart.configure_axis(
-            labelAngle=0,  # Set the angle of the axis labels (x-axis) to 0 degrees
-            labelFontSize=14,  # Increase font size of labels
-            titleFontSize=16  # Increase font size of axis title
-        )
-        # Display the final chart
-        st.altair_chart(country_chart, use_container_width=True)
+        province_chart_text = province_chart.mark_text(
+            align='center',
+            baseline='middle',
+            dy=-10,
+            fontSize=12
+        ).encode(
+            text='Unique_Customers:Q'
+        )
+        province_chart = province_chart + province_chart_text
+        province_chart = province_chart.configure_axis(
+            labelAngle=0,
+            labelFontSize=14,
+            titleFontSize=16
+        )
+        show_chart(province_chart, use_container_width=True)
+    # Bar Chart for Customer_Country
+    with chart_col2:
+        st.markdown("<h3 style='text-align: center;'>Unique Customers by Country</h3>", unsafe_allow_html=True)
+        # Create the Altair chart for unique customers by country
+        country_chart = alt.Chart(country_data).mark_bar().encode(
+            x=alt.X("Customer_Country:O", title="Customer Country", sort="-y"),
+            y=alt.Y("Unique_Customers:Q", title="Number of Unique Customers"),
+            color=alt.Color("Unique_Customers:Q", legend=None),  # Color the bars based on unique customers count
+            tooltip=["Customer_Country", "Unique_Customers"]
+        ).properties(width=350, height=300)
+        # Add text labels to display the number of unique customers on top of the bars
+        country_chart_text = country_chart.mark_text(
+            align='center',
+            baseline='middle',
+            dy=-10,  # Adjust the vertical position of the text
+            fontSize=12
+        ).encode(
+            text='Unique_Customers:Q'
+        )
+        # Combine the bar chart with the text labels
+        country_chart = country_chart + country_chart_text
+        # Configure the axis for better readability
+        country_chart = country_chart.configure_axis(
+            labelAngle=0,  # Set the angle of the axis labels (x-axis) to 0 degrees
+            labelFontSize=14,  # Increase font size of labels
+            titleFontSize=16  # Increase font size of axis title
+        )
+        # Display the final chart
+        show_chart(country_chart, use_container_width=True)
+
+@st.fragment
+def show_max_sessions_section(max_session_per_ip):
+    """
+    Bar chart of the N viewers with the most sessions.
+    Parameters:
+    - max_session_per_ip (DataFrame): The 50 viewers with the most sessions, number of sessions in the session column.
+    """
+    top_n = st.slider("Select Top N IPs to Display", min_value=1, max_value=50, value=10)
+    top_n_ip = max_session_per_ip.head(top_n)
+    st.markdown("<h3 style='text-align: center;'>Maximum Sessions per Customer IP</h3>", unsafe_allow_html=True)
+    # Create the bar chart
+    chart = alt.Chart(top_n_ip).mark_bar().encode(
+        x=alt.X("Customer_IP:N", title="Customer IP", sort="-y"),  # Set Customer_IP to x-axis
+        y=alt.Y("session:Q", title="Max Session"),  # Set session to y-axis
+        color=alt.Color("session:Q", legend=None),  # Color bars based on session count
+        tooltip=["Customer_IP", "session"]
+    ).properties(
+        width=700,
+        height=400,
+        title="Maximum Sessions per Customer IP"
+    )
+    # Add text labels on the bars
+    text = chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10,  # Adjust the vertical position of the text
+        fontSize=12
+    ).encode(
+        text='session:Q'
+    )
+    # Combine the chart and the text
+    final_chart = chart + text
+
+    # Configure axis for better readability
+    final_chart = final_chart.configure_axis(
+        labelAngle=0,  # Horizontal x-axis labels
+        labelFontSize=12,
+        titleFontSize=14
+    )
+    # Display the final chart
+    show_chart(final_chart, use_container_width=True)
+
+@st.fragment
+def show_session_count_section(session_counts):
+    """
+    Session counts per day, month, quarter or year, as picked in the radio.
+    Parameters:
+    - session_counts (Series): Sessions per day, indexed by day.
+    """
+    view = st.radio("Select View",['Sessions per Day', 'Sessions per Month', 'Sessions per Quarter', 'Sessions per Year'])
+    # For the "Sessions per Day" view
+    if view == 'Sessions per Day':
+        session_count_per_day = daily_chart_rows(session_counts, 'session_count')
+        st.write("### Sessions per Day")
+        # The line and the points are layers of one chart, drawn from a single copy of the rows
+        base_day = alt.Chart(session_count_per_day)
+        # Define the line chart
+        chart_day = base_day.mark_line().encode(
+            x=alt.X(
+                'day:T',
+                title='Date',
+                axis=alt.Axis(format="%b %d, %Y", labelAngle=90, tickMinStep=1)  # Adjust x-axis labels
+            ),
+            y=alt.Y('session_count:Q', title='Number of Sessions')
+        ).properties(title='Sessions per Day')
+        # Define the points for emphasis
+        points_day = base_day.mark_point(size=60, color='red').encode(
+            x='day:T',
+            y='session_count:Q',
+            tooltip=['day:T', 'session_count:Q']
+        )
+        # Combine line chart and points
+        combined_chart_day = chart_day + points_day
+        # Display the combined chart
+        show_chart(combined_chart_day, use_container_width=True)
+
+
+    # For the "Sessions per Month" view
+    elif view == 'Sessions per Month':
+        session_count_per_month = rollup_daily_metric(session_counts, 'month').reset_index(name='session_count')
+        st.write("### Sessions per Month")
+        chart_month = alt.Chart(session_count_per_month).mark_line().encode(
+            x=alt.X('month:T', title=None, axis=alt.Axis(tickCount=5, format='%b %Y', labelAngle=-90)),
+            y='session_count:Q'
+        ).properties(title='Sessions per Month')
+
+        points_month = alt.Chart(session_count_per_month).mark_point(size=60, color='red').encode(
+            x='month:T',
+            y='session_count:Q',
+            tooltip=['month:T', 'session_count:Q']
+        )
+        combined_chart_month = chart_month + points_month
+        show_chart(combined_chart_month, use_container_width=True)
+
+    # For the "Sessions per Quarter" view
+    elif view == 'Sessions per Quarter':
+        session_count_per_quarter = rollup_daily_metric(session_counts, 'quarter').reset_index(name='session_count')
+        st.write("### Sessions per Quarter")
+        chart_quarter = alt.Chart(session_count_per_quarter).mark_line().encode(
+            x='quarter:N',
+            y='session_count:Q'
+        ).properties(title='Sessions per Quarter')
+
+        points_quarter = alt.Chart(session_count_per_quarter).mark_point(size=60, color='red').encode(
+            x='quarter:N',
+            y='session_count:Q',
+            tooltip=['quarter:N', 'session_count:Q']
+        )
+        combined_chart_quarter = chart_quarter + points_quarter
+        show_chart(combined_chart_quarter, use_container_width=True)
+
+    # For the "Sessions per Year" view
+    elif view == 'Sessions per Year':
+        session_count_per_Year = rollup_daily_metric(session_counts, 'year').rename_axis('Year').reset_index(name='session_count')
+        st.write("### Sessions per Year")
+        chart_year = alt.Chart(session_count_per_Year).mark_line().encode(
+            x='Year:N',
+            y='session_count:Q'
+        ).properties(title='Sessions per Year')
+
+        points_year = alt.Chart(session_count_per_Year).mark_point(size=60, color='red').encode(
+            x='Year:N',
+            y='session_count:Q',
+            tooltip=['Year:N', 'session_count:Q']
+        )
+        combined_chart_year = chart_year + points_year
+        show_chart(combined_chart_year, use_container_width=True)
+
+    # Update the month column to use full month names (with year)
+
+    elif view == 'Sessions per Month':
+        st.write("### Sessions per Month")
+        # Make sure January data is included and months are properly sorted
+        chart = alt.Chart(session_count_per_month).mark_line().encode(  # Changed to line chart
+            x=alt.X('month:T', title=None, axis=alt.Axis(tickCount=5, format='%b %Y', labelAngle=-90)),
+            # Labels rotated to vertical
+            y='session_count:Q'
+        ).properties(title='Sessions per Month')
+        show_chart(chart, use_container_width=True)
+
+    elif view == 'Sessions per Quarter':
+        st.write("### Sessions per Quarter")
+        chart_quarter = alt.Chart(session_count_per_quarter).mark_line().encode(
+            x='quarter:N',
+            y='session_count:Q'
+        ).properties(title='Sessions per Quarter')
+        show_chart(chart_quarter, use_container_width=True)
+
+    elif view == 'Sessions per Year':
+        st.write("### Sessions per Year")
+        chart_year = alt.Chart(session_count_per_Year).mark_line().encode(
+            x='Year:N',
+            y='session_count:Q'
+        ).properties(title='Sessions per Year')
+        show_chart(chart_year, use_container_width=True)
+
+@st.fragment
+def show_popular_products_section(df_product_sorted):
+    """
+    Bar chart of the N products with the most unique visitors.
+    Parameters:
+    - df_product_sorted (DataFrame): Unique_Visitors of the 50 most visited products, most visited first.
+    """
+    top_n_products = st.slider("Select Top N Products to Display", min_value=1, max_value=50, value=10)
+    df_top_n_product = df_product_sorted.head(top_n_products)
+    st.markdown("<h3 style='text-align: center;'>Top N Most Popular Products</h3>", unsafe_allow_html=True)
+
+    product_chart = alt.Chart(df_top_n_product).mark_bar().encode(
+        x=alt.X('Product_Name:N', title='Product Name', sort=df_top_n_product['Unique_Visitors'].tolist(),
+                axis=alt.Axis(labelAngle=90)),  # Adjust labels angle
+        y=alt.Y('Unique_Visitors:Q', title='Unique Visitors'),
+        color=alt.Color('Unique_Visitors:Q', legend=None),  # Color bars based on Unique Visitors
+        tooltip=['Product_Name:N', 'Unique_Visitors:Q']
+    ).properties(width=600, height=300, title="Top N Most Popular Products by Unique Visitors")
+
+    # Adding text labels on the bars
+    product_text = product_chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10,  # Adjust the vertical position of the text
+        fontSize=12
+    ).encode(
+        text='Unique_Visitors:Q'
+    )
+
+    product_chart = product_chart + product_text  # Combine the bar chart with the text
+
+    # Configure axis for readability
+    product_chart = product_chart.configure_axis(
+        labelAngle=90,  # Set x-labels to 0-degree angle
+        labelFontSize=12,  # Increase font size of labels
+        titleFontSize=16  # Increase font size of axis title
+    )
+    show_chart(product_chart, use_container_width=True)
+
+@st.fragment
+def show_popular_collections_section(df_collection_sorted):
+    """
+    Bar chart of the N collections with the most unique visitors.
+    Parameters:
+    - df_collection_sorted (DataFrame): Unique_Visitors of the 50 most visited collections, most visited first.
+    """
+    top_n_collections = st.slider("Select Top N Collections to Display", min_value=1, max_value=50, value=10)
+    df_top_n_collection = df_collection_sorted.head(top_n_collections)
+    st.markdown("<h3 style='text-align: center;'>Top N Most Popular Collections</h3>", unsafe_allow_html=True)
+
+    collection_chart = alt.Chart(df_top_n_collection).mark_bar().encode(
+        x=alt.X('Collection_Name:N', title='Collection Name', sort=df_top_n_collection['Unique_Visitors'].tolist(),
+                axis=alt.Axis(labelAngle=90)),
+        y=alt.Y('Unique_Visitors:Q', title='Unique Visitors'),
+        color=alt.Color('Unique_Visitors:Q', legend=None),  # Color bars based on Unique Visitors
+        tooltip=['Collection_Name:N', 'Unique_Visitors:Q']
+    ).properties(width=600, height=300, title="Top N Most Popular Collections by Unique Visitors")
+
+    # Adding text labels on the bars
+    collection_text = collection_chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10,  # Adjust the vertical position of the text
+        fontSize=12
+    ).encode(
+        text='Unique_Visitors:Q'
+    )
+
+    collection_chart = collection_chart + collection_text  # Combine the bar chart with the text
+
+    # Configure axis for readability
+    collection_chart = collection_chart.configure_axis(
+        labelAngle=0,  # Set x-labels to 0-degree angle
+        labelFontSize=14,  # Increase font size of labels
+        titleFontSize=16  # Increase font size of axis title
+    )
+    show_chart(collection_chart, use_container_width=True)
+
+@st.fragment
+def show_cart_add_section(df_grouped_cart_add):
+    """
+    Bar chart of the N products added to the cart by the most unique visitors.
+    Parameters:
+    - df_grouped_cart_add (DataFrame): Unique_Visitors of the 50 products added to the cart by the most visitors, most first.
+    """
+    top_n_products = st.slider("Select Top N Products to Display", min_value=10, max_value=50, value=10)
+    st.markdown(f"<h3 style='text-align: center;'>Top {top_n_products} Most Added Products to Cart</h3>",unsafe_allow_html=True)
+    # Adjust filtering logic to reflect slider value
+    df_top_n_cart_add = df_grouped_cart_add.head(top_n_products)
+    # Modify the color encoding to use Unique_Visitors for coloring the bars
+    cart_add_chart = alt.Chart(df_top_n_cart_add).mark_bar().encode(
+        x=alt.X('Product_Name:N', title='Product Name', sort=df_top_n_cart_add['Unique_Visitors'].tolist(),
+                axis=alt.Axis(labelAngle=90)),  # Rotate labels to 90 degrees for readability
+        y=alt.Y('Unique_Visitors:Q', title='Unique Visitors'),
+        color=alt.Color('Unique_Visitors:Q', legend=None),  # Color bars based on the Unique Visitors count
+        tooltip=['Product_Name:N', 'Unique_Visitors:Q']
+    ).properties(width=600, height=300, title="Top N Most Added Products to Cart by Unique Visitors")
+    # Add labels on top of the bars (number of unique visitors)
+    text = cart_add_chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10,  # Adjust label position
+        fontSize=12
+    ).encode(
+        text='Unique_Visitors:Q'
+    )
+    # Combine the bar chart and text labels
+    cart_add_chart = cart_add_chart + text
+    # Configure the axis for better readability
+    cart_add_chart = cart_add_chart.configure_axis(
+        labelAngle=0,  # Set the angle of the axis labels (x-axis) to 0 degrees
+        labelFontSize=14,  # Increase font size of labels
+        titleFontSize=16  # Increase font size of axis title
+    )
+    # Display the chart
+    show_chart(cart_add_chart, use_container_width=True)
 
-def show_cj_page():
+@page_datasets(
+    cj=['Customer_IP', 'session', 'Event_Time', 'Event', 'Time_On_Page', 'Product_ID', 'Product_Name',
+        'Collection_Name', 'Search_Term'],
+)
+def show_cj_page(df_cj, range_start, range_end):
     st.title('Customer Journey Data')
     add_custom_css()
+    # Everything below covers the picked date range: events by time, sessions by start time,
+    # and additive session totals are summed from the daily buckets
+    sessions = filter_by_date(get_session_table(), 'Start_Time', range_start, range_end)
+    daily_sessions = get_daily_buckets('cj', range_start, range_end)
+    if df_cj.empty or sessions.empty:
+        st.warning("No customer journey data in the selected date range.")
+        return
+    sessions_per_day = get_daily_metric('sessions', range_start, range_end)
+    # Session totals per day of the week and hour of the day, the weekday/weekend, day and hour charts sum them
+    calendar_sessions = get_calendar_totals('cj', range_start, range_end)['Sessions']
+    # Exact unique visitor counts stay the default, for audits
+    approximate_visitors = st.sidebar.checkbox(
+        "Approximate unique visitors",
+        help=f"Estimates unique visitor counts from daily HyperLogLog sketches, "
+             f"usually within {RELATIVE_ERROR:.1%} of the exact counts.")
+    # Number of sessions of each viewer started in the range
+    sessions_per_ip = score_viewer_sessions(sessions)
     # Todo- Card Creation for the above
     col1, col2,col3 = st.columns(3)  # Fixed from 2 to 3
     with col1:
-        total_listed_customers = df_cj['Customer_IP'].nunique()
+        if approximate_visitors:
+            total_listed_customers = estimate_unique_visitors('viewers', range_start, range_end)
+        else:
+            total_listed_customers = df_cj['Customer_IP'].nunique()
         st.markdown(
             f"""
                 <div class="card">
@@ -368,8 +1586,7 @@ def show_cj_page():
         )
 
     with col2:
-        max_session_df = df_cj.loc[df_cj.groupby('Customer_IP')['session'].idxmax()]
-        customer_summary1 = max_session_df[max_session_df['session'] >= 2]
+        customer_summary1 = sessions_per_ip[sessions_per_ip['session'] >= 2]
         repeat_customers = customer_summary1.shape[0]
         st.markdown(
             f"""
@@ -382,8 +1599,7 @@ def show_cj_page():
         )
 
     with col3:
-        max_session_df = df_cj.loc[df_cj.groupby('Customer_IP')['session'].idxmax()]
-        session_sum = max_session_df['session'].sum()
+        session_sum = sessions_per_ip['session'].sum()
         st.markdown(
             f"""
                         <div class="card">
@@ -395,9 +1611,8 @@ def show_cj_page():
         )
     st.title("Preview Filtered Customer Journey Data")
     st.subheader("Customer Journey Data")
-    filtered_cj = filter_by_date(df_cj, 'Event_Time')
     # with st.expander("Preview Filtered CJ Data"):
-    st.dataframe(filtered_cj,use_container_width=True)
+    show_preview_section(df_cj, "cj_preview", use_container_width=True)
 
     # #Todo- Session details on weekdays and Weekends
     col1 = st.columns(1)[0]  # Create a single column
@@ -408,16 +1623,9 @@ def show_cj_page():
         st.markdown(
             f"<h1 style='display: inline-block;'>Total sessions: weekday vs weekend {tooltip_html}</h1>", unsafe_allow_html=True
         )
-        df_cj['Event_Time'] = pd.to_datetime(df_cj['Event_Time'], errors='coerce',utc=True)  # Ensure Event_Time is in datetime format
-        df_cj['Weekday_Weekend'] = df_cj['Event_Time'].dt.dayofweek.apply(
-            lambda x: 'Weekend' if x >= 5 else 'Weekday'
-        )
-        filtered_df = df_cj
-        grouped_filtered_df = filtered_df.groupby(['Customer_IP', 'session']).first().reset_index()
-        weekday_count = grouped_filtered_df[grouped_filtered_df['Weekday_Weekend'] == 'Weekday'].shape[0]
-        weekend_count = grouped_filtered_df[grouped_filtered_df['Weekday_Weekend'] == 'Weekend'].shape[0]
+        weekday_count, weekend_count = (int(count) for count in totals_by_day_type(calendar_sessions))
         counts = [weekday_count, weekend_count]
-        labels = ['Weekday', 'Weekend']
+        labels = DAY_TYPES
         st.write(f"Weekday Count: {weekday_count} ({(weekday_count / sum(counts)) * 100:.2f}%)")
         st.write(f"Weekend Count: {weekend_count} ({(weekend_count / sum(counts)) * 100:.2f}%)")
         pie_data = pd.DataFrame({
@@ -434,25 +1642,16 @@ def show_cj_page():
         )
 
         final_chart = pie_chart
-        st.altair_chart(final_chart, use_container_width=True)
+        show_chart(final_chart, use_container_width=True)
 
     #Todo-Total session duration-Average session duration-Least session duration-Highest session duration
-    def convert_seconds(seconds):
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        return f"{hours} hr {minutes} mini"
     col1, col2,col3 = st.columns(3)
-    df_cj['Event_Time'] = pd.to_datetime(df_cj['Event_Time'])
-    groupby_session = df_cj.groupby(['session', 'Customer_IP']).agg(
-        Time_On_Page=('Time_On_Page', 'sum')
-    ).reset_index()
-    overall_sum = groupby_session['Time_On_Page'].sum()
-    Average_data = groupby_session['Time_On_Page'].mean()
-    overall_sum = convert_seconds(overall_sum)
-    overall_average = convert_seconds(Average_data)
+    overall_sum = daily_sessions['Duration'].sum()
+    Average_data = overall_sum / daily_sessions['Sessions'].sum()
+    overall_sum = format_duration(overall_sum)
+    overall_average = format_duration(Average_data)
     #Todo-Average_number of session per customer---------------------------
-    session_count_per_customer = df_cj.groupby('Customer_IP')['session'].max().reset_index()
-    average_sessions_per_customer = session_count_per_customer['session'].mean()
+    average_sessions_per_customer = sessions_per_ip['session'].mean()
     average_sessions_per_customer = round(average_sessions_per_customer, 2)
     with col1:
         st.markdown(
@@ -485,20 +1684,16 @@ def show_cj_page():
             unsafe_allow_html=True
         )
     #Todo- List of TOP 10 customer on pages with time spent in each Events
-    groupby_session = df_cj.groupby(['session', 'Customer_IP']).agg(
-        Time_On_Page=('Time_On_Page', 'sum'),
-        Event_time=('Event_Time', 'first')
-    ).reset_index()
-    groupby_session['Event_time'] = groupby_session['Event_time'].dt.date
-    top_5_rows = groupby_session.nlargest(10, 'Time_On_Page')
-    top_5_rows['Time_On_Page'] = top_5_rows['Time_On_Page'].apply(convert_seconds)
-    top_5_rows = top_5_rows.drop(columns=['session'])
+    top_5_rows = sessions.nlargest(10, 'Duration')[['Customer_IP', 'Duration', 'Start_Time']]
+    top_5_rows.columns = ['Customer_IP', 'Time_On_Page', 'Event_time']
+    top_5_rows['Event_time'] = top_5_rows['Event_time'].dt.date
+    top_5_rows['Time_On_Page'] = format_duration(top_5_rows['Time_On_Page'])
     st.title("Top 10 Customer IP List Data")
     st.subheader("Summary Table")
     # with st.expander("List of Customer on Page"):
     st.dataframe(top_5_rows, use_container_width=True)
     #Todo-Viewers with highest number of sessions
-    max_session_per_ip = df_cj.groupby('Customer_IP')['session'].max().reset_index()
+    max_session_per_ip, _ = get_ranking('viewer_sessions', sessions, range_start, range_end)
     # st.title("Maximum Sessions per Customer IP")
     add_tooltip_css()
     tooltip_html = render_tooltip(
@@ -508,71 +1703,12 @@ def show_cj_page():
         f"<h1 style='display: inline-block;'>Maximum Sessions per Customer IP {tooltip_html}</h1>",
         unsafe_allow_html=True
     )
-    top_n = st.slider("Select Top N IPs to Display", min_value=1, max_value=50, value=10)
-    top_n_ip = max_session_per_ip.nlargest(top_n, 'session')
-    st.markdown("<h3 style='text-align: center;'>Maximum Sessions per Customer IP</h3>", unsafe_allow_html=True)
-    # Create the bar chart
-    chart = alt.Chart(top_n_ip).mark_bar().encode(
-        x=alt.X("Customer_IP:N", title="Customer IP", sort="-y"),  # Set Customer_IP to x-axis
-        y=alt.Y("session:Q", title="Max Session"),  # Set session to y-axis
-        color=alt.Color("session:Q", legend=None),  # Color bars based on session count
-        tooltip=["Customer_IP", "session"]
-    ).properties(
-        width=700,
-        height=400,
-        title="Maximum Sessions per Customer IP"
-    )
-    # Add text labels on the bars
-    text = chart.mark_text(
-        align='center',
-        baseline='middle',
-        dy=-10,  # Adjust the vertical position of the text
-        fontSize=12
-    ).encode(
-        text='session:Q'
-    )
-    # Combine the chart and the text
-    final_chart = chart + text
-
-    # Configure axis for better readability
-    final_chart = final_chart.configure_axis(
-        labelAngle=0,  # Horizontal x-axis labels
-        labelFontSize=12,
-        titleFontSize=14
-    )
-    # Display the final chart
-    st.altair_chart(final_chart, use_container_width=True)
+    show_max_sessions_section(max_session_per_ip)
 
     #Todo-Total sessions: day, month, quarter, year
-    df_cj['day'] = df_cj['Event_Time'].dt.date
-    # Ensure session column is numeric
-    df_cj['session'] = pd.to_numeric(df_cj['session'], errors='coerce')
-    # Compute session counts
-    session_count_per_customer = df_cj.groupby(['Customer_IP', 'day'])['session'].nunique().reset_index()
-    session_count_per_day = session_count_per_customer.groupby('day')['session'].sum().reset_index()
-    # Create a complete date range
-    start_date = session_count_per_day['day'].min()
-    end_date = datetime.today().date()  # Use the current system date as the end date
-    full_date_range = pd.date_range(start=start_date, end=end_date)
-    # Reindex session_count_per_day to include all dates
-    session_count_per_day.set_index('day', inplace=True)
-    session_count_per_day = session_count_per_day.reindex(full_date_range, fill_value=0).reset_index()
-    # Rename the columns
-    session_count_per_day.rename(columns={'index': 'day', 'session': 'session_count'}, inplace=True)
-    # Update the month column to use full month names
-    session_count_per_day['month'] = session_count_per_day['day'].dt.strftime('%B %Y')  # Month-Year (e.g., January 2024)
-    session_count_per_day['month'] = session_count_per_day['day'].dt.strftime('%Y-%m')  # Use Year-Month format (e.g., 2024-01)
-    session_count_per_month = session_count_per_day.groupby('month')['session_count'].sum().reset_index()
-
-    # Ensure months are sorted chronologically (including January data)
-    session_count_per_month['month'] = pd.to_datetime(session_count_per_month['month'], format='%Y-%m')
-    session_count_per_month = session_count_per_month.sort_values(by='month', ascending=True)
-    # Group by Quarter
-    session_count_per_day['quarter'] = session_count_per_day['day'].dt.to_period('Q').astype(str)
-    session_count_per_quarter = session_count_per_day.groupby('quarter')['session_count'].sum().reset_index()
-    # Group by Year
-    session_count_per_day['Year'] = session_count_per_day['day'].dt.year
-    session_count_per_Year = session_count_per_day.groupby('Year')['session_count'].sum().reset_index()
+    # Session counts per day from the first to the last day with sessions, days without sessions included;
+    # each session is counted on the day it started. Only the selected view is rolled up from these daily counts
+    session_counts = sessions_per_day.asfreq('D', fill_value=0)
 
     # st.title('Session Count Visualizations')
     add_tooltip_css()
@@ -582,114 +1718,11 @@ def show_cj_page():
     st.markdown(
         f"<h1 style='display: inline-block;'>Session Count Visualizations {tooltip_html}</h1>", unsafe_allow_html=True
     )
-    view = st.radio("Select View",['Sessions per Day', 'Sessions per Month', 'Sessions per Quarter', 'Sessions per Year'])
-    # For the "Sessions per Day" view
-    if view == 'Sessions per Day':
-        st.write("### Sessions per Day")
-        # Define the line chart
-        chart_day = alt.Chart(session_count_per_day).mark_line().encode(
-            x=alt.X(
-                'day:T',
-                title='Date',
-                axis=alt.Axis(format="%b %d, %Y", labelAngle=90, tickMinStep=1)  # Adjust x-axis labels
-            ),
-            y=alt.Y('session_count:Q', title='Number of Sessions')
-        ).properties(title='Sessions per Day')
-        # Define the points for emphasis
-        points_day = alt.Chart(session_count_per_day).mark_point(size=60, color='red').encode(
-            x='day:T',
-            y='session_count:Q',
-            tooltip=['day:T', 'session_count:Q']
-        )
-        # Combine line chart and points
-        combined_chart_day = chart_day + points_day
-        # Display the combined chart
-        st.altair_chart(combined_chart_day, use_container_width=True)
-
-
-    # For the "Sessions per Month" view
-    elif view == 'Sessions per Month':
-        st.write("### Sessions per Month")
-        chart_month = alt.Chart(session_count_per_month).mark_line().encode(
-            x=alt.X('month:T', title=None, axis=alt.Axis(tickCount=5, format='%b %Y', labelAngle=-90)),
-            y='session_count:Q'
-        ).properties(title='Sessions per Month')
-
-        points_month = alt.Chart(session_count_per_month).mark_point(size=60, color='red').encode(
-            x='month:T',
-            y='session_count:Q',
-            tooltip=['month:T', 'session_count:Q']
-        )
-        combined_chart_month = chart_month + points_month
-        st.altair_chart(combined_chart_month, use_container_width=True)
-
-    # For the "Sessions per Quarter" view
-    elif view == 'Sessions per Quarter':
-        st.write("### Sessions per Quarter")
-        chart_quarter = alt.Chart(session_count_per_quarter).mark_line().encode(
-            x='quarter:N',
-            y='session_count:Q'
-        ).properties(title='Sessions per Quarter')
-
-        points_quarter = alt.Chart(session_count_per_quarter).mark_point(size=60, color='red').encode(
-            x='quarter:N',
-            y='session_count:Q',
-            tooltip=['quarter:N', 'session_count:Q']
-        )
-        combined_chart_quarter = chart_quarter + points_quarter
-        st.altair_chart(combined_chart_quarter, use_container_width=True)
-
-    # For the "Sessions per Year" view
-    elif view == 'Sessions per Year':
-        st.write("### Sessions per Year")
-        chart_year = alt.Chart(session_count_per_Year).mark_line().encode(
-            x='Year:N',
-            y='session_count:Q'
-        ).properties(title='Sessions per Year')
-
-        points_year = alt.Chart(session_count_per_Year).mark_point(size=60, color='red').encode(
-            x='Year:N',
-            y='session_count:Q',
-            tooltip=['Year:N', 'session_count:Q']
-        )
-        combined_chart_year = chart_year + points_year
-        st.altair_chart(combined_chart_year, use_container_width=True)
-
-    # Update the month column to use full month names (with year)
-
-    elif view == 'Sessions per Month':
-        st.write("### Sessions per Month")
-        # Make sure January data is included and months are properly sorted
-        chart = alt.Chart(session_count_per_month).mark_line().encode(  # Changed to line chart
-            x=alt.X('month:T', title=None, axis=alt.Axis(tickCount=5, format='%b %Y', labelAngle=-90)),
-            # Labels rotated to vertical
-            y='session_count:Q'
-        ).properties(title='Sessions per Month')
-        st.altair_chart(chart, use_container_width=True)
-
-    elif view == 'Sessions per Quarter':
-        st.write("### Sessions per Quarter")
-        chart_quarter = alt.Chart(session_count_per_quarter).mark_line().encode(
-            x='quarter:N',
-            y='session_count:Q'
-        ).properties(title='Sessions per Quarter')
-        st.altair_chart(chart_quarter, use_container_width=True)
-
-    elif view == 'Sessions per Year':
-        st.write("### Sessions per Year")
-        chart_year = alt.Chart(session_count_per_Year).mark_line().encode(
-            x='Year:N',
-            y='session_count:Q'
-        ).properties(title='Sessions per Year')
-        st.altair_chart(chart_year, use_container_width=True)
+    show_session_count_section(session_counts)
 
     # Todo-Most viewed product and collections logic (same as your current code)
-    df_product_grouped = df_cj.groupby('Product_Name')['Customer_IP'].nunique().reset_index()
-    df_product_grouped.rename(columns={'Customer_IP': 'Unique_Visitors'}, inplace=True)
-    df_product_sorted = df_product_grouped.sort_values('Unique_Visitors', ascending=False)
-    df_collection_grouped = df_cj.groupby('Collection_Name')['Customer_IP'].nunique().reset_index()
-    df_collection_grouped.rename(columns={'Customer_IP': 'Unique_Visitors'}, inplace=True)
-    df_collection_sorted = df_collection_grouped.sort_values('Unique_Visitors', ascending=False)
+    df_product_sorted, _ = get_ranking('product_visitors', df_cj, range_start, range_end, approximate_visitors)
+    df_collection_sorted, _ = get_ranking('collection_visitors', df_cj, range_start, range_end, approximate_visitors)
     # Create two columns for charts
     chart_col1, chart_col2 = st.columns(2)
     # Top N most popular products chart
@@ -698,37 +1731,7 @@ def show_cj_page():
         add_tooltip_css()
         tooltip_html = render_tooltip("This chart displays the top N most popular products based on the number of unique visitors. The x-axis represents the product names, and the y-axis shows the number of unique visitors. Use the slider above to select how many top products to display. Hover over the bars for detailed information about each product's unique visitors count.")
         st.markdown( f"<h1 style='display: inline-block;'>Most Popular Products  by Unique Visitors {tooltip_html}</h1>",unsafe_allow_html=True)
-        top_n_products = st.slider("Select Top N Products to Display", min_value=1, max_value=50, value=10)
-        df_top_n_product = df_product_sorted.head(top_n_products)
-        st.markdown("<h3 style='text-align: center;'>Top N Most Popular Products</h3>", unsafe_allow_html=True)
-
-        product_chart = alt.Chart(df_top_n_product).mark_bar().encode(
-            x=alt.X('Product_Name:N', title='Product Name', sort=df_top_n_product['Unique_Visitors'].tolist(),
-                    axis=alt.Axis(labelAngle=90)),  # Adjust labels angle
-            y=alt.Y('Unique_Visitors:Q', title='Unique Visitors'),
-            color=alt.Color('Unique_Visitors:Q', legend=None),  # Color bars based on Unique Visitors
-            tooltip=['Product_Name:N', 'Unique_Visitors:Q']
-        ).properties(width=600, height=300, title="Top N Most Popular Products by Unique Visitors")
-
-        # Adding text labels on the bars
-        product_text = product_chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10,  # Adjust the vertical position of the text
-            fontSize=12
-        ).encode(
-            text='Unique_Visitors:Q'
-        )
-
-        product_chart = product_chart + product_text  # Combine the bar chart with the text
-
-        # Configure axis for readability
-        product_chart = product_chart.configure_axis(
-            labelAngle=90,  # Set x-labels to 0-degree angle
-            labelFontSize=12,  # Increase font size of labels
-            titleFontSize=16  # Increase font size of axis title
-        )
-        st.altair_chart(product_chart, use_container_width=True)
+        show_popular_products_section(df_product_sorted)
 
     # Top N most popular collections chart
     with chart_col2:
@@ -737,54 +1740,21 @@ def show_cj_page():
         tooltip_html = render_tooltip(
         "This chart shows the top N most popular collections based on unique visitors. The x-axis represents the collection names, and the y-axis shows the number of unique visitors. Use the slider above to adjust the number of top collections displayed. Hover over the bars to see detailed information about each collection's unique visitors count.")
         st.markdown(f"<h1 style='display: inline-block;'>Most Popular collections by Unique Visitors {tooltip_html}</h1>",unsafe_allow_html=True)
-        top_n_collections = st.slider("Select Top N Collections to Display", min_value=1, max_value=50, value=10)
-        df_top_n_collection = df_collection_sorted.head(top_n_collections)
-        st.markdown("<h3 style='text-align: center;'>Top N Most Popular Collections</h3>", unsafe_allow_html=True)
-
-        collection_chart = alt.Chart(df_top_n_collection).mark_bar().encode(
-            x=alt.X('Collection_Name:N', title='Collection Name', sort=df_top_n_collection['Unique_Visitors'].tolist(),
-                    axis=alt.Axis(labelAngle=90)),
-            y=alt.Y('Unique_Visitors:Q', title='Unique Visitors'),
-            color=alt.Color('Unique_Visitors:Q', legend=None),  # Color bars based on Unique Visitors
-            tooltip=['Collection_Name:N', 'Unique_Visitors:Q']
-        ).properties(width=600, height=300, title="Top N Most Popular Collections by Unique Visitors")
-
-        # Adding text labels on the bars
-        collection_text = collection_chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10,  # Adjust the vertical position of the text
-            fontSize=12
-        ).encode(
-            text='Unique_Visitors:Q'
-        )
-
-        collection_chart = collection_chart + collection_text  # Combine the bar chart with the text
-
-        # Configure axis for readability
-        collection_chart = collection_chart.configure_axis(
-            labelAngle=0,  # Set x-labels to 0-degree angle
-            labelFontSize=14,  # Increase font size of labels
-            titleFontSize=16  # Increase font size of axis title
-        )
-        st.altair_chart(collection_chart, use_container_width=True)
+        show_popular_collections_section(df_collection_sorted)
 
     #Todo-Product Name Most add to card in chart
-    df_cart_add = df_cj[df_cj['Event'] == 'Cart Add']
-    df_grouped_cart_add = df_cart_add.groupby('Product_Name')['Customer_IP'].nunique().reset_index()
-    df_grouped_cart_add.rename(columns={'Customer_IP': 'Unique_Visitors'}, inplace=True)
+    df_grouped_cart_add, _ = get_ranking('cart_add_visitors', df_cj, range_start, range_end, approximate_visitors)
     chart_col1, chart_col2 = st.columns(2)
     # Column 1: WordCloud for most searched terms
     with chart_col1:
         st.markdown("<h3 style='text-align: center;'>Most Searched Terms</h3>", unsafe_allow_html=True)
-        search_terms = df_cj['Search_Term'].dropna().astype(str)  # Ensure there are no NaN values and all are strings
-        search_term_counts = search_terms.value_counts()
-        wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(search_term_counts)
-        image = wordcloud.to_image()
-        image_stream = io.BytesIO()
-        image.save(image_stream, format='PNG')
-        image_stream.seek(0)
-        st.image(image_stream, use_container_width=True)
+        # Counted on the category codes of the search terms; terms not searched in the date range are left out
+        search_term_counts = df_cj['Search_Term'].value_counts()
+        search_term_counts = search_term_counts[search_term_counts > 0]
+        search_term_counts.index = search_term_counts.index.astype(str)
+        # The word cloud is laid out in the background and shown once the rest of the page is rendered
+        word_cloud_slot = st.empty()
+        word_cloud_image = get_word_cloud_cache().render(search_term_counts) if not search_term_counts.empty else None
     # Column 2: Bar chart for top added products to cart
     with chart_col2:
         # st.title('Most Added Products to Cart')
@@ -795,48 +1765,16 @@ def show_cj_page():
             f"<h1 style='display: inline-block;'>Most Added Products to Cart {tooltip_html}</h1>",
             unsafe_allow_html=True
         )
-        top_n_products = st.slider("Select Top N Products to Display", min_value=10, max_value=50, value=10)
-        st.markdown(f"<h3 style='text-align: center;'>Top {top_n_products} Most Added Products to Cart</h3>",unsafe_allow_html=True)
-        # Adjust filtering logic to reflect slider value
-        df_top_n_cart_add = df_grouped_cart_add.sort_values('Unique_Visitors', ascending=False).head(top_n_products)
-        # Modify the color encoding to use Unique_Visitors for coloring the bars
-        cart_add_chart = alt.Chart(df_top_n_cart_add).mark_bar().encode(
-            x=alt.X('Product_Name:N', title='Product Name', sort=df_top_n_cart_add['Unique_Visitors'].tolist(),
-                    axis=alt.Axis(labelAngle=90)),  # Rotate labels to 90 degrees for readability
-            y=alt.Y('Unique_Visitors:Q', title='Unique Visitors'),
-            color=alt.Color('Unique_Visitors:Q', legend=None),  # Color bars based on the Unique Visitors count
-            tooltip=['Product_Name:N', 'Unique_Visitors:Q']
-        ).properties(width=600, height=300, title="Top N Most Added Products to Cart by Unique Visitors")
-        # Add labels on top of the bars (number of unique visitors)
-        text = cart_add_chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10,  # Adjust label position
-            fontSize=12
-        ).encode(
-            text='Unique_Visitors:Q'
-        )
-        # Combine the bar chart and text labels
-        cart_add_chart = cart_add_chart + text
-        # Configure the axis for better readability
-        cart_add_chart = cart_add_chart.configure_axis(
-            labelAngle=0,  # Set the angle of the axis labels (x-axis) to 0 degrees
-            labelFontSize=14,  # Increase font size of labels
-            titleFontSize=16  # Increase font size of axis title
-        )
-        # Display the chart
-        st.altair_chart(cart_add_chart, use_container_width=True)
+        show_cart_add_section(df_grouped_cart_add)
 
     #Todo- Total add to cart product count
     col1 = st.columns(1)[0]
-    df_cart_add = df_cj[df_cj['Event'] == 'Cart Add']
-    df_grouped_cart_add = (
-        df_cart_add.groupby('Product_Name')['Customer_IP']
-        .nunique()
-        .reset_index()
-        .rename(columns={'Customer_IP': 'Unique_Visitors'})
-    )
-    total_unique_visitors = df_grouped_cart_add['Unique_Visitors'].sum()
+    # Summed over every product, the ranking above only keeps its top products
+    if approximate_visitors:
+        cart_add_visitors = estimate_unique_visitors('cart_add_visitors', range_start, range_end)
+    else:
+        cart_add_visitors = score_cart_add_visitors(df_cj)
+    total_unique_visitors = cart_add_visitors['Unique_Visitors'].sum()
     with col1:
         st.markdown(
             f"""
@@ -855,26 +1793,19 @@ def show_cj_page():
         add_tooltip_css()
         tooltip_html = render_tooltip("This chart displays the total number of sessions across different days of the week. The pie chart shows how sessions are distributed by day, with each segment representing one day of the week. Hover 	over the segments to see the number of sessions for each specific day. The data is based on unique sessions for each customer IP.")
         st.markdown( f"<h1 style='display: inline-block;'>Total sessions: days of week {tooltip_html}</h1>",unsafe_allow_html=True)
-        df_cj['Event_Time'] = pd.to_datetime(df_cj['Event_Time'], errors='coerce', utc=True)
-        df_cj_ = df_cj.dropna(subset=['Event_Time'])
-        df_cj['days_of_week'] = df_cj_['Event_Time'].dt.dayofweek.apply(
-            lambda x: ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'][x]
-        )
-        grouped_filtered_df = df_cj.groupby(['Customer_IP', 'session']).first().reset_index()
-        day_count = grouped_filtered_df['days_of_week'].value_counts()
-        day_count = day_count.reindex(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'], fill_value=0)
+        day_count = totals_by_day_of_week(calendar_sessions)
         pie_data = pd.DataFrame({
             'Day': day_count.index,
             'Count': day_count.values
         })
         pie_chart = alt.Chart(pie_data).mark_arc().encode(
             theta='Count:Q',
-            color=alt.Color('Day:N', sort=['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']),
+            color=alt.Color('Day:N', sort=DAYS_OF_WEEK),
             tooltip=['Day:N', 'Count:Q']
         ).properties(
             title="Total Sessions by Day of the Week"
         )
-        st.altair_chart(pie_chart, use_container_width=True)
+        show_chart(pie_chart, use_container_width=True)
     #Todo-Session per hours---------------------------------------------
     col1 = st.columns(1)[0]
     with col1:
@@ -886,12 +1817,8 @@ def show_cj_page():
             f"<h1 style='display: inline-block;'>Total sessions: hours of day {tooltip_html}</h1>",
             unsafe_allow_html=True
         )
-        df_cj['Event_Time'] = pd.to_datetime(df_cj['Event_Time'], errors='coerce', utc=True)
-        dyori_cj_df = df_cj.dropna(subset=['Event_Time'])
-        dyori_cj_df['hour_of_day'] = dyori_cj_df['Event_Time'].dt.hour + 1  # Shift hours to 1-24 range
-        grouped_filtered_df = dyori_cj_df.groupby(['Customer_IP', 'session']).first().reset_index()
-        hour_count = grouped_filtered_df['hour_of_day'].value_counts().sort_index()
-        hour_count = hour_count.reindex(range(1, 25), fill_value=0)
+        hour_count = totals_by_hour(calendar_sessions)
+        hour_count.index = hour_count.index + 1  # Shift hours to 1-24 range
         hour_data = pd.DataFrame({
             'Hour of Day': hour_count.index,
             'Number of Sessions': hour_count.values
@@ -911,15 +1838,15 @@ def show_cj_page():
         )
         # Combine line chart and points
         combined_chart = line_chart + points
-        st.altair_chart(combined_chart, use_container_width=True)
+        show_chart(combined_chart, use_container_width=True)
     # Todo- Avg time spent on each page and Total time spent on each page
     df_cj['Time_On_Page'] = pd.to_numeric(df_cj['Time_On_Page'], errors='coerce')
-    events = ['Cart', 'Home', 'Product', 'Collection']
+    events = PAGE_EVENTS
     filtered_df = df_cj[df_cj['Event'].isin(events)]
-    avg_time_per_event = filtered_df.groupby('Event')['Time_On_Page'].mean().reset_index()
-    avg_time_per_event['Time_On_Page_Display'] = avg_time_per_event['Time_On_Page'].apply(convert_seconds)
-    Total_time_spent = filtered_df.groupby('Event')['Time_On_Page'].sum().reset_index()
-    Total_time_spent['Time_On_Page_Display'] = Total_time_spent['Time_On_Page'].apply(convert_seconds)
+    avg_time_per_event = filtered_df.groupby('Event', observed=True)['Time_On_Page'].mean().reset_index()
+    avg_time_per_event['Time_On_Page_Display'] = format_duration(avg_time_per_event['Time_On_Page'])
+    Total_time_spent = filtered_df.groupby('Event', observed=True)['Time_On_Page'].sum().reset_index()
+    Total_time_spent['Time_On_Page_Display'] = format_duration(Total_time_spent['Time_On_Page'])
     col1, col2 = st.columns(2)
     with col1:
         # st.title('Average Time Spent on Each Event'
@@ -935,7 +1862,7 @@ def show_cj_page():
             width=350,
             height=350
         )
-        st.altair_chart(pie_chart_avg, use_container_width=True)
+        show_chart(pie_chart_avg, use_container_width=True)
     with col2:
         # st.title('Total Time Spent on Each Event')
         add_tooltip_css()
@@ -955,14 +1882,14 @@ def show_cj_page():
             width=350,  # Set a fixed width for consistency
             height=350  # Set a fixed height for consistency
         )
-        st.altair_chart(pie_chart_total, use_container_width=True)
+        show_chart(pie_chart_total, use_container_width=True)
     # Todo-Time_Spend on Each Product ID with Product Name------------------------------------------
     chart_col1, chart_col2 = st.columns(2)
     with chart_col1:
         df_cj['Product_ID'] = df_cj['Product_ID'].astype(str).replace(".0", "", regex=True)
-        time_spent_per_product = df_cj.groupby(['Product_ID', 'Product_Name'])['Time_On_Page'].sum().reset_index()
+        time_spent_per_product = df_cj.groupby(['Product_ID', 'Product_Name'], observed=True)['Time_On_Page'].sum().reset_index()
         time_spent_per_product_sorted = time_spent_per_product.sort_values(by='Time_On_Page', ascending=False)
-        time_spent_per_product_sorted['Time_On_Page'] = time_spent_per_product_sorted['Time_On_Page'].apply(convert_seconds)
+        time_spent_per_product_sorted['Time_On_Page'] = format_duration(time_spent_per_product_sorted['Time_On_Page'])
         # st.title("Summary of Total Time Spent Per Product")
         add_tooltip_css()
         tooltip_html = render_tooltip(
@@ -975,9 +1902,9 @@ def show_cj_page():
         st.markdown("### Total Time Spent on Each Product")
         st.dataframe(time_spent_per_product_sorted)
     with chart_col2:
-        time_spent_per_product = df_cj.groupby([ 'Collection_Name'])['Time_On_Page'].sum().reset_index()
+        time_spent_per_product = df_cj.groupby([ 'Collection_Name'], observed=True)['Time_On_Page'].sum().reset_index()
         time_spent_per_product_sorted = time_spent_per_product.sort_values(by='Time_On_Page', ascending=False)
-        time_spent_per_product_sorted['Time_On_Page'] = time_spent_per_product_sorted['Time_On_Page'].apply(convert_seconds)
+        time_spent_per_product_sorted['Time_On_Page'] = format_duration(time_spent_per_product_sorted['Time_On_Page'])
         # st.title("Summary of Total Time Spent Per Collections")
         add_tooltip_css()
         tooltip_html = render_tooltip(
@@ -990,9 +1917,13 @@ def show_cj_page():
         st.markdown("### Total Time Spent on Each Collections")
         st.dataframe(time_spent_per_product_sorted)
     # Todo- Viewers On each Page---------------------------------------------------------------------------
-    events = ['Cart', 'Home', 'Product', 'Collection']
-    filtered_df = df_cj[df_cj['Event'].isin(events)]
-    viewer_counts = filtered_df.groupby("Event")["Customer_IP"].nunique().reset_index()
+    events = PAGE_EVENTS
+    if approximate_visitors:
+        viewer_counts = estimate_unique_visitors('event_visitors', range_start, range_end)
+        viewer_counts = viewer_counts[viewer_counts['Event'].isin(events)].reset_index(drop=True)
+    else:
+        filtered_df = df_cj[df_cj['Event'].isin(events)]
+        viewer_counts = filtered_df.groupby("Event", observed=True)["Customer_IP"].nunique().reset_index()
     viewer_counts.columns = ["Event", "Total Viewers"]
     # Streamlit layout for charts
     chart_col1, chart_col2 = st.columns(2)
@@ -1029,10 +1960,10 @@ def show_cj_page():
             titleFontSize=16  # Increase font size of axis title
         )
         # Display the chart
-        st.altair_chart(page_chart, use_container_width=True)
+        show_chart(page_chart, use_container_width=True)
 
     #Todo -Bounce Rate of each Customer who spend time less then 30 second
-    customer_time = df_cj.groupby('Customer_IP')['Time_On_Page'].sum().reset_index()
+    customer_time = sessions.groupby('Customer_IP', observed=True)['Duration'].sum().reset_index(name='Time_On_Page')
     filtered_customer_time = customer_time[customer_time['Time_On_Page'] < 30]
     total_customers = customer_time['Customer_IP'].nunique()
     customers_under_30_seconds = filtered_customer_time['Customer_IP'].nunique()
@@ -1050,16 +1981,15 @@ def show_cj_page():
             unsafe_allow_html=True
         )
     #Todo -Bounce Rate By Event type
-    events = ['Cart', 'Home', 'Product', 'Collection']
-    filtered_df = df_cj[df_cj['Event'].isin(events)]
-    filtered_df = filtered_df.sort_values(by=['Customer_IP', 'session'], ascending=True)
-    last_session_df = filtered_df.drop_duplicates(subset=['Customer_IP', 'session'], keep='last')
-    bounce_df = last_session_df[last_session_df['Time_On_Page'] < 10]
+    events = PAGE_EVENTS
+    # Sessions whose last page view lasted less than 10 seconds
+    bounce_df = sessions[sessions['Last_Page_Time'] < 10]
+    viewers_per_event = viewer_counts.set_index('Event')['Total Viewers']
     bounce_rate_by_event = {}
     for event in events:
         # Get unique Customer_IPs for each event type
-        total_events_event_count = df_cj[df_cj['Event'] == event]['Customer_IP'].nunique()
-        bounce_events_event_count = bounce_df[bounce_df['Event'] == event]['Customer_IP'].nunique()
+        total_events_event_count = viewers_per_event.get(event, 0)
+        bounce_events_event_count = bounce_df[bounce_df['Last_Page_Event'] == event]['Customer_IP'].nunique()
         bounce_rate_percentage = (bounce_events_event_count / total_events_event_count) * 100 if total_events_event_count > 0 else 0
         bounce_rate_by_event[event] = bounce_rate_percentage
     # Convert the bounce rates dictionary to a DataFrame for Altair
@@ -1099,15 +2029,227 @@ def show_cj_page():
             titleFontSize=16  # Increase font size of axis title
         )
         # Display the chart
-        st.altair_chart(bounce_chart)
+        show_chart(bounce_chart)
+
+    if word_cloud_image is None:
+        word_cloud_slot.info("No searches in the selected date range.")
+    else:
+        word_cloud_slot.image(word_cloud_image.result(), use_container_width=True)
+
+@st.fragment
+def show_order_count_section(order_counts):
+    """
+    Order counts per day, month, quarter or year, as picked in the radio.
+    Parameters:
+    - order_counts (Series): Orders per day, indexed by day.
+    """
+    view = st.radio("Select View", ['Orders per Day', 'Orders per Month', 'Orders per Quarter', 'Orders per Year'])
+    if view == 'Orders per Day':
+        orders_per_day = daily_chart_rows(order_counts, 'order_count')
+        st.title('Orders Placed: Days')
+        st.markdown("<h3 style='text-align: center;'>Orders by Day</h3>", unsafe_allow_html=True)
+        # The line and the points are layers of one chart, drawn from a single copy of the rows
+        base = alt.Chart(orders_per_day)
+        line_chart = base.mark_line().encode(
+            x=alt.X('day:T', title='Date',
+                    axis=alt.Axis(format="%b %d, %Y", labelAngle=-90, tickMinStep=1)),
+            y=alt.Y('order_count:Q', title='Number of Orders'),
+            tooltip=['day:T', 'order_count:Q']
+        )
+        points = base.mark_point(size=60, color='red').encode(
+            x='day:T',
+            y='order_count:Q',
+            tooltip=['day:T', 'order_count:Q']
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+    elif view == 'Orders per Month':
+        orders_per_month = rollup_daily_metric(order_counts, 'month').reset_index(name='order_count')
+        st.title('Orders Placed: Months')
+        st.markdown("<h3 style='text-align: center;'>Orders by Month</h3>", unsafe_allow_html=True)
+        # Ensure that the month column is formatted as 'Month Year'
+        orders_per_month['month'] = orders_per_month['month'].dt.strftime('%b %Y')  # Convert to Month Year format
+        # Create the chart with the properly formatted month labels
+        line_chart = alt.Chart(orders_per_month).mark_line().encode(
+            x=alt.X('month:O', title='Month', axis=alt.Axis(labelAngle=-45)),  # Ordinal scale for months
+            y=alt.Y('order_count:Q', title='Number of Orders'),
+            tooltip=[alt.Tooltip('month:N', title='Month'), 'order_count:Q']
+        )
+        points = alt.Chart(orders_per_month).mark_point(size=60, color='red').encode(
+            x=alt.X('month:O', title='Month'),
+            y=alt.Y('order_count:Q', title='Number of Orders'),
+            tooltip=[alt.Tooltip('month:N', title='Month'), 'order_count:Q']
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+
+    elif view == 'Orders per Quarter':
+        orders_per_quarter = rollup_daily_metric(order_counts, 'quarter').reset_index(name='order_count')
+        st.title('Orders Placed: Quarters')
+        st.markdown("<h3 style='text-align: center;'>Orders by Quarter</h3>", unsafe_allow_html=True)
+        line_chart = alt.Chart(orders_per_quarter).mark_line().encode(
+            x=alt.X('quarter:N', title='Quarter'),
+            y=alt.Y('order_count:Q', title='Number of Orders'),
+            tooltip=['quarter:N', 'order_count:Q']
+        )
+        points = alt.Chart(orders_per_quarter).mark_point(size=60, color='red').encode(
+            x='quarter:N',
+            y='order_count:Q',
+            tooltip=['quarter:N', 'order_count:Q']
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+
+    elif view == 'Orders per Year':
+        orders_per_year = rollup_daily_metric(order_counts, 'year').reset_index(name='order_count')
+        st.title('Orders Placed: Years')
+        st.markdown("<h3 style='text-align: center;'>Orders by Year</h3>", unsafe_allow_html=True)
+        line_chart = alt.Chart(orders_per_year).mark_line().encode(
+            x=alt.X('year:O', title='Year'),
+            y=alt.Y('order_count:Q', title='Number of Orders'),
+            tooltip=['year:O', 'order_count:Q']
+        )
+        points = alt.Chart(orders_per_year).mark_point(size=60, color='red').encode(
+            x='year:O',
+            y='order_count:Q',
+            tooltip=['year:O', 'order_count:Q']
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+
+@st.fragment
+def show_highest_valued_orders_section(top_customers):
+    """
+    Bar chart of the top N customers by order value.
+    Parameters:
+    - top_customers (DataFrame): The 50 customers with the highest Order_Total_Price, highest first.
+    """
+    top_n = st.slider("Select Top N Customers to Display", min_value=1, max_value=50, value=5, key="top_n_largest")
+    top_customers_filtered = top_customers.head(top_n)
+    st.markdown("<h3 style='text-align: center;'>Top N Customers by Total Order Price</h3>", unsafe_allow_html=True)
+    # Create bar chart for Top N Customers
+    top_chart = alt.Chart(top_customers_filtered).mark_bar().encode(
+        x=alt.X('Customer_Name:O', title='Customer Name',sort=top_customers_filtered['Order_Total_Price'].tolist()),
+        # Customer_Name on X-axis
+        y=alt.Y('Order_Total_Price:Q', title='Total Order Price (€)'),  # Order_Total_Price on Y-axis
+        color=alt.Color('Order_Total_Price:Q', legend=None),  # Color bars by Order_Total_Price
+        tooltip=['Customer_Name:N',alt.Tooltip('Order_Total_Price:Q', title='Total Order Price (€)', format=".2f")]
+    ).properties(width=350, height=300)
+    # Add text on bars
+    top_chart_text = top_chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10,  # Adjust text position
+        fontSize=12
+    ).encode(
+        text=alt.Text('Order_Total_Price:Q', format=".2f")  # Add € symbol and format to 2 decimal places
+    )
+    top_chart = top_chart + top_chart_text
+    top_chart = top_chart.configure_axis(
+        labelAngle=0,
+        labelFontSize=14,
+        titleFontSize=16
+    )
+    show_chart(top_chart, use_container_width=True)
+
+@st.fragment
+def show_least_valued_orders_section(least_customers):
+    """
+    Bar chart of the N customers with the lowest order value.
+    Parameters:
+    - least_customers (DataFrame): The 50 customers with the lowest Order_Total_Price, lowest first.
+    """
+    least_n = st.slider("Select Least N Customers to Display", min_value=1, max_value=50, value=5,
+                        key="top_n_smallest")
+    least_customers_filtered = least_customers.head(least_n)
+    st.markdown("<h3 style='text-align: center;'>Least N Customers by Total Order Price</h3>",
+                unsafe_allow_html=True)
+    # Create bar chart for Least N Customers
+    least_chart = alt.Chart(least_customers_filtered).mark_bar().encode(
+        x=alt.X('Customer_Name:O', title='Customer Name',sort=least_customers_filtered['Order_Total_Price'].tolist()),
+        # Customer_Name on X-axis
+        y=alt.Y('Order_Total_Price:Q', title='Total Order Price (€)'),  # Order_Total_Price on Y-axis
+        color=alt.Color('Order_Total_Price:Q', legend=None),  # Color bars by Order_Total_Price
+        tooltip=['Customer_Name:N',alt.Tooltip('Order_Total_Price:Q', title='Total Order Price (€)', format=".2f")]
+    ).properties(width=350, height=300)
+    # Add text on bars
+    least_chart_text = least_chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10,  # Adjust text position
+        fontSize=12
+    ).encode(
+        text=alt.Text('Order_Total_Price:Q', format=".2f")  # Add € symbol and format to 2 decimal places
+    )
+    least_chart = least_chart + least_chart_text
+    least_chart = least_chart.configure_axis(
+        labelAngle=0,
+        labelFontSize=14,
+        titleFontSize=16
+    )
+    show_chart(least_chart, use_container_width=True)
+
+@st.fragment
+def show_order_sites_section(total_orders_by_site):
+    """
+    Bar chart of the top N referring sites by number of orders.
+    Parameters:
+    - total_orders_by_site (DataFrame): Total Orders of each Referring Site, most orders first.
+    """
+    top_n = st.slider("Select Top N Referring Sites to Display", min_value=1, max_value=len(total_orders_by_site),value=5)
+    # Filtering for top N referring sites
+    top_order_sites = total_orders_by_site.head(top_n)
+    # Step 4: Create Altair Chart
+    chart = alt.Chart(top_order_sites).mark_bar().encode(
+        x=alt.X("Referring Site:O", title="Referring Site", sort="-y"),
+        y=alt.Y("Total Orders:Q", title="Number of Orders"),
+        color=alt.Color("Total Orders:Q", legend=None),
+        tooltip=["Referring Site:N", "Total Orders:Q"]
+    ).properties(
+        width=700,
+        height=400,
+        title="Top N Referring Sites by Total Orders"
+    )
+    # Adding text labels on the bars
+    text = chart.mark_text(
+        align="center",
+        baseline="middle",
+        dy=-10  # Adjust text position
+    ).encode(
+        text="Total Orders:Q"
+    )
+    # Combine chart and text
+    final_chart = chart + text
+    # Configure axis and chart aesthetics
+    final_chart = final_chart.configure_axis(
+        labelAngle=0,
+        labelFontSize=12,
+        titleFontSize=14
+    )
+    # Display the chart
+    show_chart(final_chart, use_container_width=True)
 
-def show_order_data_page():
+@page_datasets(
+    orders=['Order_ID', 'Order_Created_At', 'Customer_ID', 'Customer_Name', 'Order_Total_Price', 'Order_Cancelled_At',
+            'Order_Referring_Site'],
+)
+def show_order_data_page(df_orders, range_start, range_end):
     st.title('Order Data')
     add_custom_css()
+    # Everything below covers the picked date range: order rows by order date, orders by their header,
+    # and order counts and totals are summed from the daily buckets
+    daily_orders = get_daily_buckets('orders', range_start, range_end)
+    if df_orders.empty:
+        st.warning("No orders in the selected date range.")
+        return
+    orders = get_order_headers(range_start, range_end)
+    daily_order_counts = get_daily_metric('orders', range_start, range_end)
+    # Order counts per day of the week and hour of the day, the weekday/weekend, day and hour charts sum them
+    calendar_orders = get_calendar_totals('orders', range_start, range_end)['Orders']
     # Todo- Card Creation for the above
     col1  = st.columns(1)[0]
     with col1:
-        total_listed_customers = df_orders['Order_ID'].nunique()
+        total_listed_customers = orders['Order_ID'].nunique()
         st.markdown(
             f"""
                 <div class="card">
@@ -1119,24 +2261,14 @@ def show_order_data_page():
         )
     st.title("Preview Filtered Order Data")
     st.subheader("Customer Order Data")
-    filtered_orders = filter_by_date(df_orders, 'Order_Created_At')
     # with st.expander("Preview Filtered Orders Data"):
-    st.dataframe(filtered_orders)
-
-    # Group by 'Order_ID' and aggregate the 'Order_Created_At' column
-    df_orders_ = df_orders.groupby('Order_ID').agg({'Order_Created_At': 'first'})
-    # Ensure the 'Order_Created_At' column is in datetime format
-    df_orders_['Order_Created_At'] = pd.to_datetime(df_orders_['Order_Created_At'], errors='coerce', utc=True)
-    # Add a new column for Weekday/Weekend
-    df_orders_['Weekday_Weekend'] = df_orders_['Order_Created_At'].dt.dayofweek.apply(
-        lambda x: 'Weekend' if x >= 5 else 'Weekday'
-    )
+    show_preview_section(df_orders, "orders_preview")
+
     # Calculate the count of orders on weekdays and weekends
-    weekday_count = df_orders_[df_orders_['Weekday_Weekend'] == 'Weekday'].shape[0]
-    weekend_count = df_orders_[df_orders_['Weekday_Weekend'] == 'Weekend'].shape[0]
+    weekday_count, weekend_count = (int(count) for count in totals_by_day_type(calendar_orders))
     # Prepare data for pie chart
     counts = [weekday_count, weekend_count]
-    labels = ['Weekday', 'Weekend']
+    labels = DAY_TYPES
     pie_data = pd.DataFrame({
         'Category': labels,
         'Count': counts,
@@ -1158,24 +2290,13 @@ def show_order_data_page():
         st.write(f"Weekend Count: {weekend_count} ({(weekend_count / sum(counts)) * 100:.2f}%)")
         st.title('Total orders placed: Weekday vs Weekend')
         st.markdown("<h3 style='text-align: center;'>Orders by Weekday/Weekend</h3>", unsafe_allow_html=True)
-        st.altair_chart(pie_chart, use_container_width=True)
+        show_chart(pie_chart, use_container_width=True)
 
     # Todo-Total Order placed on days on weeks------
-    # Group by 'Order_ID' and aggregate the 'Order_Created_At' column
-    df_orders_ = df_orders.groupby('Order_ID').agg({'Order_Created_At': 'first'}).reset_index()
-    # Convert 'Order_Created_At' to datetime format if not already done
-    df_orders_['Order_Created_At'] = pd.to_datetime(df_orders_['Order_Created_At'], errors='coerce', utc=True)
-    # Proceed with the rest of your code
     col2 = st.columns(1)[0]
     with col2:
-        # Add the 'days_of_week' column to the df_orders_ DataFrame (after grouping)
-        df_orders_['days_of_week'] = df_orders_['Order_Created_At'].dt.dayofweek.apply(
-            lambda x: ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'][x]
-        )
-        # Count occurrences of each day
-        day_count = df_orders_['days_of_week'].value_counts()
-        # Reorder the days of the week
-        day_count = day_count.reindex(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],fill_value=0)
+        # Count orders on each day of the week
+        day_count = totals_by_day_of_week(calendar_orders)
         # Create a DataFrame for pie chart
         pie_data = pd.DataFrame({
             'Day': day_count.index,
@@ -1184,27 +2305,20 @@ def show_order_data_page():
         # Create the pie chart
         pie_chart = alt.Chart(pie_data).mark_arc().encode(
             theta=alt.Theta(field="Count", type="quantitative"),
-            color=alt.Color(field="Day", type="nominal",sort=['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']),
+            color=alt.Color(field="Day", type="nominal",sort=DAYS_OF_WEEK),
             tooltip=["Day:N", "Count:Q"]
         )
         # Display results in Streamlit
         st.title('Total Orders Placed: Days of the Week')
         st.markdown("<h3 style='text-align: center;'>Orders by Day of the Week</h3>", unsafe_allow_html=True)
-        st.altair_chart(pie_chart, use_container_width=True)
+        show_chart(pie_chart, use_container_width=True)
 
     #Todo-Total Orders Placed: Hours of the Day
-    # Group by 'Order_ID' and aggregate 'Order_Created_At' to get the first occurrence
-    df_orders_ = df_orders.groupby('Order_ID').agg({'Order_Created_At': 'first'}).reset_index()
-    # Convert 'Order_Created_At' to datetime if not already done
-    df_orders_['Order_Created_At'] = pd.to_datetime(df_orders_['Order_Created_At'], errors='coerce', utc=True)
     col1 = st.columns(1)[0]
     with col1:
-        # Add 'hour_of_day' column for the df_orders_ DataFrame
-        df_orders_['hour_of_day'] = df_orders_['Order_Created_At'].dt.hour + 1  # Shift hours to 1-24 range
         # Count orders per hour
-        hour_count = df_orders_['hour_of_day'].value_counts().sort_index()
-        # Reindex to ensure every hour from 1 to 24 is included
-        hour_count = hour_count.reindex(range(1, 25), fill_value=0)
+        hour_count = totals_by_hour(calendar_orders)
+        hour_count.index = hour_count.index + 1  # Shift hours to 1-24 range
         # Prepare data for the chart
         hour_data = pd.DataFrame({
             'Hour of Day': hour_count.index,
@@ -1230,118 +2344,27 @@ def show_order_data_page():
 
         # Combine the line chart and points
         combined_chart = line_chart + points
-        st.altair_chart(combined_chart, use_container_width=True)
+        show_chart(combined_chart, use_container_width=True)
 
     #Todo-Total orders placed: day, month, quarter, year
-    df_orders_ = df_orders.groupby('Order_ID').agg({'Order_Created_At': 'first'}).reset_index()
-    # Convert 'Order_Created_At' to datetime if not already done
-    df_orders_['Order_Created_At'] = pd.to_datetime(df_orders_['Order_Created_At'], errors='coerce', utc=True)
     col1 = st.columns(1)[0]
     with col1:
-        # Extract the day, month, quarter, and year from 'Order_Created_At'
-        df_orders_['day'] = df_orders_['Order_Created_At'].dt.date
-        # Calculate total orders placed per day
-        orders_per_day = df_orders_.groupby('day').size().reset_index(name='order_count')
-        # Create a complete date range
-        start_date = orders_per_day['day'].min()
-        end_date = datetime.today().date()
-        full_date_range = pd.date_range(start=start_date, end=end_date)
-        # Reindex `orders_per_day` to ensure all dates are included
-        orders_per_day.set_index('day', inplace=True)
-        orders_per_day = orders_per_day.reindex(full_date_range, fill_value=0).reset_index()
-        orders_per_day.rename(columns={'index': 'day'}, inplace=True)
-        # Add 'month', 'quarter', and 'year' columns
-        orders_per_day['month'] = orders_per_day['day'].dt.to_period('M').astype(str)  # Year-Month format
-        orders_per_day['quarter'] = orders_per_day['day'].dt.to_period('Q').astype(str)  # Year-Quarter format
-        orders_per_day['year'] = orders_per_day['day'].dt.year  # Year format
-        # Group data-----
-        orders_per_month = orders_per_day.groupby('month')['order_count'].sum().reset_index()
-        orders_per_month['month'] = pd.to_datetime(orders_per_month['month'], format='%Y-%m')
-        orders_per_month = orders_per_month.sort_values(by='month')
-        orders_per_quarter = orders_per_day.groupby('quarter')['order_count'].sum().reset_index()
-        orders_per_year = orders_per_day.groupby('year')['order_count'].sum().reset_index()
+        # Total orders placed per day from the first to the last day with orders, days without orders included
+        order_counts = daily_order_counts.asfreq('D', fill_value=0)
         # Streamlit Visualization
         st.title('Order Count Visualizations')
-        view = st.radio("Select View", ['Orders per Day', 'Orders per Month', 'Orders per Quarter', 'Orders per Year'])
-        if view == 'Orders per Day':
-            st.title('Orders Placed: Days')
-            st.markdown("<h3 style='text-align: center;'>Orders by Day</h3>", unsafe_allow_html=True)
-            line_chart = alt.Chart(orders_per_day).mark_line().encode(
-                x=alt.X('day:T', title='Date',
-                        axis=alt.Axis(format="%b %d, %Y", labelAngle=-90, tickMinStep=1)),
-                y=alt.Y('order_count:Q', title='Number of Orders'),
-                tooltip=['day:T', 'order_count:Q']
-            )
-            points = alt.Chart(orders_per_day).mark_point(size=60, color='red').encode(
-                x='day:T',
-                y='order_count:Q',
-                tooltip=['day:T', 'order_count:Q']
-            )
-            combined_chart = line_chart + points
-            st.altair_chart(combined_chart, use_container_width=True)
-        elif view == 'Orders per Month':
-            st.title('Orders Placed: Months')
-            st.markdown("<h3 style='text-align: center;'>Orders by Month</h3>", unsafe_allow_html=True)
-            # Ensure that the month column is formatted as 'Month Year'
-            orders_per_month['month'] = orders_per_month['month'].dt.strftime('%b %Y')  # Convert to Month Year format
-            # Create the chart with the properly formatted month labels
-            line_chart = alt.Chart(orders_per_month).mark_line().encode(
-                x=alt.X('month:O', title='Month', axis=alt.Axis(labelAngle=-45)),  # Ordinal scale for months
-                y=alt.Y('order_count:Q', title='Number of Orders'),
-                tooltip=[alt.Tooltip('month:N', title='Month'), 'order_count:Q']
-            )
-            points = alt.Chart(orders_per_month).mark_point(size=60, color='red').encode(
-                x=alt.X('month:O', title='Month'),
-                y=alt.Y('order_count:Q', title='Number of Orders'),
-                tooltip=[alt.Tooltip('month:N', title='Month'), 'order_count:Q']
-            )
-            combined_chart = line_chart + points
-            st.altair_chart(combined_chart, use_container_width=True)
-
-        elif view == 'Orders per Quarter':
-            st.title('Orders Placed: Quarters')
-            st.markdown("<h3 style='text-align: center;'>Orders by Quarter</h3>", unsafe_allow_html=True)
-            line_chart = alt.Chart(orders_per_quarter).mark_line().encode(
-                x=alt.X('quarter:N', title='Quarter'),
-                y=alt.Y('order_count:Q', title='Number of Orders'),
-                tooltip=['quarter:N', 'order_count:Q']
-            )
-            points = alt.Chart(orders_per_quarter).mark_point(size=60, color='red').encode(
-                x='quarter:N',
-                y='order_count:Q',
-                tooltip=['quarter:N', 'order_count:Q']
-            )
-            combined_chart = line_chart + points
-            st.altair_chart(combined_chart, use_container_width=True)
-
-        elif view == 'Orders per Year':
-            st.title('Orders Placed: Years')
-            st.markdown("<h3 style='text-align: center;'>Orders by Year</h3>", unsafe_allow_html=True)
-            line_chart = alt.Chart(orders_per_year).mark_line().encode(
-                x=alt.X('year:O', title='Year'),
-                y=alt.Y('order_count:Q', title='Number of Orders'),
-                tooltip=['year:O', 'order_count:Q']
-            )
-            points = alt.Chart(orders_per_year).mark_point(size=60, color='red').encode(
-                x='year:O',
-                y='order_count:Q',
-                tooltip=['year:O', 'order_count:Q']
-            )
-            combined_chart = line_chart + points
-            st.altair_chart(combined_chart, use_container_width=True)
+        show_order_count_section(order_counts)
 
     #Todo-average_orders_per_customer----------------------------------------------------------
-    orders_per_customer = df_orders.groupby('Customer_ID')['Order_ID'].nunique().reset_index()
-    average_orders_per_customer = orders_per_customer['Order_ID'].mean()
+    customer_order_counts = get_customer_features(range_start, range_end)['Orders_Placed']
+    average_orders_per_customer = customer_order_counts.mean()
     average_orders_per_customer = round(average_orders_per_customer, 2)
     #Todo -Total Order canceled count--------------------------------------------------
-    total_canceled_orders = df_orders[df_orders['Order_Cancelled_At'].notna()].shape[0]
+    total_canceled_orders = orders[orders['Order_Cancelled_At'].notna()].shape[0]
     #Todo-Most orders placed by a customer-----------------------------------------------
-    customer_order_counts = df_orders.groupby('Customer_ID')['Order_ID'].nunique()
     max_orders = customer_order_counts.max()
     #Todo-Average-order valued-----------------------------------------------------------
-    order_data = df_orders.groupby('Order_ID').agg({'Order_Total_Price': 'first'}).reset_index()
-    average_order_value = order_data['Order_Total_Price'].mean()
+    average_order_value = daily_orders['Revenue'].sum() / daily_orders['Priced_Orders'].sum()
     average_order_value = round(average_order_value, 2)
     col1,col2,col3,col4=st.columns(4)
     with col1:
@@ -1385,122 +2408,149 @@ def show_order_data_page():
             unsafe_allow_html=True
         )
     #Todo-Highest valued orders and Least valued orders-------------------------------------
-    order_data = df_orders.groupby('Customer_Name').agg(
-        {'Order_ID': 'first', 'Order_Total_Price': 'first'}).reset_index()
-    order_data = order_data.dropna(subset=['Order_ID'])
-    top_customers = order_data.nlargest(50, 'Order_Total_Price')
-    least_customers = order_data.nsmallest(50, 'Order_Total_Price')
+    top_customers, least_customers = get_ranking('customer_order_value', orders, range_start, range_end)
     chart_col1, chart_col2 = st.columns(2)
 
     # Chart for Top N Customers
     with chart_col1:
         st.title('Highest valued orders')
-        top_n = st.slider("Select Top N Customers to Display", min_value=1, max_value=50, value=5, key="top_n_largest")
-        top_customers_filtered = top_customers.nlargest(top_n, 'Order_Total_Price')
-        st.markdown("<h3 style='text-align: center;'>Top N Customers by Total Order Price</h3>", unsafe_allow_html=True)
-        # Create bar chart for Top N Customers
-        top_chart = alt.Chart(top_customers_filtered).mark_bar().encode(
-            x=alt.X('Customer_Name:O', title='Customer Name',sort=top_customers_filtered['Order_Total_Price'].tolist()),
-            # Customer_Name on X-axis
-            y=alt.Y('Order_Total_Price:Q', title='Total Order Price (€)'),  # Order_Total_Price on Y-axis
-            color=alt.Color('Order_Total_Price:Q', legend=None),  # Color bars by Order_Total_Price
-            tooltip=['Customer_Name:N',alt.Tooltip('Order_Total_Price:Q', title='Total Order Price (€)', format=".2f")]
-        ).properties(width=350, height=300)
-        # Add text on bars
-        top_chart_text = top_chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10,  # Adjust text position
-            fontSize=12
-        ).encode(
-            text=alt.Text('Order_Total_Price:Q', format=".2f")  # Add € symbol and format to 2 decimal places
-        )
-        top_chart = top_chart + top_chart_text
-        top_chart = top_chart.configure_axis(
-            labelAngle=0,
-            labelFontSize=14,
-            titleFontSize=16
-        )
-        st.altair_chart(top_chart, use_container_width=True)
+        show_highest_valued_orders_section(top_customers)
 
     # Chart for Least N Customers
     with chart_col2:
         st.title("Least valued orders")
-        least_n = st.slider("Select Least N Customers to Display", min_value=1, max_value=50, value=5,
-                            key="top_n_smallest")
-        least_customers_filtered = least_customers.nsmallest(least_n, 'Order_Total_Price')
-        st.markdown("<h3 style='text-align: center;'>Least N Customers by Total Order Price</h3>",
-                    unsafe_allow_html=True)
-        # Create bar chart for Least N Customers
-        least_chart = alt.Chart(least_customers_filtered).mark_bar().encode(
-            x=alt.X('Customer_Name:O', title='Customer Name',sort=least_customers_filtered['Order_Total_Price'].tolist()),
-            # Customer_Name on X-axis
-            y=alt.Y('Order_Total_Price:Q', title='Total Order Price (€)'),  # Order_Total_Price on Y-axis
-            color=alt.Color('Order_Total_Price:Q', legend=None),  # Color bars by Order_Total_Price
-            tooltip=['Customer_Name:N',alt.Tooltip('Order_Total_Price:Q', title='Total Order Price (€)', format=".2f")]
-        ).properties(width=350, height=300)
-        # Add text on bars
-        least_chart_text = least_chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10,  # Adjust text position
-            fontSize=12
-        ).encode(
-            text=alt.Text('Order_Total_Price:Q', format=".2f")  # Add € symbol and format to 2 decimal places
-        )
-        least_chart = least_chart + least_chart_text
-        least_chart = least_chart.configure_axis(
-            labelAngle=0,
-            labelFontSize=14,
-            titleFontSize=16
-        )
-        st.altair_chart(least_chart, use_container_width=True)
+        show_least_valued_orders_section(least_customers)
 
     #Todo-Total Order by Referring Site
-    df_unique_orders = df_orders.drop_duplicates(subset="Order_ID", keep="first")
-    # Step 2: Calculate total orders by referring sites
-    total_orders_by_site = df_unique_orders.groupby("Order_Referring_Site")["Order_ID"].count().reset_index()
-    total_orders_by_site.columns = ["Referring Site", "Total Orders"]
+    # Step 2: Rank the referring sites by total orders
+    total_orders_by_site, _ = get_ranking('order_sites', orders, range_start, range_end)
     # Step 3: Streamlit layout
     st.title("Total Orders by Referring Sites")
     st.markdown("### Visualizing the count of total orders grouped by referring sites")
     # Slider for selecting top N referring sites
-    top_n = st.slider("Select Top N Referring Sites to Display", min_value=1, max_value=len(total_orders_by_site),value=5)
-    # Filtering for top N referring sites
-    top_order_sites = total_orders_by_site.nlargest(top_n, "Total Orders")
-    # Step 4: Create Altair Chart
-    chart = alt.Chart(top_order_sites).mark_bar().encode(
-        x=alt.X("Referring Site:O", title="Referring Site", sort="-y"),
-        y=alt.Y("Total Orders:Q", title="Number of Orders"),
-        color=alt.Color("Total Orders:Q", legend=None),
-        tooltip=["Referring Site:N", "Total Orders:Q"]
-    ).properties(
-        width=700,
-        height=400,
-        title="Top N Referring Sites by Total Orders"
-    )
-    # Adding text labels on the bars
-    text = chart.mark_text(
-        align="center",
-        baseline="middle",
-        dy=-10  # Adjust text position
+    show_order_sites_section(total_orders_by_site)
+
+@st.fragment
+def show_abandoned_order_count_section(abandoned_order_counts):
+    """
+    Abandoned order counts per day, month, quarter or year, as picked in the radio.
+    Parameters:
+    - abandoned_order_counts (Series): Abandoned orders per day, indexed by day.
+    """
+    view = st.radio("Select View",['Abandoned Orders per Day', 'Abandoned Orders per Month', 'Abandoned Orders per Quarter','Abandoned Orders per Year'])
+    if view == 'Abandoned Orders per Day':
+        abandoned_orders_per_day = daily_chart_rows(abandoned_order_counts, 'order_count')
+        st.title('Abandoned Orders: Days')
+        st.markdown("<h3 style='text-align: center;'>Abandoned Orders by Day</h3>", unsafe_allow_html=True)
+        # The line and the points are layers of one chart, drawn from a single copy of the rows
+        base = alt.Chart(abandoned_orders_per_day)
+        line_chart = base.mark_line().encode(
+            x=alt.X('day:T', title='Date',
+                    axis=alt.Axis(format="%b %d, %Y", labelAngle=-90, tickMinStep=1)),
+            y=alt.Y('order_count:Q', title='Number of Abandoned Orders'),
+            tooltip=['day:T', 'order_count:Q']
+        )
+        points = base.mark_point(size=60, color='red').encode(
+            x='day:T',
+            y='order_count:Q',
+            tooltip=['day:T', 'order_count:Q']
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+
+    elif view == 'Abandoned Orders per Month':
+        abandoned_orders_per_month = rollup_daily_metric(abandoned_order_counts, 'month').reset_index(name='order_count')
+        st.title('Abandoned Orders: Months')
+        st.markdown("<h3 style='text-align: center;'>Abandoned Orders by Month</h3>", unsafe_allow_html=True)
+        # Create the chart with formatted month labels
+        line_chart = alt.Chart(abandoned_orders_per_month).mark_line().encode(
+            x=alt.X('month:T', title='Month', axis=alt.Axis(format='%b %Y', labelAngle=-45)),
+            # Date type with custom formatting
+            y=alt.Y('order_count:Q', title='Number of Abandoned Orders'),
+            tooltip=[alt.Tooltip('month:T', title='Month'), 'order_count:Q']
+        )
+        points = alt.Chart(abandoned_orders_per_month).mark_point(size=60, color='red').encode(
+            x=alt.X('month:T', title='Month'),
+            y=alt.Y('order_count:Q', title='Number of Abandoned Orders'),
+            tooltip=[alt.Tooltip('month:T', title='Month'), 'order_count:Q']
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+
+    elif view == 'Abandoned Orders per Quarter':
+        abandoned_orders_per_quarter = rollup_daily_metric(abandoned_order_counts, 'quarter').reset_index(name='order_count')
+        st.title('Abandoned Orders: Quarters')
+        st.markdown("<h3 style='text-align: center;'>Abandoned Orders by Quarter</h3>", unsafe_allow_html=True)
+        line_chart = alt.Chart(abandoned_orders_per_quarter).mark_line().encode(
+            x=alt.X('quarter:N', title='Quarter'),
+            y=alt.Y('order_count:Q', title='Number of Abandoned Orders'),
+            tooltip=['quarter:N', 'order_count:Q']
+        )
+        points = alt.Chart(abandoned_orders_per_quarter).mark_point(size=60, color='red').encode(
+            x='quarter:N',
+            y='order_count:Q',
+            tooltip=['quarter:N', 'order_count:Q']
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+    elif view == 'Abandoned Orders per Year':
+        abandoned_orders_per_year = rollup_daily_metric(abandoned_order_counts, 'year').reset_index(name='order_count')
+        st.title('Abandoned Orders: Years')
+        st.markdown("<h3 style='text-align: center;'>Abandoned Orders by Year</h3>", unsafe_allow_html=True)
+        line_chart = alt.Chart(abandoned_orders_per_year).mark_line().encode(
+            x=alt.X('year:O', title='Year'),
+            y=alt.Y('order_count:Q', title='Number of Abandoned Orders'),
+            tooltip=['year:O', 'order_count:Q']
+        )
+        points = alt.Chart(abandoned_orders_per_year).mark_point(size=60, color='red').encode(
+            x='year:O',
+            y='order_count:Q',
+            tooltip=['year:O', 'order_count:Q']
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+
+@st.fragment
+def show_abandoned_sites_section(referring_sites):
+    """
+    Bar chart of the top N referring sites by number of abandoned orders.
+    Parameters:
+    - referring_sites (DataFrame): Abandoned order count of the 50 referring sites with the most, highest first.
+    """
+    top_n = st.slider("Select Top N Referring Sites to Display", min_value=1, max_value=50, value=10,key="top_n_sites")
+    top_referring_sites = referring_sites.head(top_n)
+    st.markdown("<h3 style='text-align: center;'>Top N Referring Sites by Abandoned Orders</h3>",unsafe_allow_html=True)
+    chart = alt.Chart(top_referring_sites).mark_bar().encode(
+        x=alt.X('Order_Referring_Site:O', title='Referring Site', sort='-y'),  # X-axis for sites
+        y=alt.Y('Total_Abandoned_Orders:Q', title='Total Abandoned Orders'),  # Y-axis for total abandoned orders
+        color=alt.Color('Total_Abandoned_Orders:Q', legend=None),  # Color bars by count
+        tooltip=['Order_Referring_Site:N', 'Total_Abandoned_Orders:Q']  # Add tooltips
+    ).properties(width=700, height=400)
+    chart_text = chart.mark_text(
+        align='center',
+        baseline='bottom',
+        dy=-10,
+        fontSize=12
     ).encode(
-        text="Total Orders:Q"
-    )
-    # Combine chart and text
-    final_chart = chart + text
-    # Configure axis and chart aesthetics
-    final_chart = final_chart.configure_axis(
-        labelAngle=0,
-        labelFontSize=12,
-        titleFontSize=14
+        text='Total_Abandoned_Orders:Q'
     )
-    # Display the chart
-    st.altair_chart(final_chart, use_container_width=True)
+    final_chart = chart + chart_text
+    show_chart(final_chart, use_container_width=True)
 
-def show_abandoned_checkouts_page():
+@page_datasets(
+    abandoned_checkouts=['Order_ID', 'Order_Created_At', 'Customer_ID', 'Order_Referring_Site'],
+)
+def show_abandoned_checkouts_page(df_abandoned_checkouts, range_start, range_end):
     st.title('Abandoned Checkouts')
     add_custom_css()
+    # Everything below covers the picked date range: checkout rows by creation date,
+    # and abandoned order counts are summed from the daily buckets
+    if df_abandoned_checkouts.empty:
+        st.warning("No abandoned checkouts in the selected date range.")
+        return
+    daily_abandoned_counts = get_daily_metric('abandoned_orders', range_start, range_end)
+    # Abandoned order counts per day of the week and hour of the day, the weekday/weekend, day and hour charts sum them
+    calendar_abandoned = get_calendar_totals('abandoned_checkouts', range_start, range_end)['Orders']
     # Todo- Card Creation for the above
     col1 = st.columns(1)[0]
     with col1:
@@ -1516,24 +2566,14 @@ def show_abandoned_checkouts_page():
         )
     st.title("Preview Filtered Abandoned Checkouts Data")
     st.subheader("Abandoned Checkouts Data")
-    filtered_abandoned_checkouts = filter_by_date(df_abandoned_checkouts, 'Order_Created_At')
     # with st.expander("Preview Filtered Abandoned Checkouts Data"):
-    st.dataframe(filtered_abandoned_checkouts)
+    show_preview_section(df_abandoned_checkouts, "abandoned_checkouts_preview")
     # Todo-Total Order placed on weekdays and weekend
-    # Group by 'Order_ID' and aggregate the 'Order_Created_At' column
-    df_abandoned_checkouts_ = df_abandoned_checkouts.groupby('Order_ID').agg({'Order_Created_At': 'first'})
-    # Ensure the 'Order_Created_At' column is in datetime format
-    df_abandoned_checkouts_['Order_Created_At'] = pd.to_datetime(df_abandoned_checkouts_['Order_Created_At'],errors='coerce', utc=True)
-    # Add a new column for Weekday/Weekend
-    df_abandoned_checkouts_['Weekday_Weekend'] = df_abandoned_checkouts_['Order_Created_At'].dt.dayofweek.apply(
-        lambda x: 'Weekend' if x >= 5 else 'Weekday'
-    )
     # Calculate the count of orders on weekdays and weekends
-    weekday_count = df_abandoned_checkouts_[df_abandoned_checkouts_['Weekday_Weekend'] == 'Weekday'].shape[0]
-    weekend_count = df_abandoned_checkouts_[df_abandoned_checkouts_['Weekday_Weekend'] == 'Weekend'].shape[0]
+    weekday_count, weekend_count = (int(count) for count in totals_by_day_type(calendar_abandoned))
     # Prepare data for pie chart
     counts = [weekday_count, weekend_count]
-    labels = ['Weekday', 'Weekend']
+    labels = DAY_TYPES
     pie_data = pd.DataFrame({
         'Category': labels,
         'Count': counts,
@@ -1553,26 +2593,13 @@ def show_abandoned_checkouts_page():
         st.write(f"Weekend Count: {weekend_count} ({(weekend_count / sum(counts)) * 100:.2f}%)")
         st.title('Total orders abandoned: weekday vs weekend')
         st.markdown("<h3 style='text-align: center;'>Orders abandoned by Weekday/Weekend</h3>", unsafe_allow_html=True)
-        st.altair_chart(pie_chart, use_container_width=True)
+        show_chart(pie_chart, use_container_width=True)
 
     #Todo----------Total orders abandoned: days of week-------------------
-    # Group by 'Order_ID' and aggregate the 'Order_Created_At' column
-    df_abandoned_checkouts_ = df_abandoned_checkouts.groupby('Order_ID').agg(
-        {'Order_Created_At': 'first'}).reset_index()
-    # Convert 'Order_Created_At' to datetime format if not already done
-    df_abandoned_checkouts_['Order_Created_At'] = pd.to_datetime(df_abandoned_checkouts_['Order_Created_At'],errors='coerce', utc=True)
-    # Proceed with the rest of your code
     col2 = st.columns(1)[0]
     with col2:
-        # Add the 'days_of_week' column to the df_abandoned_checkouts_ DataFrame (after grouping)
-        df_abandoned_checkouts_['days_of_week'] = df_abandoned_checkouts_['Order_Created_At'].dt.dayofweek.apply(
-            lambda x: ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'][x]
-        )
-        # Count occurrences of each day
-        day_count = df_abandoned_checkouts_['days_of_week'].value_counts()
-        # Reorder the days of the week
-        day_count = day_count.reindex(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
-                                      fill_value=0)
+        # Count abandoned orders on each day of the week
+        day_count = totals_by_day_of_week(calendar_abandoned)
         # Create a DataFrame for pie chart
         pie_data = pd.DataFrame({
             'Day': day_count.index,
@@ -1582,26 +2609,19 @@ def show_abandoned_checkouts_page():
         pie_chart = alt.Chart(pie_data).mark_arc().encode(
             theta=alt.Theta(field="Count", type="quantitative"),
             color=alt.Color(field="Day", type="nominal",
-                            sort=['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']),
+                            sort=DAYS_OF_WEEK),
             tooltip=["Day:N", "Count:Q"]
         )
         # Display results in Streamlit
         st.title('Total orders abandoned: days of week')
         st.markdown("<h3 style='text-align: center;'>Orders abandoned by Day of the Week</h3>", unsafe_allow_html=True)
-        st.altair_chart(pie_chart, use_container_width=True)
+        show_chart(pie_chart, use_container_width=True)
     #Todo- Total orders abandoned: hours of day
-    df_abandoned_checkouts_ = df_abandoned_checkouts.groupby('Order_ID').agg(
-        {'Order_Created_At': 'first'}).reset_index()
-    # Convert 'Order_Created_At' to datetime if not already done
-    df_abandoned_checkouts_['Order_Created_At'] = pd.to_datetime(df_abandoned_checkouts_['Order_Created_At'],errors='coerce', utc=True)
     col1 = st.columns(1)[0]
     with col1:
-        # Add 'hour_of_day' column for the df_abandoned_checkouts_ DataFrame
-        df_abandoned_checkouts_['hour_of_day'] = df_abandoned_checkouts_['Order_Created_At'].dt.hour + 1  # Shift hours to 1-24 range
         # Count orders per hour
-        hour_count = df_abandoned_checkouts_['hour_of_day'].value_counts().sort_index()
-        # Reindex to ensure every hour from 1 to 24 is included
-        hour_count = hour_count.reindex(range(1, 25), fill_value=0)
+        hour_count = totals_by_hour(calendar_abandoned)
+        hour_count.index = hour_count.index + 1  # Shift hours to 1-24 range
         # Prepare data for the chart
         hour_data = pd.DataFrame({
             'Hour of Day': hour_count.index,
@@ -1626,108 +2646,16 @@ def show_abandoned_checkouts_page():
         )
         # Combine the line chart and points
         combined_chart = line_chart + points
-        st.altair_chart(combined_chart, use_container_width=True)
+        show_chart(combined_chart, use_container_width=True)
     #Todo-Total orders abandoned: day, month, quarter, year
-    # Group by 'Order_ID' and aggregate 'Order_Created_At' to get the first occurrence in abandoned checkouts
-    df_abandoned_checkouts_ = df_abandoned_checkouts.groupby('Order_ID').agg({'Order_Created_At': 'first'}).reset_index()
-    # Convert 'Order_Created_At' to datetime if not already done for abandoned checkouts
-    df_abandoned_checkouts_['Order_Created_At'] = pd.to_datetime(df_abandoned_checkouts_['Order_Created_At'],errors='coerce', utc=True)
     col1 = st.columns(1)[0]
     with col1:
-        # Extract the day, month, quarter, and year from 'Order_Created_At'
-        df_abandoned_checkouts_['day'] = df_abandoned_checkouts_['Order_Created_At'].dt.date
-        # Calculate total abandoned orders placed per day
-        abandoned_orders_per_day = df_abandoned_checkouts_.groupby('day').size().reset_index(name='order_count')
-        # Create a complete date range for abandoned orders
-        start_date = abandoned_orders_per_day['day'].min()
-        end_date = datetime.today().date()
-        full_date_range = pd.date_range(start=start_date, end=end_date)
-        # Reindex `abandoned_orders_per_day` to ensure all dates are included
-        abandoned_orders_per_day.set_index('day', inplace=True)
-        abandoned_orders_per_day = abandoned_orders_per_day.reindex(full_date_range, fill_value=0).reset_index()
-        abandoned_orders_per_day.rename(columns={'index': 'day'}, inplace=True)
-        # Add 'month', 'quarter', and 'year' columns
-        abandoned_orders_per_day['month'] = abandoned_orders_per_day['day'].dt.to_period('M').astype(str)  # Year-Month format
-        abandoned_orders_per_day['quarter'] = abandoned_orders_per_day['day'].dt.to_period('Q').astype(str)  # Year-Quarter format
-        abandoned_orders_per_day['year'] = abandoned_orders_per_day['day'].dt.year  # Year format
-        # Group data for abandoned orders
-        abandoned_orders_per_month = abandoned_orders_per_day.groupby('month')['order_count'].sum().reset_index()
-        abandoned_orders_per_month['month'] = pd.to_datetime(abandoned_orders_per_month['month'], format='%Y-%m')
-        abandoned_orders_per_month = abandoned_orders_per_month.sort_values(by='month')
-        #Group data for Quarter data set
-        abandoned_orders_per_quarter = abandoned_orders_per_day.groupby('quarter')['order_count'].sum().reset_index()
-        #group data for year dataset
-        abandoned_orders_per_year = abandoned_orders_per_day.groupby('year')['order_count'].sum().reset_index()
+        # Total abandoned orders placed per day from the first to the last day with abandoned orders,
+        # days without abandoned orders included
+        abandoned_order_counts = daily_abandoned_counts.asfreq('D', fill_value=0)
         # Streamlit Visualization for abandoned orders
         st.title('Abandoned Order Count Visualizations')
-        view = st.radio("Select View",['Abandoned Orders per Day', 'Abandoned Orders per Month', 'Abandoned Orders per Quarter','Abandoned Orders per Year'])
-        if view == 'Abandoned Orders per Day':
-            st.title('Abandoned Orders: Days')
-            st.markdown("<h3 style='text-align: center;'>Abandoned Orders by Day</h3>", unsafe_allow_html=True)
-            line_chart = alt.Chart(abandoned_orders_per_day).mark_line().encode(
-                x=alt.X('day:T', title='Date',
-                        axis=alt.Axis(format="%b %d, %Y", labelAngle=-90, tickMinStep=1)),
-                y=alt.Y('order_count:Q', title='Number of Abandoned Orders'),
-                tooltip=['day:T', 'order_count:Q']
-            )
-            points = alt.Chart(abandoned_orders_per_day).mark_point(size=60, color='red').encode(
-                x='day:T',
-                y='order_count:Q',
-                tooltip=['day:T', 'order_count:Q']
-            )
-            combined_chart = line_chart + points
-            st.altair_chart(combined_chart, use_container_width=True)
-
-        elif view == 'Abandoned Orders per Month':
-            st.title('Abandoned Orders: Months')
-            st.markdown("<h3 style='text-align: center;'>Abandoned Orders by Month</h3>", unsafe_allow_html=True)
-            # Ensure 'month' is a datetime column
-            abandoned_orders_per_month['month'] = pd.to_datetime(abandoned_orders_per_month['month'], format='%Y-%m-%d')
-            # Create the chart with formatted month labels
-            line_chart = alt.Chart(abandoned_orders_per_month).mark_line().encode(
-                x=alt.X('month:T', title='Month', axis=alt.Axis(format='%b %Y', labelAngle=-45)),
-                # Date type with custom formatting
-                y=alt.Y('order_count:Q', title='Number of Abandoned Orders'),
-                tooltip=[alt.Tooltip('month:T', title='Month'), 'order_count:Q']
-            )
-            points = alt.Chart(abandoned_orders_per_month).mark_point(size=60, color='red').encode(
-                x=alt.X('month:T', title='Month'),
-                y=alt.Y('order_count:Q', title='Number of Abandoned Orders'),
-                tooltip=[alt.Tooltip('month:T', title='Month'), 'order_count:Q']
-            )
-            combined_chart = line_chart + points
-            st.altair_chart(combined_chart, use_container_width=True)
-
-        elif view == 'Abandoned Orders per Quarter':
-            st.title('Abandoned Orders: Quarters')
-            st.markdown("<h3 style='text-align: center;'>Abandoned Orders by Quarter</h3>", unsafe_allow_html=True)
-            line_chart = alt.Chart(abandoned_orders_per_quarter).mark_line().encode(
-                x=alt.X('quarter:N', title='Quarter'),
-                y=alt.Y('order_count:Q', title='Number of Abandoned Orders'),
-                tooltip=['quarter:N', 'order_count:Q']
-            )
-            points = alt.Chart(abandoned_orders_per_quarter).mark_point(size=60, color='red').encode(
-                x='quarter:N',
-                y='order_count:Q',
-                tooltip=['quarter:N', 'order_count:Q']
-            )
-            combined_chart = line_chart + points
-            st.altair_chart(combined_chart, use_container_width=True)
-        elif view == 'Abandoned Orders per Year':
-            st.title('Abandoned Orders: Years')
-            st.markdown("<h3 style='text-align: center;'>Abandoned Orders by Year</h3>", unsafe_allow_html=True)
-            line_chart = alt.Chart(abandoned_orders_per_year).mark_line().encode(
-                x=alt.X('year:O', title='Year'),
-                y=alt.Y('order_count:Q', title='Number of Abandoned Orders'),
-                tooltip=['year:O', 'order_count:Q']
-            )
-            points = alt.Chart(abandoned_orders_per_year).mark_point(size=60, color='red').encode(
-                x='year:O',
-                y='order_count:Q',
-                tooltip=['year:O', 'order_count:Q']
-            )
-            combined_chart = line_chart + points
-            st.altair_chart(combined_chart, use_container_width=True)
+        show_abandoned_order_count_section(abandoned_order_counts)
 
         #Todo-Average abandoned orders per customer------------------------------------------------------------
         col1,col2 = st.columns(2)
@@ -1758,35 +2686,177 @@ def show_abandoned_checkouts_page():
                 unsafe_allow_html=True
             )
         #Todo- Referring Sites by Abandoned Orders Top N
-        df_abandoned_checkouts['Order_Referring_Site'] = df_abandoned_checkouts['Order_Referring_Site'].fillna('Unknown')  # Handle missing values
-        df_abandoned_checkouts['Order_ID'] = df_abandoned_checkouts['Order_ID'].astype(str)  # Ensure Order_ID is treated as a string
-        referring_sites = df_abandoned_checkouts.groupby('Order_Referring_Site')['Order_ID'].nunique().reset_index()
-        referring_sites = referring_sites.rename(columns={'Order_ID': 'Total_Abandoned_Orders'})
-        referring_sites = referring_sites.sort_values('Total_Abandoned_Orders', ascending=False)
+        referring_sites, _ = get_ranking('abandoned_sites', df_abandoned_checkouts, range_start, range_end)
         st.title("Total Abandoned Orders by Referring Sites")
-        top_n = st.slider("Select Top N Referring Sites to Display", min_value=1, max_value=50, value=10,key="top_n_sites")
-        top_referring_sites = referring_sites.head(top_n)
-        st.markdown("<h3 style='text-align: center;'>Top N Referring Sites by Abandoned Orders</h3>",unsafe_allow_html=True)
-        chart = alt.Chart(top_referring_sites).mark_bar().encode(
-            x=alt.X('Order_Referring_Site:O', title='Referring Site', sort='-y'),  # X-axis for sites
-            y=alt.Y('Total_Abandoned_Orders:Q', title='Total Abandoned Orders'),  # Y-axis for total abandoned orders
-            color=alt.Color('Total_Abandoned_Orders:Q', legend=None),  # Color bars by count
-            tooltip=['Order_Referring_Site:N', 'Total_Abandoned_Orders:Q']  # Add tooltips
-        ).properties(width=700, height=400)
-        chart_text = chart.mark_text(
-            align='center',
-            baseline='bottom',
-            dy=-10,
-            fontSize=12
-        ).encode(
-            text='Total_Abandoned_Orders:Q'
-        )
-        final_chart = chart + chart_text
-        st.altair_chart(final_chart, use_container_width=True)
+        show_abandoned_sites_section(referring_sites)
+
+@st.fragment
+def show_product_types_section(product_counts):
+    """
+    Bar chart of the top N product types by number of products.
+    Parameters:
+    - product_counts (DataFrame): Count of products of each type, largest first.
+    """
+    top_n = st.slider("Select Top N Product Types to Display", min_value=1, max_value=len(product_counts), value=5)
+    # Filtering for top N product types
+    top_product_counts = product_counts.head(top_n)
+    # Altair chart
+    chart = alt.Chart(top_product_counts).mark_bar().encode(
+        x=alt.X('Product_Type:O', title='Product Type', sort='-y'),
+        y=alt.Y('Count:Q', title='Number of Products'),
+        color=alt.Color('Count:Q', legend=None),
+        tooltip=['Product_Type:N', 'Count:Q']
+    ).properties(
+        width=700,
+        height=400,
+        title="Top N Product Types by Count"
+    )
+    # Adding text labels on the bars
+    text = chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10  # Adjust text position
+    ).encode(
+        text='Count:Q'
+    )
+    # Combine chart and text
+    final_chart = chart + text
+    # Configure axis to set x-labels to 0-degree angle
+    final_chart = final_chart.configure_axis(
+        labelAngle=0,
+        labelFontSize=12,
+        titleFontSize=14
+    )
+    # Display chart
+    show_chart(final_chart, use_container_width=True)
+
+@st.fragment
+def show_most_sold_products_section(product_sales):
+    """
+    Bar chart of the N best-selling products.
+    Parameters:
+    - product_sales (DataFrame): Quantity sold of each product, best-selling first.
+    """
+    top_n = st.slider("Select Top N Most Sold Products to Display", min_value=1, max_value=len(product_sales),
+                      value=5)
+    # Get the top N most sold products
+    top_sold_products = product_sales.head(top_n)
+    # Altair chart for Most Sold Products
+    chart = alt.Chart(top_sold_products).mark_bar().encode(
+        x=alt.X('Product_Name:O', title='Product Name', sort='-y'),
+        y=alt.Y('Product_Quantity:Q', title='Quantity Sold'),
+        color=alt.Color('Product_Quantity:Q', legend=None),
+        tooltip=['Product_Name:N', 'Product_Quantity:Q']
+    ).properties(
+        width=700,
+        height=400,
+        title="Top N Most Sold Products"
+    )
+    # Adding text labels on the bars
+    text = chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10  # Adjust text position
+    ).encode(
+        text='Product_Quantity:Q'
+    )
+    # Combine chart and text
+    final_chart = chart + text
+    final_chart = final_chart.configure_axis(
+        labelAngle=0,
+        labelFontSize=12,
+        titleFontSize=14
+    )
+    # Display the final chart in Streamlit
+    show_chart(final_chart, use_container_width=True)
+
+@st.fragment
+def show_most_priced_products_section(most_priced):
+    """
+    Bar chart of the N most expensive products.
+    Parameters:
+    - most_priced (DataFrame): Highest Variant_Price of each product, most expensive first.
+    """
+    top_n = st.slider("Select Top N Most Priced Products to Display", min_value=1, max_value=len(most_priced),value=5)
+    top_priced_products = most_priced.head(top_n)
+    # Altair chart for Most Priced Products
+    chart = alt.Chart(top_priced_products).mark_bar().encode(
+        x=alt.X('Product_Title:O', title='Product Title', sort='-y'),
+        y=alt.Y('Variant_Price:Q', title='Price ($)'),
+        color=alt.Color('Variant_Price:Q', legend=None),
+        tooltip=['Product_Title:N', 'Variant_Price:Q']
+    ).properties(
+        width=700,
+        height=400,
+        title="Top N Most Priced Products"
+    )
+    # Adding text labels on the bars
+    text = chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10  # Adjust text position
+    ).encode(
+        text='Variant_Price:Q'
+    )
+    # Combine chart and text
+    final_chart = chart + text
+    final_chart = final_chart.configure_axis(
+        labelAngle=0,
+        labelFontSize=12,
+        titleFontSize=14
+    )
+    show_chart(final_chart, use_container_width=True)
+
+@st.fragment
+def show_least_priced_products_section(Least_priced):
+    """
+    Bar chart of the N least expensive products.
+    Parameters:
+    - Least_priced (DataFrame): Lowest Variant_Price of each product, least expensive first.
+    """
+    top_n = st.slider("Select Top N Products to Display", min_value=1, max_value=len(Least_priced), value=5)
+    top_priced_products = Least_priced.head(top_n)
+    # Altair chart for visualization
+    chart = alt.Chart(top_priced_products).mark_bar().encode(
+        x=alt.X('Product_Title:O', title='Product Title', sort=top_priced_products['Product_Title'].tolist()),  # Custom sort order for X axis
+        y=alt.Y('Variant_Price:Q', title='Price ($)'),
+        color=alt.Color('Variant_Price:Q', legend=None),
+        tooltip=['Product_Title:N', 'Variant_Price:Q']
+    ).properties(
+        width=700,  # Same width for both charts
+        height=400,  # Same height for both charts
+        title="Top N Least Priced Products"
+    )
+    # Adding text labels on the bars
+    text = chart.mark_text(
+        align='center',
+        baseline='middle',
+        dy=-10  # Adjust text position
+    ).encode(
+        text='Variant_Price:Q'
+    )
+    # Combine chart and text
+    final_chart = chart + text
+    final_chart = final_chart.configure_axis(
+        labelAngle=0,
+        labelFontSize=12,
+        titleFontSize=14
+    )
+    # Display chart
+    show_chart(final_chart, use_container_width=True)
 
-def show_products_page():
+@page_datasets(
+    orders=['Order_Created_At', 'Customer_ID', 'Product_ID', 'Product_Name', 'Product_Quantity'],
+    products=['Product_ID', 'Product_Title', 'Product_Type', 'Product_Published_At', 'Product_Created_At',
+              'Variant_Price'],
+)
+def show_products_page(df_orders, df_products, range_start, range_end):
     st.title('Products Data')
     add_custom_css()
+    # Everything below covers the picked date range: products by creation date, sales by order date
+    if df_products.empty or df_orders.empty:
+        st.warning("No products or orders in the selected date range.")
+        return
     #Todo-Average number of products ordered by a customer
     customer_product_counts = df_orders.groupby('Customer_ID')['Product_ID'].nunique().reset_index()
     average_products_per_customer = customer_product_counts['Product_ID'].mean()
@@ -1816,192 +2886,54 @@ def show_products_page():
             unsafe_allow_html=True
         )
     st.title("Preview Filtered Product Data")
-    filtered_products = filter_by_date(df_products, 'Product_Created_At')
     # with st.expander("Preview Filtered Products Data"):
-    st.dataframe(filtered_products,use_container_width=True)
-
-    #Todo-Count of products in each type----------------------------------------
-    col1,col2=st.columns(2)
-    with col1:
-        df_products_ = df_products.dropna(subset=['Product_Published_At'])
-        df_products_['Product_Type'] = df_products_['Product_Type'].replace("", "No Type")
-        # Grouping by Product_Type and counting unique Product_ID
-        product_counts = df_products_.groupby('Product_Type')['Product_ID'].nunique().reset_index()
-        product_counts.columns = ['Product_Type', 'Count']
-        # Streamlit layout
-        st.title("Product Count by Type")
-        st.markdown("### Visualizing the count of unique products in each type")
-        # Slider for limiting top N product types
-        top_n = st.slider("Select Top N Product Types to Display", min_value=1, max_value=len(product_counts), value=5)
-        # Filtering for top N product types
-        top_product_counts = product_counts.nlargest(top_n, 'Count')
-        # Altair chart
-        chart = alt.Chart(top_product_counts).mark_bar().encode(
-            x=alt.X('Product_Type:O', title='Product Type', sort='-y'),
-            y=alt.Y('Count:Q', title='Number of Products'),
-            color=alt.Color('Count:Q', legend=None),
-            tooltip=['Product_Type:N', 'Count:Q']
-        ).properties(
-            width=700,
-            height=400,
-            title="Top N Product Types by Count"
-        )
-        # Adding text labels on the bars
-        text = chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10  # Adjust text position
-        ).encode(
-            text='Count:Q'
-        )
-        # Combine chart and text
-        final_chart = chart + text
-        # Configure axis to set x-labels to 0-degree angle
-        final_chart = final_chart.configure_axis(
-            labelAngle=0,
-            labelFontSize=12,
-            titleFontSize=14
-        )
-        # Display chart
-        st.altair_chart(final_chart, use_container_width=True)
+    show_preview_section(df_products, "products_preview", use_container_width=True)
+
+    #Todo-Count of products in each type----------------------------------------
+    col1,col2=st.columns(2)
+    with col1:
+        product_counts, _ = get_ranking('product_types', df_products, range_start, range_end)
+        # Streamlit layout
+        st.title("Product Count by Type")
+        st.markdown("### Visualizing the count of unique products in each type")
+        # Slider for limiting top N product types
+        show_product_types_section(product_counts)
     with col2:
         # Todo- Most Sold Product----------------------------------------------
-        product_sales = df_orders.groupby('Product_Name')['Product_Quantity'].sum().reset_index()
-        # Sort by total quantity sold in descending order
-        product_sales = product_sales.sort_values(by='Product_Quantity', ascending=False)
+        # Products by total quantity sold in descending order
+        product_sales, _ = get_ranking('product_sales', df_orders, range_start, range_end)
         # Streamlit title and description
         st.title("Most Sold Products")
         st.markdown("### Displaying the most sold products by quantity")
         # Slider to display top N most sold products
-        top_n = st.slider("Select Top N Most Sold Products to Display", min_value=1, max_value=len(product_sales),
-                          value=5)
-        # Get the top N most sold products
-        top_sold_products = product_sales.head(top_n)
-        # Altair chart for Most Sold Products
-        chart = alt.Chart(top_sold_products).mark_bar().encode(
-            x=alt.X('Product_Name:O', title='Product Name', sort='-y'),
-            y=alt.Y('Product_Quantity:Q', title='Quantity Sold'),
-            color=alt.Color('Product_Quantity:Q', legend=None),
-            tooltip=['Product_Name:N', 'Product_Quantity:Q']
-        ).properties(
-            width=700,
-            height=400,
-            title="Top N Most Sold Products"
-        )
-        # Adding text labels on the bars
-        text = chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10  # Adjust text position
-        ).encode(
-            text='Product_Quantity:Q'
-        )
-        # Combine chart and text
-        final_chart = chart + text
-        final_chart = final_chart.configure_axis(
-            labelAngle=0,
-            labelFontSize=12,
-            titleFontSize=14
-        )
-        # Display the final chart in Streamlit
-        st.altair_chart(final_chart, use_container_width=True)
+        show_most_sold_products_section(product_sales)
 
     #Todo-Most Price Product
     col1, col2 = st.columns(2)
     # Most Priced Products
     with col1:
-        df_products_ = df_products.dropna(subset=['Product_Published_At'])
-        most_priced = (
-            df_products_.groupby(["Product_ID", "Product_Title"])
-            .agg({"Variant_Price": "max"})
-            .reset_index()
-            .sort_values(by="Variant_Price", ascending=False)
-        )
+        most_priced, _ = get_ranking('product_max_prices', df_products, range_start, range_end)
         # Streamlit layout for Most Priced Products
         st.title("Most Priced Products")
         st.markdown("### Displaying the most expensive products by price")
         # Slider to display top N most priced products
-        top_n = st.slider("Select Top N Most Priced Products to Display", min_value=1, max_value=len(most_priced),value=5)
-        top_priced_products = most_priced.head(top_n)
-        # Altair chart for Most Priced Products
-        chart = alt.Chart(top_priced_products).mark_bar().encode(
-            x=alt.X('Product_Title:O', title='Product Title', sort='-y'),
-            y=alt.Y('Variant_Price:Q', title='Price ($)'),
-            color=alt.Color('Variant_Price:Q', legend=None),
-            tooltip=['Product_Title:N', 'Variant_Price:Q']
-        ).properties(
-            width=700,
-            height=400,
-            title="Top N Most Priced Products"
-        )
-        # Adding text labels on the bars
-        text = chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10  # Adjust text position
-        ).encode(
-            text='Variant_Price:Q'
-        )
-        # Combine chart and text
-        final_chart = chart + text
-        final_chart = final_chart.configure_axis(
-            labelAngle=0,
-            labelFontSize=12,
-            titleFontSize=14
-        )
-        st.altair_chart(final_chart, use_container_width=True)
+        show_most_priced_products_section(most_priced)
     # Least Priced Products
     with col2:
-        df_products_ = df_products.dropna(subset=['Product_Published_At'])
-        # Least priced products
-        Least_priced = (
-            df_products_.groupby(["Product_ID", "Product_Title"])
-            .agg({"Variant_Price": "min"})
-            .reset_index()
-        )
-        # Correct sorting of Variant_Price
-        price_order = Least_priced.sort_values(by="Variant_Price", ascending=True)["Product_Title"].tolist()
+        # Least priced products, least expensive first
+        _, Least_priced = get_ranking('product_min_prices', df_products, range_start, range_end)
         # Streamlit layout
         st.title("Least Priced Products")
         st.markdown("### Displaying the Least expensive products by price")
         # Slider to display top N Least priced products
-        top_n = st.slider("Select Top N Products to Display", min_value=1, max_value=len(Least_priced), value=5)
-        top_priced_products = Least_priced.head(top_n)
-        # Altair chart for visualization
-        chart = alt.Chart(top_priced_products).mark_bar().encode(
-            x=alt.X('Product_Title:O', title='Product Title', sort=price_order),  # Custom sort order for X axis
-            y=alt.Y('Variant_Price:Q', title='Price ($)'),
-            color=alt.Color('Variant_Price:Q', legend=None),
-            tooltip=['Product_Title:N', 'Variant_Price:Q']
-        ).properties(
-            width=700,  # Same width for both charts
-            height=400,  # Same height for both charts
-            title="Top N Least Priced Products"
-        )
-        # Adding text labels on the bars
-        text = chart.mark_text(
-            align='center',
-            baseline='middle',
-            dy=-10  # Adjust text position
-        ).encode(
-            text='Variant_Price:Q'
-        )
-        # Combine chart and text
-        final_chart = chart + text
-        final_chart = final_chart.configure_axis(
-            labelAngle=0,
-            labelFontSize=12,
-            titleFontSize=14
-        )
-        # Display chart
-        st.altair_chart(final_chart, use_container_width=True)
+        show_least_priced_products_section(Least_priced)
     #Todo- List for unsold product----------------------------------
     df_products_cleaned = df_products.dropna(subset=['Product_Published_At'])
     sold_product_ids = df_orders['Product_ID'].unique()
     all_product_ids = df_products_cleaned['Product_ID']
     unsold_product_ids = all_product_ids[~all_product_ids.isin(sold_product_ids)]
     unsold_products = df_products_cleaned[df_products_cleaned['Product_ID'].isin(unsold_product_ids)]
-    unsold_products_grouped = unsold_products.groupby(['Product_ID', 'Product_Title', 'Product_Published_At'],as_index=False).first()
+    unsold_products_grouped = unsold_products.groupby(['Product_ID', 'Product_Title', 'Product_Published_At'],as_index=False, observed=True).first()
     unsold_products_grouped['Product_ID'] = unsold_products_grouped['Product_ID'].astype(str).replace(",", "",regex=True)
     unsold_products_grouped['Product_Published_At'] = \
     unsold_products_grouped['Product_Published_At'].str.split("T").str[0]
@@ -2081,17 +3013,160 @@ def show_products_page():
         titleFontSize=14
     )
     # Display chart
-    st.altair_chart(final_chart, use_container_width=True)
+    show_chart(final_chart, use_container_width=True)
+
+@st.fragment
+def show_revenue_section(daily_revenue):
+    """
+    Revenue per day, month, quarter or year, as picked in the radio.
+    Parameters:
+    - daily_revenue (Series): Revenue per day with orders, indexed by day.
+    """
+    view = st.radio("Select View", ['Revenue per Day', 'Revenue per Month', 'Revenue per Quarter', 'Revenue per Year'])
+    # Only the selected view is rolled up from the daily revenue
+    if view == 'Revenue per Day':
+        revenue_per_day = daily_chart_rows(daily_revenue, 'Order_Total_Price')
+        st.title('Revenue Placed: Days')
+        st.markdown("<h3 style='text-align: center;'>Revenue by Day</h3>", unsafe_allow_html=True)
+        # The line and the points are layers of one chart, drawn from a single copy of the rows
+        base = alt.Chart(revenue_per_day)
+        # Define the line chart-------------
+        line_chart = base.mark_line().encode(
+            x=alt.X(
+                'day:T',
+                title='Date',
+                axis=alt.Axis(format="%b %d, %Y", labelAngle=-90, tickMinStep=1)  # Adjust axis labels
+            ),
+            y=alt.Y('Order_Total_Price:Q', title='Total Revenue (€)'),
+            tooltip=['day:T', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
+        )
+        # Define the points for emphasis--------
+        points = base.mark_point(size=60, color='blue').encode(
+            x='day:T',
+            y='Order_Total_Price:Q',
+            tooltip=['day:T', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
+        )
+        # Combine the line chart and points
+        combined_chart = line_chart + points
+        # Set chart properties
+        combined_chart = combined_chart.properties(
+            width=700,  # Adjust width for better readability
+            height=400  # Adjust height
+        )
+        # Display the chart in Streamlit
+        show_chart(combined_chart, use_container_width=True)
+    elif view == 'Revenue per Month':
+        revenue_per_month = rollup_daily_metric(daily_revenue, 'month').reset_index(name='Order_Total_Price')
+        st.title('Revenue Placed: Months')
+        st.markdown("<h3 style='text-align: center;'>Revenue by Month</h3>", unsafe_allow_html=True)
+        revenue_per_month['month'] = revenue_per_month['month'].dt.strftime('%b %Y')  # Convert to Month Year format
+        line_chart = alt.Chart(revenue_per_month).mark_line().encode(
+            x=alt.X('month:O', title='Month', axis=alt.Axis(labelAngle=-45)),
+            y=alt.Y('Order_Total_Price:Q', title='Total Revenue (€)'),
+            tooltip=['month:N', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
+        )
+        points = alt.Chart(revenue_per_month).mark_point(size=60, color='blue').encode(
+            x='month:O',
+            y='Order_Total_Price:Q',
+            tooltip=['month:N', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+
+    elif view == 'Revenue per Quarter':
+        revenue_per_quarter = rollup_daily_metric(daily_revenue, 'quarter').reset_index(name='Order_Total_Price')
+        st.title('Revenue Placed: Quarters')
+        st.markdown("<h3 style='text-align: center;'>Revenue by Quarter</h3>", unsafe_allow_html=True)
+        line_chart = alt.Chart(revenue_per_quarter).mark_line().encode(
+            x=alt.X('quarter:N', title='Quarter'),
+            y=alt.Y('Order_Total_Price:Q', title='Total Revenue (€)'),
+            tooltip=['quarter:N', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
+        )
+        points = alt.Chart(revenue_per_quarter).mark_point(size=60, color='blue').encode(
+            x='quarter:N',
+            y='Order_Total_Price:Q',
+            tooltip=['quarter:N', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+
+    elif view == 'Revenue per Year':
+        revenue_per_year = rollup_daily_metric(daily_revenue, 'year').reset_index(name='Order_Total_Price')
+        st.title('Revenue Placed: Years')
+        st.markdown("<h3 style='text-align: center;'>Revenue by Year</h3>", unsafe_allow_html=True)
+        line_chart = alt.Chart(revenue_per_year).mark_line().encode(
+            x=alt.X('year:O', title='Year'),
+            y=alt.Y('Order_Total_Price:Q', title='Total Revenue (€)'),
+            tooltip=['year:O', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
+        )
+        points = alt.Chart(revenue_per_year).mark_point(size=60, color='blue').encode(
+            x='year:O',
+            y='Order_Total_Price:Q',
+            tooltip=['year:O', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
+        )
+        combined_chart = line_chart + points
+        show_chart(combined_chart, use_container_width=True)
+
+@st.fragment
+def show_revenue_sites_section(total_revenue_by_site):
+    """
+    Bar chart of the top N referring sites by revenue.
+    Parameters:
+    - total_revenue_by_site (DataFrame): Total Revenue of each Referring Site, highest first.
+    """
+    top_n = st.slider("Select Top N Referring Sites to Display", min_value=1, max_value=len(total_revenue_by_site),value=5)
+    # Filtering for top N referring sites
+    top_revenue_sites = total_revenue_by_site.head(top_n)
+    # Step 4: Create Altair Chart
+    chart = alt.Chart(top_revenue_sites).mark_bar().encode(
+        x=alt.X("Referring Site:O", title="Referring Site", sort="-y"),
+        y=alt.Y("Total Revenue:Q", title="Total Revenue (€)"),
+        color=alt.Color("Total Revenue:Q", legend=None),
+        tooltip=["Referring Site:N", alt.Tooltip("Total Revenue:Q", format=",.2f", title="Total Revenue (€)")],
+    ).properties(
+        width=700,
+        height=400,
+        title="Top N Referring Sites by Total Revenue"
+    )
+    # Adding text labels on the bars
+    text = chart.mark_text(
+        align="center",
+        baseline="middle",
+        dy=-10  # Adjust text position
+    ).encode(
+        text=alt.Text("Total Revenue:Q", format=",.2f")
+    )
+    # Combine chart and text
+    final_chart = chart + text
+    # Configure axis and chart aesthetics
+    final_chart = final_chart.configure_axis(
+        labelAngle=0,
+        labelFontSize=12,
+        titleFontSize=14
+    )
+    # Display the chart
+    show_chart(final_chart, use_container_width=True)
 
-def show_revenue_page():
+@page_datasets(
+    orders=['Order_ID', 'Order_Created_At', 'Order_Total_Price', 'Order_Refund_Amount', 'Order_Referring_Site'],
+)
+def show_revenue_page(df_orders, range_start, range_end):
     st.title('Revenue Data')
     add_custom_css()
-    df_unique_orders = df_orders.drop_duplicates(subset='Order_ID', keep='first')
-    Total_price = df_unique_orders['Order_Total_Price'].sum()
+    # Everything below covers the picked date range: order rows by order date,
+    # and revenue and refund totals are summed from the daily buckets
+    daily_orders = get_daily_buckets('orders', range_start, range_end)
+    if df_orders.empty:
+        st.warning("No orders in the selected date range.")
+        return
+    daily_revenue = get_daily_metric('revenue', range_start, range_end)
+    # Revenue per day of the week and hour of the day, the weekday/weekend, day and hour charts sum them
+    calendar_revenue = get_calendar_totals('orders', range_start, range_end)['Revenue']
+    Total_price = daily_orders['Revenue'].sum()
     Total_price=round(Total_price,2)
-    Average_Revenue_=df_unique_orders['Order_Total_Price'].mean()
+    Average_Revenue_=Total_price / daily_orders['Priced_Orders'].sum()
     Average_Revenue=round(Average_Revenue_,2)
-    Total_amaount_refund=df_unique_orders['Order_Refund_Amount'].sum()
+    Total_amaount_refund=daily_orders['Refunds'].sum()
 
     col1, col2,col3= st.columns(3)
     with col1:
@@ -2129,24 +3204,15 @@ def show_revenue_page():
         )
 
     st.title("Preview Filtered Revenue Data")
-    filtered_products = filter_by_date(df_orders, 'Order_Created_At')
     # with st.expander("Preview Filtered Revenue Data"):
-    st.dataframe(filtered_products)
+    show_preview_section(df_orders, "revenue_preview")
 
     #Todo-Total revenue placed: weekday vs weekend-----------------------
-    df_unique_orders = df_orders.drop_duplicates(subset='Order_ID', keep='first')
-    # Ensure the 'Order_Created_At' column is in datetime format
-    df_unique_orders['Order_Created_At'] = pd.to_datetime(df_unique_orders['Order_Created_At'], errors='coerce', utc=True)
-    # Add a new column for Weekday/Weekend
-    df_unique_orders['Weekday_Weekend'] = df_unique_orders['Order_Created_At'].dt.dayofweek.apply(
-        lambda x: 'Weekend' if x >= 5 else 'Weekday'
-    )
     # Calculate total revenue for weekdays and weekends
-    weekday_revenue = df_unique_orders[df_unique_orders['Weekday_Weekend'] == 'Weekday']['Order_Total_Price'].sum()
-    weekend_revenue = df_unique_orders[df_unique_orders['Weekday_Weekend'] == 'Weekend']['Order_Total_Price'].sum()
+    weekday_revenue, weekend_revenue = totals_by_day_type(calendar_revenue)
     # Prepare data for the pie chart
     revenues = [weekday_revenue, weekend_revenue]
-    labels = ['Weekday', 'Weekend']
+    labels = DAY_TYPES
     pie_data_revenue = pd.DataFrame({
         'Category': labels,
         'Revenue': revenues,
@@ -2166,24 +3232,11 @@ def show_revenue_page():
     st.write(f"Weekend Revenue: €{weekend_revenue:.2f} ({(weekend_revenue / sum(revenues)) * 100:.2f}%)")
     st.title('Total Revenue Placed: Weekday vs Weekend')
     st.markdown("<h3 style='text-align: center;'>Revenue by Weekday/Weekend</h3>", unsafe_allow_html=True)
-    st.altair_chart(pie_chart_revenue, use_container_width=True)
+    show_chart(pie_chart_revenue, use_container_width=True)
 
     # Todo-Total revenue placed: days of week--------------------------
-    # Ensure unique orders by dropping duplicates
-    df_unique_orders = df_orders.drop_duplicates(subset='Order_ID', keep='first')
-    # Ensure the 'Order_Created_At' column is in datetime format
-    df_unique_orders['Order_Created_At'] = pd.to_datetime(df_unique_orders['Order_Created_At'], errors='coerce',
-                                                          utc=True)
-    # Add a new column for Days of the Week
-    df_unique_orders['days_of_week'] = df_unique_orders['Order_Created_At'].dt.dayofweek.apply(
-        lambda x: ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'][x]
-    )
     # Calculate total revenue for each day of the week
-    revenue_per_day = df_unique_orders.groupby('days_of_week')['Order_Total_Price'].sum()
-    # Reorder the days of the week
-    revenue_per_day = revenue_per_day.reindex(
-        ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'], fill_value=0
-    )
+    revenue_per_day = totals_by_day_of_week(calendar_revenue)
     # Prepare data for pie chart
     pie_data_revenue = pd.DataFrame({
         'Day': revenue_per_day.index,
@@ -2195,24 +3248,18 @@ def show_revenue_page():
     pie_chart_revenue = alt.Chart(pie_data_revenue).mark_arc().encode(
         theta=alt.Theta(field="Revenue", type="quantitative"),
         color=alt.Color(field="Day", type="nominal",
-                        sort=['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']),
+                        sort=DAYS_OF_WEEK),
         tooltip=["Day:N", "Total_Revenue:N"]
     )
     # Display the results in Streamlit
     st.title('Total Revenue Placed: Days of the Week')
     st.markdown("<h3 style='text-align: center;'>Revenue by Day of the Week</h3>", unsafe_allow_html=True)
-    st.altair_chart(pie_chart_revenue, use_container_width=True)
+    show_chart(pie_chart_revenue, use_container_width=True)
 
     #Todo---Total revenue placed: hours of day-------------------------------
-    df_unique_orders = df_orders.drop_duplicates(subset='Order_ID', keep='first')
-    # Ensure the 'Order_Created_At' column is in datetime format
-    df_unique_orders['Order_Created_At'] = pd.to_datetime(df_unique_orders['Order_Created_At'], errors='coerce',utc=True)
-    # Add a new column for Hour of the Day
-    df_unique_orders['hour_of_day'] = df_unique_orders['Order_Created_At'].dt.hour + 1  # Shift hours to 1-24 range
     # Calculate total revenue for each hour of the day
-    revenue_per_hour = df_unique_orders.groupby('hour_of_day')['Order_Total_Price'].sum()
-    # Reindex to ensure all hours from 1 to 24 are included
-    revenue_per_hour = revenue_per_hour.reindex(range(1, 25), fill_value=0)
+    revenue_per_hour = totals_by_hour(calendar_revenue)
+    revenue_per_hour.index = revenue_per_hour.index + 1  # Shift hours to 1-24 range
     # Prepare data for the chart
     hour_revenue_data = pd.DataFrame({
         'Hour of Day': revenue_per_hour.index,
@@ -2241,167 +3288,40 @@ def show_revenue_page():
     )
     # Combine the line chart and points
     combined_chart = line_chart + points
-    st.altair_chart(combined_chart, use_container_width=True)
+    show_chart(combined_chart, use_container_width=True)
 
     #Todo-Total revenue placed: day, month, quarter, year----------------------------
-    df_unique_orders = df_orders.drop_duplicates(subset='Order_ID', keep='first')
-    # Ensure the 'Order_Created_At' column is in datetime format
-    df_unique_orders['Order_Created_At'] = pd.to_datetime(df_unique_orders['Order_Created_At'], errors='coerce',
-                                                          utc=True)
-    # Extract the day, month, quarter, and year
-    df_unique_orders['day'] = df_unique_orders['Order_Created_At'].dt.date
-    df_unique_orders['month'] = df_unique_orders['Order_Created_At'].dt.to_period('M').astype(str)  # Year-Month format
-    df_unique_orders['quarter'] = df_unique_orders['Order_Created_At'].dt.to_period('Q').astype(
-        str)  # Year-Quarter format
-    df_unique_orders['year'] = df_unique_orders['Order_Created_At'].dt.year
-    # Group by day, month, quarter, and year to calculate total revenue
-    revenue_per_day = df_unique_orders.groupby('day')['Order_Total_Price'].sum().reset_index()
-    revenue_per_month = df_unique_orders.groupby('month')['Order_Total_Price'].sum().reset_index()
-    revenue_per_quarter = df_unique_orders.groupby('quarter')['Order_Total_Price'].sum().reset_index()
-    revenue_per_year = df_unique_orders.groupby('year')['Order_Total_Price'].sum().reset_index()
     # Streamlit Visualization---
     st.title('Revenue Visualizations')
-    view = st.radio("Select View", ['Revenue per Day', 'Revenue per Month', 'Revenue per Quarter', 'Revenue per Year'])
-    if view == 'Revenue per Day':
-        st.title('Revenue Placed: Days')
-        st.markdown("<h3 style='text-align: center;'>Revenue by Day</h3>", unsafe_allow_html=True)
-        # Define the line chart-------------
-        line_chart = alt.Chart(revenue_per_day).mark_line().encode(
-            x=alt.X(
-                'day:T',
-                title='Date',
-                axis=alt.Axis(format="%b %d, %Y", labelAngle=-90, tickMinStep=1)  # Adjust axis labels
-            ),
-            y=alt.Y('Order_Total_Price:Q', title='Total Revenue (€)'),
-            tooltip=['day:T', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
-        )
-        # Define the points for emphasis--------
-        points = alt.Chart(revenue_per_day).mark_point(size=60, color='blue').encode(
-            x='day:T',
-            y='Order_Total_Price:Q',
-            tooltip=['day:T', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
-        )
-        # Combine the line chart and points
-        combined_chart = line_chart + points
-        # Set chart properties
-        combined_chart = combined_chart.properties(
-            width=700,  # Adjust width for better readability
-            height=400  # Adjust height
-        )
-        # Display the chart in Streamlit
-        st.altair_chart(combined_chart, use_container_width=True)
-    elif view == 'Revenue per Month':
-        st.title('Revenue Placed: Months')
-        st.markdown("<h3 style='text-align: center;'>Revenue by Month</h3>", unsafe_allow_html=True)
-        revenue_per_month['month'] = pd.to_datetime(revenue_per_month['month'], format='%Y-%m')
-        revenue_per_month['month'] = revenue_per_month['month'].dt.strftime('%b %Y')  # Convert to Month Year format
-        line_chart = alt.Chart(revenue_per_month).mark_line().encode(
-            x=alt.X('month:O', title='Month', axis=alt.Axis(labelAngle=-45)),
-            y=alt.Y('Order_Total_Price:Q', title='Total Revenue (€)'),
-            tooltip=['month:N', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
-        )
-        points = alt.Chart(revenue_per_month).mark_point(size=60, color='blue').encode(
-            x='month:O',
-            y='Order_Total_Price:Q',
-            tooltip=['month:N', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
-        )
-        combined_chart = line_chart + points
-        st.altair_chart(combined_chart, use_container_width=True)
-
-    elif view == 'Revenue per Quarter':
-        st.title('Revenue Placed: Quarters')
-        st.markdown("<h3 style='text-align: center;'>Revenue by Quarter</h3>", unsafe_allow_html=True)
-        line_chart = alt.Chart(revenue_per_quarter).mark_line().encode(
-            x=alt.X('quarter:N', title='Quarter'),
-            y=alt.Y('Order_Total_Price:Q', title='Total Revenue (€)'),
-            tooltip=['quarter:N', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
-        )
-        points = alt.Chart(revenue_per_quarter).mark_point(size=60, color='blue').encode(
-            x='quarter:N',
-            y='Order_Total_Price:Q',
-            tooltip=['quarter:N', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
-        )
-        combined_chart = line_chart + points
-        st.altair_chart(combined_chart, use_container_width=True)
-
-    elif view == 'Revenue per Year':
-        st.title('Revenue Placed: Years')
-        st.markdown("<h3 style='text-align: center;'>Revenue by Year</h3>", unsafe_allow_html=True)
-        line_chart = alt.Chart(revenue_per_year).mark_line().encode(
-            x=alt.X('year:O', title='Year'),
-            y=alt.Y('Order_Total_Price:Q', title='Total Revenue (€)'),
-            tooltip=['year:O', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
-        )
-        points = alt.Chart(revenue_per_year).mark_point(size=60, color='blue').encode(
-            x='year:O',
-            y='Order_Total_Price:Q',
-            tooltip=['year:O', alt.Tooltip('Order_Total_Price:Q', format=",.2f", title="Total Revenue (€)")]
-        )
-        combined_chart = line_chart + points
-        st.altair_chart(combined_chart, use_container_width=True)
+    show_revenue_section(daily_revenue)
 
     #Todo-Order Refering site chart
-    df_unique_orders = df_orders.drop_duplicates(subset="Order_ID", keep="first")
-    # Step 2: Calculate total revenue by referring sites
-    total_revenue_by_site = df_unique_orders.groupby("Order_Referring_Site")["Order_Total_Price"].sum().reset_index()
-    total_revenue_by_site.columns = ["Referring Site", "Total Revenue"]
+    # Step 2: Rank the referring sites by total revenue
+    total_revenue_by_site, _ = get_ranking('revenue_sites', get_order_headers(range_start, range_end),
+                                           range_start, range_end)
     # Step 3: Streamlit layout
     st.title("Total Revenue by Referring Sites")
     st.markdown("### Visualizing the total revenue generated by different referring sites")
     # Slider for selecting top N referring sites
-    top_n = st.slider("Select Top N Referring Sites to Display", min_value=1, max_value=len(total_revenue_by_site),value=5)
-    # Filtering for top N referring sites
-    top_revenue_sites = total_revenue_by_site.nlargest(top_n, "Total Revenue")
-    # Step 4: Create Altair Chart
-    chart = alt.Chart(top_revenue_sites).mark_bar().encode(
-        x=alt.X("Referring Site:O", title="Referring Site", sort="-y"),
-        y=alt.Y("Total Revenue:Q", title="Total Revenue (€)"),
-        color=alt.Color("Total Revenue:Q", legend=None),
-        tooltip=["Referring Site:N", alt.Tooltip("Total Revenue:Q", format=",.2f", title="Total Revenue (€)")],
-    ).properties(
-        width=700,
-        height=400,
-        title="Top N Referring Sites by Total Revenue"
-    )
-    # Adding text labels on the bars
-    text = chart.mark_text(
-        align="center",
-        baseline="middle",
-        dy=-10  # Adjust text position
-    ).encode(
-        text=alt.Text("Total Revenue:Q", format=",.2f")
-    )
-    # Combine chart and text
-    final_chart = chart + text
-    # Configure axis and chart aesthetics
-    final_chart = final_chart.configure_axis(
-        labelAngle=0,
-        labelFontSize=12,
-        titleFontSize=14
-    )
-    # Display the chart
-    st.altair_chart(final_chart, use_container_width=True)
-
-image_path = "D:\\Vinita\\Dyori_Image\\dyori_img.jpg"
-image = Image.open(image_path)
-image_resized = image.resize((300, 100))
-st.sidebar.image(image_resized)
-
-page = st.sidebar.selectbox("Select a Page", ['Customer Journey', 'Customer Data', 'Order Data', 'Abandoned Checkouts', 'Products','Revenue'])
-
-if page == 'Customer Journey':
-    show_cj_page()
-
-elif page == 'Customer Data':
-    show_customer_data_page()
-
-elif page == 'Order Data':
-    show_order_data_page()
-
-elif page == 'Abandoned Checkouts':
-    show_abandoned_checkouts_page()
+    show_revenue_sites_section(total_revenue_by_site)
+
+# Spawned ingest workers import this script as __mp_main__: only a script run renders the page
+if __name__ == '__main__':
+    image_path = "D:\\Vinita\\Dyori_Image\\dyori_img.jpg"
+    image = Image.open(image_path)
+    image_resized = image.resize((300, 100))
+    st.sidebar.image(image_resized)
+
+    # Sidebar page title -> page function; the first page is the default one
+    PAGES = {
+        'Customer Journey': show_cj_page,
+        'Customer Data': show_customer_data_page,
+        'Order Data': show_order_data_page,
+        'Abandoned Checkouts': show_abandoned_checkouts_page,
+        'Products': show_products_page,
+        'Revenue': show_revenue_page,
+    }
 
-elif page == 'Products':
-    show_products_page()
-elif page== 'Revenue':
-    show_revenue_page()
+    page = st.sidebar.selectbox("Select a Page", list(PAGES))
+    show_page = PAGES[page]
+    show_page(**load_page_datasets(show_page))
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+# Calendar labels of the dashboard, in display order. Totals are keyed by the integer day of the week of whole
+# arrays of dates and labelled once per total, never computed one date at a time.
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_TYPES = ['Weekday', 'Weekend']
+
+
+def weekday_numbers(dates):
+    """
+    Returns the day of the week of each date, Monday = 0, and -1 for missing dates.
+    Parameters:
+    - dates (DatetimeIndex or Series): Dates, naive or timezone-aware.
+    """
+    dates = pd.DatetimeIndex(dates)
+    return np.where(dates.isna(), -1, dates.dayofweek).astype(np.int8)
+
+
+def weekday_hour_totals(dates, hours, values):
+    """
+    Sums columns of values per day of the week and hour of the day, in one pass over the rows: each row is
+    keyed by weekday * 24 + hour once, and each column is summed over the keys with a single bincount.
+    Returns a dict column -> array of shape (7, 24), rows ordered like DAYS_OF_WEEK and columns by hour,
+    0 where no row falls. Integer columns keep integer totals.
+    Parameters:
+    - dates (DatetimeIndex or Series): Dates of the rows, without missing dates.
+    - hours (array): Hour of the day of each row, 0 to 23.
+    - values (DataFrame): Numeric columns to sum, one row per date.
+    """
+    keys = weekday_numbers(dates).astype(np.int64) * 24 + np.asarray(hours, dtype=np.int64)
+    totals = {}
+    for column in values.columns:
+        column_values = values[column].to_numpy()
+        sums = np.bincount(keys, weights=column_values, minlength=7 * 24).reshape(7, 24)
+        if np.issubdtype(column_values.dtype, np.integer):
+            sums = np.rint(sums).astype(np.int64)
+        totals[column] = sums
+    return totals
+
+
+def totals_by_day_type(totals):
+    """
+    Returns weekday-by-hour totals summed per day type, as a Series indexed by DAY_TYPES.
+    """
+    return pd.Series([totals[:5].sum(), totals[5:].sum()], index=DAY_TYPES)
+
+
+def totals_by_day_of_week(totals):
+    """
+    Returns weekday-by-hour totals summed per day of the week, as a Series indexed by DAYS_OF_WEEK.
+    """
+    return pd.Series(totals.sum(axis=1), index=DAYS_OF_WEEK)
+
+
+def totals_by_hour(totals):
+    """
+    Returns weekday-by-hour totals summed per hour of the day, as a Series indexed by the hours 0 to 23.
+    """
+    return pd.Series(totals.sum(axis=0), index=range(24))
+
+
+def format_duration(seconds):
+    """
+    Formats durations in seconds as '<hours> hr <minutes> mini'.
+    Parameters:
+    - seconds (float or Series): One duration, or a column of durations formatted at once into a column of labels.
+    """
+    if not isinstance(seconds, pd.Series):
+        return f"{int(seconds // 3600)} hr {int((seconds % 3600) // 60)} mini"
+    hours = (seconds // 3600).astype(np.int64).astype(str)
+    minutes = ((seconds % 3600) // 60).astype(np.int64).astype(str)
+    return hours + ' hr ' + minutes + ' mini'
@@ -0,0 +1,578 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import uuid
+import warnings
+
+import pandas as pd
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+# Columnar copies of the CSV exports live in this folder, next to each source file
+CACHE_DIR_NAME = '.columnar_cache'
+# Bump whenever the parsing rules or the store layout change so that old stores are ingested again
+CACHE_FORMAT_VERSION = 4
+
+# Declared column types of each dataset, columns that are not listed keep the type inferred by pandas
+# - 'datetime': timestamps, parsed to UTC
+# - 'category': repeated labels and identifiers, stored once and referenced by small integer codes
+# - 'integer' / 'float': numbers downcast to the smallest type that holds them
+# Prices and totals stay float64 so that amounts are displayed without float32 rounding noise
+DATASET_SCHEMAS = {
+    'abandoned_checkouts': {
+        'Order_Created_At': 'datetime',
+        'Order_Updated_At': 'datetime',
+        'Order_Referring_Site': 'category',
+    },
+    'cj': {
+        'Event_Time': 'datetime',
+        'Customer_IP': 'category',
+        'session': 'integer',
+        'Event': 'category',
+        'Time_On_Page': 'float',
+        'Product_Name': 'category',
+        'Collection_Name': 'category',
+        'Search_Term': 'category',
+    },
+    'customers': {
+        'Customer_Created_At': 'datetime',
+        'Customer_Updated_At': 'datetime',
+        'Customer_Province': 'category',
+        'Customer_Country': 'category',
+    },
+    'orders': {
+        'Order_Created_At': 'datetime',
+        'Order_Updated_At': 'datetime',
+        'Customer_Name': 'category',
+        'Order_Referring_Site': 'category',
+        'Product_Name': 'category',
+        'Product_Quantity': 'integer',
+    },
+    'products': {
+        'Product_Created_At': 'datetime',
+        'Variant_Created_At': 'datetime',
+        'Product_Title': 'category',
+        'Product_Type': 'category',
+    },
+}
+
+# Primary timestamp of each dataset; rows are kept sorted by it, missing timestamps last,
+# so that a date range is a contiguous block of rows found by binary search
+DATASET_SORT_COLUMNS = {
+    'abandoned_checkouts': 'Order_Created_At',
+    'cj': 'Event_Time',
+    'customers': 'Customer_Created_At',
+    'orders': 'Order_Created_At',
+    'products': 'Product_Created_At',
+}
+
+# Each dataset is materialized next to its source as a columnar store: Parquet part files that each hold
+# rows of a single UTC calendar month of the dataset's sort column (or the rows without a date), and a
+# manifest listing the parts with the first and last date of their rows. Reading a date range only opens
+# the parts of the months overlapping it.
+STORE_DIR_SUFFIX = '.store'
+# The parts of a month are merged into one file past this many parts
+MAX_MONTH_PARTS = 8
+
+# Datasets whose source only ever grows by rows appended at the end of the file, like the clickstream export.
+# Each refresh parses only the bytes appended since the previous one and adds them to the store as a new batch,
+# instead of parsing the whole file again; the rows are expected to be one line each.
+# The store of any other dataset is ingested again from the start whenever its source changes.
+APPEND_ONLY_DATASETS = {'cj'}
+# Source bytes before the ingested offset that must be unchanged for the store to be extended,
+# a source rewritten rather than appended to is ingested again from the start
+TAIL_CHECK_BYTES = 4096
+
+# Sources are ingested by a pool of worker processes: each changed source is parsed and stored by a worker,
+# so that independent datasets are ingested concurrently
+INGEST_WORKERS = os.cpu_count() or 1
+# Byte ranges of append-only sources larger than this are split at line breaks into chunks of about this size,
+# parsed concurrently by the workers (dates included) and concatenated in source order; their rows are one
+# line each, so any line break ends a row
+PARSE_CHUNK_BYTES = 32 * 1024 * 1024
+
+# Timestamp layouts tried, in order, when sniffing a date column; Shopify exports use the first one
+DATETIME_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%S.%f%z',
+    '%Y-%m-%d %H:%M:%S%z',
+    '%Y-%m-%d %H:%M:%S %z',
+    '%Y-%m-%d %H:%M:%S.%f%z',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+]
+
+
+def source_signature(file_path):
+    """
+    Returns a tuple identifying the current version of a source file.
+    Parameters:
+    - file_path (str): Path of the CSV export.
+    """
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+
+def downcast_numeric_columns(df, schema):
+    """
+    Converts the 'integer' and 'float' columns of a schema to the smallest numeric type holding their values.
+    Integer columns with missing values are stored as float32, which still holds them exactly.
+    """
+    for col, kind in schema.items():
+        if kind not in ('integer', 'float') or col not in df.columns:
+            continue
+        values = pd.to_numeric(df[col], errors='coerce')
+        if kind == 'integer' and values.isna().any():
+            kind = 'float'
+        df[col] = pd.to_numeric(values, downcast=kind)
+    return df
+
+
+def sniff_datetime_format(values, sample_size=1000):
+    """
+    Returns the first layout of DATETIME_FORMATS that parses a sample of the column, or None.
+    pandas parses ISO layouts leniently (a 'T' layout also accepts a space or an offset without a colon), so a
+    layout is only kept when it gives the same timestamps as the generic parser on the sample.
+    Parameters:
+    - values (Series): Raw timestamp strings.
+    - sample_size (int): Number of non-empty values checked.
+    """
+    sample = values.dropna()
+    sample = sample[sample.astype(str).str.len() > 0].head(sample_size)
+    if sample.empty:
+        return None
+    expected = pd.to_datetime(sample, errors='coerce', utc=True)
+    for fmt in DATETIME_FORMATS:
+        try:
+            parsed = pd.to_datetime(sample, format=fmt, errors='raise', utc=True)
+        except (ValueError, TypeError):
+            continue
+        if parsed.equals(expected):
+            return fmt
+    return None
+
+
+def parse_fixed_width_offsets(values, fmt):
+    """
+    Parses timestamps laid out as '<local time>+HH:MM' by splitting off the UTC offset.
+    The local part is parsed with the fast fixed-format path and each distinct offset is converted once.
+    Returns None when the values are not all of that layout, e.g. ' +05:30' or '+0530' offsets.
+    Parameters:
+    - values (Series): Raw timestamp strings.
+    - fmt (str): Detected layout, ending with '%z'.
+    """
+    width = len(pd.Timestamp(2000, 1, 1).strftime(fmt[:-2]))
+    text = values.dropna()
+    if text.empty or not (text.str.len() == width + 6).all():
+        return None
+    local = pd.to_datetime(values.str[:width], format=fmt[:-2], errors='coerce')
+    offset_codes, offsets = pd.factorize(values.str[width:])
+    if not offsets.str.fullmatch(r'[+-]\d{2}:\d{2}').all():
+        return None
+    try:
+        deltas = pd.to_timedelta([f"{o[0]}{o[1:3]}:{o[4:6]}:00" for o in offsets])
+    except ValueError:
+        return None
+    deltas = deltas.take(offset_codes, allow_fill=True, fill_value=pd.NaT)
+    return (local - deltas).dt.tz_localize('UTC').rename(values.name)
+
+
+def parse_datetime_column(values):
+    """
+    Parses a column of timestamps to UTC.
+    The layout is detected once on a sample, the whole column is then parsed with that explicit format.
+    Columns in an unknown layout are parsed one distinct value at a time and mapped back to the rows.
+    Unparseable values become NaT.
+    """
+    if values.dtype != 'object':
+        return pd.to_datetime(values, errors='coerce', utc=True)
+    fmt = sniff_datetime_format(values)
+    if fmt is not None:
+        if fmt.endswith('%z') and '%f' not in fmt:
+            parsed = parse_fixed_width_offsets(values, fmt)
+            if parsed is not None:
+                return parsed
+        return pd.to_datetime(values, format=fmt, errors='coerce', utc=True)
+    codes, uniques = pd.factorize(values)
+    parsed = pd.DatetimeIndex(pd.to_datetime(uniques, errors='coerce', utc=True))
+    return pd.Series(parsed.take(codes, allow_fill=True, fill_value=pd.NaT), index=values.index, name=values.name)
+
+
+def parse_csv(source, schema, names=None, downcast=True):
+    """
+    Parses CSV rows to the declared column types of a dataset.
+    Parameters:
+    - source (str or file): Path or buffer of the CSV.
+    - names (list): Column names of rows without a header line (default: the first line is the header).
+    - downcast (bool): Downcast the numeric columns (default: True). Chunks of a source are downcast once
+      concatenated, so that every chunk gets the types of the whole source.
+    """
+    category_columns = {col: 'category' for col, kind in schema.items() if kind == 'category'}
+    df = pd.read_csv(source, parse_dates=False, dtype=category_columns,  # Don't parse dates initially
+                     header=None if names else 'infer', names=names)
+    date_columns = [col for col, kind in schema.items() if kind == 'datetime']
+    for col in df.columns:
+        if col in date_columns:  # Only convert the specified columns
+            try:
+                df[col] = parse_datetime_column(df[col])
+            except Exception as e:
+                # Raised in the worker process ingesting the source, the column is stored unparsed
+                warnings.warn(f"Error parsing column '{col}': {e}")
+    return downcast_numeric_columns(df, schema) if downcast else df
+
+
+def concat_frames(frames):
+    """
+    Concatenates frames with the same columns, like the parts of a dataset.
+    Categorical columns stay categorical over the union of their categories, sorted like a parse of the whole file.
+    """
+    frames = [frame for frame in frames if frame is not None]
+    combined = pd.concat(frames, ignore_index=True)
+    for col in frames[0].columns:
+        values = [frame[col] for frame in frames]
+        if any(isinstance(value.dtype, pd.CategoricalDtype) for value in values):
+            values = [value if isinstance(value.dtype, pd.CategoricalDtype) else value.astype('category')
+                      for value in values]
+            combined[col] = union_categoricals(values, sort_categories=True)
+    return combined
+
+
+def store_dir(file_path):
+    abs_path = os.path.abspath(file_path)
+    stem = os.path.splitext(os.path.basename(abs_path))[0]
+    return os.path.join(os.path.dirname(abs_path), CACHE_DIR_NAME, stem + STORE_DIR_SUFFIX)
+
+
+def store_key(schema, sort_column):
+    return f"{CACHE_FORMAT_VERSION}|{sorted(schema.items())}|{sort_column}"
+
+
+def tail_digest(source, offset):
+    """
+    Returns the digest of the TAIL_CHECK_BYTES bytes of an open source file before an offset.
+    """
+    start = max(0, offset - TAIL_CHECK_BYTES)
+    source.seek(start)
+    return hashlib.sha1(source.read(offset - start)).hexdigest()
+
+
+def read_manifest(file_path, schema, sort_column=None, append_only=False):
+    """
+    Returns the manifest of the store of a source, or None when there is no store for this schema or it is
+    out of date: the source changed, or for an append-only source, doesn't start with the bytes already ingested.
+    The manifest holds:
+    - store_id: changes whenever the store is ingested again from the start
+    - columns: column names of the source header
+    - signature: size and modification time of the source when it was last ingested
+    - ingested_bytes / row_count: length of the source ingested so far and number of rows parsed from it
+    - tail_digest: digest of the source bytes before ingested_bytes
+    - batch: number of the last batch of rows ingested, batches are numbered from 1
+    - parts: part files, each with its month ('YYYY-MM', None for rows without a date), the first and last
+      date of its rows in nanoseconds since the epoch, and the [batch, rows] it holds, in batch order
+    """
+    path = os.path.join(store_dir(file_path), 'manifest.json')
+    try:
+        with open(path, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+        if manifest['key'] != store_key(schema, sort_column):
+            return None
+        if not append_only:
+            return manifest if manifest['signature'] == list(source_signature(file_path)[1:]) else None
+        ingested = manifest['ingested_bytes']
+        with open(file_path, 'rb') as source:
+            if os.fstat(source.fileno()).st_size < ingested:
+                return None
+            if tail_digest(source, ingested) != manifest['tail_digest']:
+                return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return manifest
+
+
+def complete_lines_end(file_path, offset):
+    """
+    Returns the offset after the complete lines of a source from a byte offset, or the offset when there are none.
+    A last line that is still being written, without its line break, is left for the next refresh.
+    """
+    with open(file_path, 'rb') as source:
+        end = source.seek(0, os.SEEK_END)
+        while end > offset:
+            start = max(offset, end - TAIL_CHECK_BYTES)
+            source.seek(start)
+            line_break = source.read(end - start).rfind(b'\n')
+            if line_break >= 0:
+                return start + line_break + 1
+            end = start
+    return offset
+
+
+def read_header(file_path):
+    """
+    Returns the column names of a source and the offset after its header line.
+    """
+    with open(file_path, 'rb') as source:
+        line = source.readline()
+    return list(pd.read_csv(io.BytesIO(line), nrows=0).columns), len(line)
+
+
+def chunk_ranges(file_path, start, end, chunk_bytes):
+    """
+    Splits the complete lines of a source between two byte offsets into ranges of about chunk_bytes
+    ending at line breaks.
+    """
+    bounds = [start]
+    with open(file_path, 'rb') as source:
+        while bounds[-1] + chunk_bytes < end:
+            source.seek(bounds[-1] + chunk_bytes)
+            source.readline()
+            if source.tell() >= end:
+                break
+            bounds.append(source.tell())
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_byte_range(file_path, schema, start, end, names=None, downcast=True):
+    """
+    Parses the CSV rows of a byte range of a source, see parse_csv.
+    """
+    with open(file_path, 'rb') as source:
+        source.seek(start)
+        data = source.read(end - start)
+    return parse_csv(io.BytesIO(data), schema, names, downcast)
+
+
+def parse_source(file_path, schema, start, end, names=None, executor=None):
+    """
+    Parses the rows of the complete lines of a source between two byte offsets.
+    Parameters:
+    - names (list): Column names, when the range doesn't start with the header line (default: it does).
+    - executor (Executor): Pool of worker processes parsing the range in chunks when it is larger than
+      PARSE_CHUNK_BYTES (default: the range is parsed in one piece).
+    """
+    if executor is None or end - start <= PARSE_CHUNK_BYTES:
+        return parse_byte_range(file_path, schema, start, end, names)
+    if names is None:
+        names, start = read_header(file_path)
+    chunks = [executor.submit(parse_byte_range, file_path, schema, chunk_start, chunk_end, names, False)
+              for chunk_start, chunk_end in chunk_ranges(file_path, start, end, PARSE_CHUNK_BYTES)]
+    return downcast_numeric_columns(concat_frames([chunk.result() for chunk in chunks]), schema)
+
+
+def split_by_month(rows, sort_column):
+    """
+    Splits rows by UTC calendar month of their sort column, keeping their order.
+    Returns (month, rows) pairs in month order, followed by (None, rows without a date).
+    """
+    dates = rows[sort_column] if sort_column in rows.columns else None
+    if dates is None or not pd.api.types.is_datetime64_any_dtype(dates):
+        return [(None, rows)]
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(None)
+    groups = [(str(month), part) for month, part in rows.groupby(dates.dt.to_period('M'), sort=True)]
+    undated = rows[dates.isna()]
+    if len(undated):
+        groups.append((None, undated))
+    return groups
+
+
+def write_part(file_path, month, rows, sort_column, batches):
+    """
+    Writes rows of one month as a part file and returns its manifest entry.
+    """
+    part_name = f"{month or 'undated'}-{uuid.uuid4().hex[:12]}.parquet"
+    rows.to_parquet(os.path.join(store_dir(file_path), part_name), index=False)
+    part = {'file': part_name, 'month': month, 'first': None, 'last': None, 'batches': batches}
+    if month is not None:
+        dates = rows[sort_column]
+        part['first'], part['last'] = int(dates.min().value), int(dates.max().value)
+    return part
+
+
+def write_manifest(file_path, manifest):
+    path = os.path.join(store_dir(file_path), 'manifest.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh)
+    os.replace(tmp_path, path)
+
+
+def write_batch(file_path, manifest, rows, end_offset, sort_column):
+    """
+    Stores rows parsed from the source bytes up to end_offset as the next batch of a store, one part per month,
+    then records them in the manifest. Returns the updated manifest.
+    """
+    batch = manifest['batch'] + 1
+    parts = list(manifest['parts'])
+    for month, month_rows in split_by_month(rows, sort_column):
+        parts.append(write_part(file_path, month, month_rows, sort_column, [[batch, len(month_rows)]]))
+    with open(file_path, 'rb') as source:
+        digest = tail_digest(source, end_offset)
+    manifest = dict(manifest, signature=list(source_signature(file_path)[1:]), ingested_bytes=end_offset,
+                    row_count=manifest['row_count'] + len(rows), tail_digest=digest, batch=batch, parts=parts)
+    write_manifest(file_path, manifest)
+    return compact_months(file_path, manifest, sort_column)
+
+
+def compact_months(file_path, manifest, sort_column):
+    """
+    Merges the parts of each month that has more than MAX_MONTH_PARTS parts into one part, in batch order.
+    Returns the updated manifest.
+    """
+    parts_by_month = {}
+    for part in manifest['parts']:
+        parts_by_month.setdefault(part['month'], []).append(part)
+    stale_parts = []
+    parts = list(manifest['parts'])
+    for month, month_parts in parts_by_month.items():
+        if len(month_parts) <= MAX_MONTH_PARTS:
+            continue
+        month_parts = sorted(month_parts, key=lambda part: part['batches'][0][0])
+        rows = concat_frames([read_part(file_path, part) for part in month_parts])
+        batches = [batch for part in month_parts for batch in part['batches']]
+        parts = [part for part in parts if part not in month_parts]
+        parts.append(write_part(file_path, month, rows, sort_column, batches))
+        stale_parts += month_parts
+    if not stale_parts:
+        return manifest
+    manifest = dict(manifest, parts=parts)
+    write_manifest(file_path, manifest)
+    for part in stale_parts:
+        os.remove(os.path.join(store_dir(file_path), part['file']))
+    return manifest
+
+
+def create_store(file_path, schema, sort_column, rows, end_offset):
+    """
+    Starts the store of a source over, with the rows parsed from its first end_offset bytes.
+    Returns the manifest, or None when the store can't be written; the source is then loaded in full.
+    """
+    directory = store_dir(file_path)
+    manifest = {
+        'key': store_key(schema, sort_column),
+        'store_id': uuid.uuid4().hex,
+        'columns': list(rows.columns),
+        'signature': None,
+        'ingested_bytes': 0,
+        'row_count': 0,
+        'tail_digest': None,
+        'batch': 0,
+        'parts': [],
+    }
+    try:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+        return write_batch(file_path, manifest, rows, end_offset, sort_column)
+    except (OSError, ValueError, TypeError, ImportError):
+        return None
+
+
+def append_to_store(file_path, manifest, rows, end_offset, sort_column):
+    """
+    Adds the rows parsed from the bytes appended to a source to its store, as a new batch.
+    Returns the updated manifest, or None when the store can't be written.
+    """
+    try:
+        return write_batch(file_path, manifest, rows, end_offset, sort_column)
+    except (OSError, ValueError, TypeError, ImportError):
+        return None
+
+
+def ingest_source(file_path, schema, sort_column=None, append_only=False, executor=None):
+    """
+    Brings the month-partitioned store of a source up to date and returns its manifest,
+    or None when the store can't be written.
+    The whole source is ingested when it has no store yet or changed; for an append-only source,
+    only the rows appended since the previous refresh are parsed, unless it was rewritten rather than appended to.
+    Parameters:
+    - executor (Executor): Pool of worker processes parsing large byte ranges of an append-only source in chunks
+      (default: the rows are parsed in one piece).
+    """
+    manifest = read_manifest(file_path, schema, sort_column, append_only)
+    if manifest is None:
+        end = complete_lines_end(file_path, 0)
+        rows = parse_source(file_path, schema, 0, end, executor=executor if append_only else None)
+        return create_store(file_path, schema, sort_column, rows, end)
+    if not append_only:
+        return manifest
+    start = manifest['ingested_bytes']
+    end = complete_lines_end(file_path, start)
+    if end == start:
+        return manifest
+    rows = parse_source(file_path, schema, start, end, manifest['columns'], executor)
+    return append_to_store(file_path, manifest, rows, end, sort_column)
+
+
+def store_months(manifest, start_date=None, end_date=None):
+    """
+    Returns the months of a store, in order, with rows from start_date included to end_date excluded
+    (default: every month, the rows without a date last).
+    """
+    months = set()
+    for part in manifest['parts']:
+        if start_date is None or end_date is None:
+            months.add(part['month'])
+        elif part['month'] is not None and part['first'] < end_date.value and part['last'] >= start_date.value:
+            months.add(part['month'])
+    return sorted(months, key=lambda month: (month is None, month or ''))
+
+
+def store_date_bounds(manifest):
+    """
+    Returns the first and last UTC date of the rows of a store, or None when no row has a date.
+    """
+    dated = [part for part in manifest['parts'] if part['month'] is not None]
+    if not dated:
+        return None
+    return (pd.Timestamp(min(part['first'] for part in dated), tz='UTC'),
+            pd.Timestamp(max(part['last'] for part in dated), tz='UTC'))
+
+
+def read_part(file_path, part, columns=None):
+    return pd.read_parquet(os.path.join(store_dir(file_path), part['file']), columns=columns)
+
+
+def ordered_parts(manifest, months=None):
+    """
+    Returns the parts of some months of a store (default: every month) in reading order:
+    month by month, the rows without a date last, and in batch order within a month.
+    """
+    parts = [part for part in manifest['parts'] if months is None or part['month'] in months]
+    parts.sort(key=lambda part: (part['month'] is None, part['month'] or '', part['batches'][0][0]))
+    return parts
+
+
+def store_part_paths(file_path, manifest, months=None):
+    """
+    Returns the paths of the part files of some months of a store (default: every month), in reading order.
+    """
+    return [os.path.join(store_dir(file_path), part['file']) for part in ordered_parts(manifest, months)]
+
+
+def read_store(file_path, manifest, columns=None, months=None, after_batch=0):
+    """
+    Returns the rows of a store, month by month and in source order within each month.
+    Parameters:
+    - manifest (dict): Manifest of the store, as returned by read_manifest.
+    - columns (list): Only read these columns; names missing from the store are skipped (default: all columns).
+    - months (list): Only read the parts of these months, as returned by store_months (default: every month).
+    - after_batch (int): Only read the rows of the batches ingested after this one (default: every batch).
+    """
+    if columns is not None:
+        columns = [col for col in manifest['columns'] if col in columns]
+    frames = []
+    for part in ordered_parts(manifest, months):
+        # The rows of a part are in batch order, the rows of the batches already read come first
+        skipped = sum(rows for batch, rows in part['batches'] if batch <= after_batch)
+        if skipped < sum(rows for batch, rows in part['batches']):
+            frames.append(read_part(file_path, part, columns).iloc[skipped:])
+    if not frames:
+        # No rows: an empty frame with the column types of the store
+        if not manifest['parts']:
+            return pd.DataFrame(columns=columns if columns is not None else manifest['columns'])
+        path = os.path.join(store_dir(file_path), manifest['parts'][0]['file'])
+        return pq.read_schema(path).empty_table().to_pandas()[columns if columns is not None else slice(None)]
+    return concat_frames(frames)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+# Largest-Triangle-Three-Buckets downsampling of the series drawn as lines. The points between the first
+# and the last are split into equal buckets and one point is kept per bucket: the one forming the largest
+# triangle with the point kept in the previous bucket and the average of the next bucket. Peaks and dips
+# survive, and every point kept is an actual point of the series, so tooltips show real values.
+
+
+def lttb_positions(x, y, max_points):
+    """
+    Returns the sorted positions of the points kept from a series.
+    Parameters:
+    - x (array): Increasing x values, as numbers.
+    - y (array): Values of the series, without missing values.
+    - max_points (int): Number of points kept; series with no more points than this are kept whole.
+    """
+    count = len(x)
+    if max_points >= count or max_points < 3:
+        return np.arange(count)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket i holds the positions from edges[i] to edges[i + 1]; the last bucket is the last point alone
+    edges = np.append(np.linspace(1, count - 1, max_points - 1).astype(np.int64), count)
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_x = x[stop:edges[bucket + 2]].mean()
+        next_y = y[stop:edges[bucket + 2]].mean()
+        # Twice the area of the triangle formed with the previous point kept and the next bucket's average
+        areas = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                       - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def downsample(df, x_column, y_column, max_points):
+    """
+    Returns the rows of a series kept by LTTB downsampling, in their order.
+    Parameters:
+    - df (DataFrame): Rows of the series sorted by x_column, like the per-day rows of a daily chart.
+    - x_column (str): Numeric or datetime column of the x axis.
+    - y_column (str): Numeric column of the y axis.
+    - max_points (int): Number of rows kept, like the number of points a chart's width can show apart.
+    """
+    x = df[x_column]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype(np.int64)
+    return df.iloc[lttb_positions(x.to_numpy(), df[y_column].to_numpy(), max_points)]
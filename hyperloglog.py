@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# HyperLogLog sketches of distinct values, stored sparsely as tables with one row per
+# (group..., Register) holding the highest Rank seen in that register; registers never set are left out.
+# Sketches of the same groups merge by taking the register-wise maximum, so the distinct count of
+# any union of groups (a date range, several products) is estimated without going back to the rows.
+
+# Index bits of the 64-bit value hashes: 2**12 registers per sketch
+PRECISION = 12
+REGISTER_COUNT = 1 << PRECISION
+# Relative standard error of the estimates, about 1.6%: two thirds of the estimates are within
+# this fraction of the exact count, and 95% within twice that
+RELATIVE_ERROR = 1.04 / np.sqrt(REGISTER_COUNT)
+# Bias correction constant for 2**12 registers
+ALPHA = 0.7213 / (1 + 1.079 / REGISTER_COUNT)
+
+
+def leading_zeros(words):
+    """
+    Returns the number of leading zero bits of each non-zero 64-bit word.
+    The high and low halves are handled separately so that float64 holds them exactly.
+    """
+    high = (words >> np.uint64(32)).astype(np.float64)
+    low = (words & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide='ignore'):
+        high_zeros = 31 - np.floor(np.log2(high))
+        low_zeros = 63 - np.floor(np.log2(low))
+    return np.where(high > 0, high_zeros, low_zeros).astype(np.uint8)
+
+
+def hash_registers(values):
+    """
+    Returns the register index and rank of each value.
+    Parameters:
+    - values (Series): Values without missing entries; categorical columns are hashed once per category.
+    """
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+    registers = (hashes >> np.uint64(64 - PRECISION)).astype(np.uint16)
+    # The bit set below the remaining hash bits bounds the rank at 64 - PRECISION + 1
+    remaining = (hashes << np.uint64(PRECISION)) | np.uint64(1 << (PRECISION - 1))
+    return registers, leading_zeros(remaining) + 1
+
+
+def build_sketches(values, groups):
+    """
+    Returns the sketches of the distinct values of each group, sorted by group.
+    Parameters:
+    - values (Series): Values counted, rows with a missing value are left out.
+    - groups (list): Series of the same length as values, grouping the rows (like the day and the product of each row).
+    """
+    present = values.notna().to_numpy()
+    values = values[present]
+    registers, ranks = hash_registers(values)
+    keys = [group[present].reset_index(drop=True) for group in groups]
+    rows = pd.DataFrame({'Register': registers, 'Rank': ranks})
+    return rows.groupby(keys + [rows['Register']], observed=True)['Rank'].max().reset_index()
+
+
+def estimate_distinct(sketches, by=None):
+    """
+    Merges sketches and returns the estimated number of distinct values of the merged sketch,
+    or of each group of the `by` columns.
+    Parameters:
+    - sketches (DataFrame): Sketch rows, as returned by build_sketches.
+    - by (list): Group columns kept in the result (default: merge all the rows into one sketch).
+    """
+    by = by or []
+    merged = sketches.groupby(by + ['Register'], observed=True)['Rank'].max()
+    inverse = pd.Series(np.ldexp(1.0, -merged.to_numpy().astype(np.int32)), index=merged.index)
+    if by:
+        levels = list(range(len(by)))
+        harmonic = inverse.groupby(level=levels, observed=True).sum()
+        zeros = REGISTER_COUNT - inverse.groupby(level=levels, observed=True).size()
+    else:
+        harmonic = pd.Series([inverse.sum()])
+        zeros = pd.Series([REGISTER_COUNT - len(inverse)])
+    raw = ALPHA * REGISTER_COUNT ** 2 / (harmonic + zeros)
+    # Small cardinalities: linear counting over the empty registers is more accurate
+    with np.errstate(divide='ignore'):
+        linear = REGISTER_COUNT * np.log(REGISTER_COUNT / zeros)
+    estimate = np.where((raw <= 2.5 * REGISTER_COUNT) & (zeros > 0), linear, raw)
+    estimate = pd.Series(np.round(estimate).astype(np.int64), index=harmonic.index)
+    if not by:
+        return int(estimate.iloc[0]) if len(sketches) else 0
+    return estimate
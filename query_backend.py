@@ -0,0 +1,67 @@
+try:
+    import duckdb
+except ImportError:
+    # Optional: without DuckDB every aggregation runs in pandas
+    duckdb = None
+
+# Engines running the aggregations of the pages:
+# - 'pandas': over the rows of the page's date range, loaded in memory by the dataset registry
+# - 'duckdb': as SQL over the Parquet parts of the dataset stores with an embedded DuckDB database, which
+#   streams the parts of the range on all cores and materializes only the aggregated rows as a DataFrame
+QUERY_BACKENDS = ['pandas', 'duckdb']
+
+
+def connect_backend(name):
+    """
+    Returns the backend running queries over the dataset stores, or None when aggregations run in pandas,
+    either by choice or because the engine of the backend isn't installed.
+    Parameters:
+    - name (str): One of QUERY_BACKENDS.
+    """
+    if name not in QUERY_BACKENDS:
+        raise ValueError(f"Unknown query backend {name!r}, expected one of {QUERY_BACKENDS}")
+    if name == 'duckdb' and duckdb is not None:
+        return DuckDBBackend()
+    return None
+
+
+class DuckDBBackend:
+    """
+    Runs SQL queries over the part files of a dataset store.
+    Queries read a `rows` relation holding the columns of the parts and a `row_order` column numbering the
+    rows in the order of the registry frames: by the sort column of the dataset, missing dates last, then in
+    reading order. Ordering by it reproduces first-row semantics, like drop_duplicates or the order of first
+    appearance in which a groupby on a categorical column with observed=True returns its groups.
+    """
+    def __init__(self):
+        self._connection = duckdb.connect(database=':memory:')
+
+    def query(self, sql, paths, date_column=None, start_date=None, end_date=None):
+        """
+        Returns the result of a query as a DataFrame.
+        Parameters:
+        - sql (str): SELECT statement over `rows`.
+        - paths (list): Part files read, in the order of store_part_paths.
+        - date_column (str): Sort column of the dataset, filtered by the date range.
+        - start_date / end_date (Timestamp): Only query the rows from start_date included to end_date excluded
+          (default: all rows).
+        """
+        params = [paths, paths]
+        where = ''
+        order = 'list_position(?, filename), file_row_number'
+        if date_column is not None:
+            order = f'"{date_column}" NULLS LAST, {order}'
+        if date_column is not None and start_date is not None and end_date is not None:
+            where = f'WHERE "{date_column}" >= ? AND "{date_column}" < ?'
+            params += [start_date.to_pydatetime(), end_date.to_pydatetime()]
+        statement = f"""
+            WITH rows AS (
+                SELECT * EXCLUDE (filename, file_row_number), row_number() OVER (ORDER BY {order}) AS row_order
+                FROM read_parquet(?, filename = true, file_row_number = true)
+                {where}
+            )
+            {sql}
+        """
+        # A cursor is a connection of its own to the same database: viewer sessions query concurrently
+        with self._connection.cursor() as cursor:
+            return cursor.execute(statement, params).df()
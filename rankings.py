@@ -0,0 +1,167 @@
+# Rankings of the dashboard pages: each key of a ranking (a viewer, a product, a referring site) gets a score
+# computed from the rows of a date range, in pandas by its score function or, with a query backend, by its
+# SQL query over the dataset store. Both list the same keys in the same order, so that ties rank the same way
+# in either engine.
+
+
+def score_viewer_sessions(sessions):
+    # Number of sessions of each viewer among the given rows of the session table, one row per session.
+    # Session numbers count from the viewer's first session in the whole dataset, not from the start of a range.
+    return sessions.groupby('Customer_IP', observed=True).size().reset_index(name='session')
+
+
+def score_unique_visitors(df_cj, column):
+    visitors = df_cj.groupby(column, observed=True)['Customer_IP'].nunique().reset_index()
+    return visitors.rename(columns={'Customer_IP': 'Unique_Visitors'})
+
+
+def score_cart_add_visitors(df_cj):
+    return score_unique_visitors(df_cj[df_cj['Event'] == 'Cart Add'], 'Product_Name')
+
+
+def score_customer_spend(features):
+    spending = features[['Customer_ID', 'Customer_Name', 'Total_Spending']]
+    return spending.rename(columns={'Total_Spending': 'Order_Total_Price'})
+
+
+def score_customer_order_value(orders):
+    order_data = orders.groupby('Customer_Name', observed=True).agg(
+        {'Order_ID': 'first', 'Order_Total_Price': 'first'}).reset_index()
+    return order_data.dropna(subset=['Order_ID'])
+
+
+def score_order_sites(orders):
+    total_orders_by_site = orders.groupby("Order_Referring_Site", observed=True)["Order_ID"].count().reset_index()
+    total_orders_by_site.columns = ["Referring Site", "Total Orders"]
+    return total_orders_by_site
+
+
+def score_revenue_sites(orders):
+    total_revenue_by_site = orders.groupby("Order_Referring_Site", observed=True)["Order_Total_Price"].sum().reset_index()
+    total_revenue_by_site.columns = ["Referring Site", "Total Revenue"]
+    return total_revenue_by_site
+
+
+def score_abandoned_sites(df_abandoned_checkouts):
+    abandoned_sites = df_abandoned_checkouts[['Order_Referring_Site', 'Order_ID']].copy()
+    abandoned_sites['Order_Referring_Site'] = abandoned_sites['Order_Referring_Site'].astype(object).fillna('Unknown')  # Handle missing values
+    abandoned_sites['Order_ID'] = abandoned_sites['Order_ID'].astype(str)  # Ensure Order_ID is treated as a string
+    referring_sites = abandoned_sites.groupby('Order_Referring_Site', observed=True)['Order_ID'].nunique().reset_index()
+    return referring_sites.rename(columns={'Order_ID': 'Total_Abandoned_Orders'})
+
+
+def score_product_types(df_products):
+    df_products_ = df_products.dropna(subset=['Product_Published_At'])
+    product_types = df_products_['Product_Type'].replace("", "No Type")
+    # Counting unique Product_ID of each Product_Type
+    product_counts = df_products_['Product_ID'].groupby(product_types, observed=True).nunique().reset_index()
+    product_counts.columns = ['Product_Type', 'Count']
+    return product_counts
+
+
+def score_product_sales(df_orders):
+    return df_orders.groupby('Product_Name', observed=True)['Product_Quantity'].sum().reset_index()
+
+
+def score_product_prices(df_products, price):
+    df_products_ = df_products.dropna(subset=['Product_Published_At'])
+    # By Product_ID, then titles of a product in order of first appearance like RANKING_QUERIES: a sorted groupby
+    # lists them in the order the titles first appear in any product
+    prices = df_products_.groupby(["Product_ID", "Product_Title"], observed=True, sort=False).agg(
+        {"Variant_Price": price}).reset_index()
+    return prices.sort_values("Product_ID", kind='stable', ignore_index=True)
+
+
+# Ranking -> (dataset the ranked rows come from, function scoring every key from the rows, score column, K)
+# K is the largest number of keys a slider shows; None ranks every key
+# Viewers are ranked from the session table, orders from the order headers and customers from the customer
+# feature table, all derived from their dataset
+RANKINGS = {
+    'viewer_sessions': ('cj', score_viewer_sessions, 'session', 50),
+    'product_visitors': ('cj', lambda df_cj: score_unique_visitors(df_cj, 'Product_Name'), 'Unique_Visitors', 50),
+    'collection_visitors': ('cj', lambda df_cj: score_unique_visitors(df_cj, 'Collection_Name'), 'Unique_Visitors', 50),
+    'cart_add_visitors': ('cj', score_cart_add_visitors, 'Unique_Visitors', 50),
+    'customer_spend': ('orders', score_customer_spend, 'Order_Total_Price', 50),
+    'customer_order_value': ('orders', score_customer_order_value, 'Order_Total_Price', 50),
+    'order_sites': ('orders', score_order_sites, 'Total Orders', None),
+    'revenue_sites': ('orders', score_revenue_sites, 'Total Revenue', None),
+    'abandoned_sites': ('abandoned_checkouts', score_abandoned_sites, 'Total_Abandoned_Orders', 50),
+    'product_types': ('products', score_product_types, 'Count', None),
+    'product_sales': ('orders', score_product_sales, 'Product_Quantity', None),
+    'product_max_prices': ('products', lambda df_products: score_product_prices(df_products, 'max'), 'Variant_Price', None),
+    'product_min_prices': ('products', lambda df_products: score_product_prices(df_products, 'min'), 'Variant_Price', None),
+}
+
+
+# First row of each order, like drop_duplicates("Order_ID"): the line items of an order repeat its total
+FIRST_ORDER_ROWS = """
+    SELECT Order_ID, min(row_order) AS row_order,
+           first(Customer_Name ORDER BY row_order) AS Customer_Name,
+           first(Order_Referring_Site ORDER BY row_order) AS Order_Referring_Site,
+           first(Order_Total_Price ORDER BY row_order) AS Order_Total_Price
+    FROM rows GROUP BY Order_ID
+"""
+
+
+# Ranking -> SQL of a query backend over the `rows` of the ranked dataset (see query_backend.DuckDBBackend),
+# returning the same table as the score function of the ranking. Groups of categorical columns are listed in
+# order of first appearance like a pandas groupby with observed=True, other groups in key order; groups of both
+# are listed in key order, then in order of first appearance.
+# Rankings without a query, like those of derived tables, are scored in pandas.
+RANKING_QUERIES = {
+    'product_visitors': """
+        SELECT Product_Name, count(DISTINCT Customer_IP) AS Unique_Visitors
+        FROM rows WHERE Product_Name IS NOT NULL GROUP BY Product_Name ORDER BY min(row_order)
+    """,
+    'collection_visitors': """
+        SELECT Collection_Name, count(DISTINCT Customer_IP) AS Unique_Visitors
+        FROM rows WHERE Collection_Name IS NOT NULL GROUP BY Collection_Name ORDER BY min(row_order)
+    """,
+    'cart_add_visitors': """
+        SELECT Product_Name, count(DISTINCT Customer_IP) AS Unique_Visitors
+        FROM rows WHERE Event = 'Cart Add' AND Product_Name IS NOT NULL GROUP BY Product_Name ORDER BY min(row_order)
+    """,
+    'customer_order_value': """
+        SELECT Customer_Name, Order_ID, Order_Total_Price FROM (
+            SELECT Customer_Name, min(row_order) AS row_order,
+                   first(Order_ID ORDER BY row_order) FILTER (WHERE Order_ID IS NOT NULL) AS Order_ID,
+                   first(Order_Total_Price ORDER BY row_order) FILTER (WHERE Order_Total_Price IS NOT NULL)
+                       AS Order_Total_Price
+            FROM rows WHERE Customer_Name IS NOT NULL GROUP BY Customer_Name
+        ) WHERE Order_ID IS NOT NULL ORDER BY row_order
+    """,
+    'order_sites': f"""
+        SELECT Order_Referring_Site AS "Referring Site", count(Order_ID) AS "Total Orders"
+        FROM ({FIRST_ORDER_ROWS}) WHERE Order_Referring_Site IS NOT NULL
+        GROUP BY Order_Referring_Site ORDER BY min(row_order)
+    """,
+    'revenue_sites': f"""
+        SELECT Order_Referring_Site AS "Referring Site", coalesce(fsum(Order_Total_Price), 0) AS "Total Revenue"
+        FROM ({FIRST_ORDER_ROWS}) WHERE Order_Referring_Site IS NOT NULL
+        GROUP BY Order_Referring_Site ORDER BY min(row_order)
+    """,
+    'abandoned_sites': """
+        SELECT coalesce(Order_Referring_Site, 'Unknown') AS Order_Referring_Site,
+               count(DISTINCT coalesce(CAST(Order_ID AS VARCHAR), 'nan')) AS Total_Abandoned_Orders
+        FROM rows GROUP BY 1 ORDER BY 1
+    """,
+    'product_types': """
+        SELECT CASE WHEN Product_Type = '' THEN 'No Type' ELSE Product_Type END AS Product_Type,
+               count(DISTINCT Product_ID) AS Count
+        FROM rows WHERE Product_Published_At IS NOT NULL AND Product_Type IS NOT NULL GROUP BY 1 ORDER BY min(row_order)
+    """,
+    'product_sales': """
+        SELECT Product_Name, CAST(coalesce(sum(Product_Quantity), 0) AS BIGINT) AS Product_Quantity
+        FROM rows WHERE Product_Name IS NOT NULL GROUP BY Product_Name ORDER BY min(row_order)
+    """,
+    'product_max_prices': """
+        SELECT Product_ID, Product_Title, max(Variant_Price) AS Variant_Price
+        FROM rows WHERE Product_Published_At IS NOT NULL AND Product_ID IS NOT NULL AND Product_Title IS NOT NULL
+        GROUP BY Product_ID, Product_Title ORDER BY Product_ID, min(row_order)
+    """,
+    'product_min_prices': """
+        SELECT Product_ID, Product_Title, min(Variant_Price) AS Variant_Price
+        FROM rows WHERE Product_Published_At IS NOT NULL AND Product_ID IS NOT NULL AND Product_Title IS NOT NULL
+        GROUP BY Product_ID, Product_Title ORDER BY Product_ID, min(row_order)
+    """,
+}
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from data_loader import parse_datetime_column, parse_fixed_width_offsets, sniff_datetime_format
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-01-01T10:00:00+05:30', '2024-01-01 04:30:00'),
+    ('2024-01-01 10:00:00+05:30', '2024-01-01 04:30:00'),
+    ('2024-01-01 10:00:00 +05:30', '2024-01-01 04:30:00'),
+    ('2024-01-01 10:00:00 +0530', '2024-01-01 04:30:00'),
+    ('2024-01-01 10:00:00+0530', '2024-01-01 04:30:00'),
+    ('2024-01-01T10:00:00-04:00', '2024-01-01 14:00:00'),
+    ('2024-01-01T10:00:00-0400', '2024-01-01 14:00:00'),
+    ('2024-01-01 10:00:00 -0400', '2024-01-01 14:00:00'),
+    ('2024-01-01 10:00:00 -04:00', '2024-01-01 14:00:00'),
+    ('2024-01-01T10:00:00.250+05:30', '2024-01-01 04:30:00.250'),
+])
+def test_offsets_are_converted_to_utc(value, expected):
+    values = pd.Series([value, value, None], name='Event_Time')
+    parsed = parse_datetime_column(values)
+    assert parsed[0] == parsed[1] == pd.Timestamp(expected, tz='UTC')
+    assert parsed.isna()[2]
+    assert parsed.name == 'Event_Time'
+
+
+def test_mixed_offsets_in_one_column():
+    values = pd.Series(['2024-01-01T10:00:00+05:30', '2024-01-01T10:00:00-04:00', '2024-01-01T10:00:00+00:00'])
+    expected = pd.to_datetime(['2024-01-01 04:30', '2024-01-01 14:00', '2024-01-01 10:00'], utc=True)
+    assert list(parse_datetime_column(values)) == list(expected)
+
+
+@pytest.mark.parametrize('value', ['2024-01-01 10:00:00 +0530', '2024-01-01 10:00:00 -0400'])
+def test_fixed_width_path_rejects_other_offset_layouts(value):
+    # Same width as '+HH:MM', only the offset layout differs
+    assert parse_fixed_width_offsets(pd.Series([value]), '%Y-%m-%dT%H:%M:%S%z') is None
+
+
+def test_sniffed_format_agrees_with_the_generic_parser():
+    values = pd.Series(['2024-01-01 10:00:00 -0400'] * 3)
+    fmt = sniff_datetime_format(values)
+    assert fmt is not None
+    assert pd.to_datetime(values, format=fmt, utc=True).equals(pd.to_datetime(values, utc=True))
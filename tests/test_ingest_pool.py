@@ -0,0 +1,58 @@
+import pathlib
+import runpy
+
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+import data_loader
+
+DASHBOARD = pathlib.Path(__file__).resolve().parent.parent / 'Multiple_Datasets.py'
+
+# Ingests a source in small chunks on spawned workers from a script run, with the page under the same guard as
+# the dashboard's: each worker imports the script as __mp_main__
+INGEST_SCRIPT = """
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import streamlit as st
+import data_loader
+
+if __name__ == '__main__':
+    data_loader.PARSE_CHUNK_BYTES = 8192
+    pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn'))
+    manifest = data_loader.ingest_source(%r, {'Event_Time': 'datetime'}, 'Event_Time', append_only=True,
+                                         executor=pool)
+    st.text(manifest['row_count'])
+"""
+
+
+def write_source(path, rows=6000):
+    events = pd.DataFrame({
+        'Customer_IP': [f"10.0.{i % 7}.{i % 250}" for i in range(rows)],
+        'Event_Time': pd.date_range('2024-01-01', periods=rows, freq='15min').strftime('%Y-%m-%dT%H:%M:%S+00:00'),
+        'Event': 'Home',
+    })
+    events.to_csv(path, index=False)
+
+
+def test_chunked_ingest_runs_in_the_app(tmp_path):
+    pooled = tmp_path / 'pooled' / 'events.csv'
+    serial = tmp_path / 'serial' / 'events.csv'
+    for path in (pooled, serial):
+        path.parent.mkdir()
+        write_source(path)
+    app = AppTest.from_string(INGEST_SCRIPT % str(pooled), default_timeout=120).run()
+
+    assert not app.exception
+    assert [t.value for t in app.text] == ['6000']
+    expected = data_loader.ingest_source(str(serial), {'Event_Time': 'datetime'}, 'Event_Time', append_only=True)
+    manifest = data_loader.read_manifest(str(pooled), {'Event_Time': 'datetime'}, 'Event_Time', append_only=True)
+    pd.testing.assert_frame_equal(data_loader.read_store(str(pooled), manifest),
+                                  data_loader.read_store(str(serial), expected))
+
+
+def test_workers_import_the_dashboard_without_rendering_a_page():
+    # What a spawned worker runs before its first task: the page would load the logo and the datasets
+    namespace = runpy.run_path(str(DASHBOARD), run_name='__mp_main__')
+    assert 'show_cj_page' in namespace
+    assert 'show_page' not in namespace
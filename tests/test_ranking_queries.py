@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from data_loader import DATASET_SCHEMAS, DATASET_SORT_COLUMNS, ingest_source, read_store, store_part_paths
+from query_backend import connect_backend
+from rankings import RANKING_QUERIES, score_product_prices
+
+
+@pytest.fixture
+def products_store(tmp_path):
+    # Products 3 and 7 are each listed under two titles: the later title of 7 sorts first, the later title of 3
+    # first appears in product 7
+    products = pd.DataFrame({
+        'Product_ID': [7, 3, 7, 3, 9],
+        'Product_Title': ['Zinc mug', 'Bowl', 'Amber mug', 'Zinc mug', 'Spoon'],
+        'Product_Type': ['Mug', 'Bowl', 'Mug', 'Mug', 'Cutlery'],
+        'Variant_Price': [12.0, 8.5, 14.0, 9.5, 3.0],
+        'Product_Created_At': ['2024-01-01T09:00:00+00:00', '2024-01-02T09:00:00+00:00',
+                               '2024-01-03T09:00:00+00:00', '2024-01-04T09:00:00+00:00', ''],
+        'Variant_Created_At': '2024-01-01T09:00:00+00:00',
+        'Product_Published_At': ['2024-01-05', '2024-01-05', '2024-01-05', '2024-01-05', ''],
+    })
+    path = tmp_path / 'products.csv'
+    products.to_csv(path, index=False)
+    manifest = ingest_source(str(path), DATASET_SCHEMAS['products'], DATASET_SORT_COLUMNS['products'])
+    return read_store(str(path), manifest), store_part_paths(str(path), manifest)
+
+
+@pytest.mark.parametrize('price', ['max', 'min'])
+def test_price_rankings_match_pandas(products_store, price):
+    pytest.importorskip('duckdb')
+    rows, paths = products_store
+    expected = score_product_prices(rows, price)
+    table = connect_backend('duckdb').query(RANKING_QUERIES[f'product_{price}_prices'], paths,
+                                            DATASET_SORT_COLUMNS['products'])
+    assert list(zip(expected['Product_ID'], expected['Product_Title'])) == [
+        (3, 'Bowl'), (3, 'Zinc mug'), (7, 'Zinc mug'), (7, 'Amber mug')]
+    assert list(table['Product_ID']) == list(expected['Product_ID'])
+    assert list(table['Product_Title']) == list(expected['Product_Title'].astype(str))
+    assert list(table['Variant_Price']) == list(expected['Variant_Price'])